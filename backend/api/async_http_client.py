@@ -0,0 +1,117 @@
+"""
+Async counterpart of http_client for the async (ASGI) recommendation views.
+
+One httpx.AsyncClient per event loop holds the keep-alive connection pools, so a
+single process can keep hundreds of provider calls in flight without a thread
+per call. Calls go through the same per-provider circuit breakers and rate
+limiters as the synchronous client, and GETs are retried on transient 5xx
+responses like the requests sessions do.
+"""
+import asyncio
+import time
+import weakref
+
+import httpx
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from .circuit_breaker import ProviderUnavailable, get_circuit_breaker
+from .http_client import get_provider
+from .rate_limit import get_rate_limiter, parse_retry_after
+
+RETRY_STATUSES = (500, 502, 503, 504)
+
+_clients = weakref.WeakKeyDictionary()
+
+
+def get_client():
+    """
+    Return the AsyncClient of the running event loop, creating it on first use.
+    """
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = _build_client()
+        _clients[loop] = client
+    return client
+
+
+def _build_client():
+    max_connections = getattr(settings, 'PROVIDER_ASYNC_MAX_CONNECTIONS', 200)
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(getattr(settings, 'PROVIDER_HTTP_READ_TIMEOUT', 10.0),
+                              connect=getattr(settings, 'PROVIDER_HTTP_CONNECT_TIMEOUT', 3.05)),
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        transport=httpx.AsyncHTTPTransport(retries=getattr(settings, 'PROVIDER_HTTP_RETRIES', 2)),
+    )
+
+
+async def request(method, url, **kwargs):
+    """
+    Send a request through the event loop's shared AsyncClient.
+
+    Behaves like http_client.request: calls to a provider whose circuit breaker is
+    open fail fast with ProviderUnavailable, and a 429 response blocks the provider
+    for its Retry-After period and is retried once if that period is short enough.
+    Calls that would wait longer than PROVIDER_MAX_RETRY_AFTER for the rate limit
+    raise ProviderUnavailable and count as failures.
+
+    :param method: The HTTP method, e.g. "GET".
+    :param url: The full request URL.
+    :param kwargs: Keyword arguments accepted by httpx.AsyncClient.request, e.g. params or headers.
+    :return: The httpx.Response object.
+    """
+    provider = get_provider(url)
+    breaker = get_circuit_breaker(provider)
+    if not breaker.allow():
+        raise ProviderUnavailable(provider)
+
+    limiter = get_rate_limiter(provider)
+    start = time.monotonic()
+    try:
+        response = await _send(get_client(), limiter, method, url, kwargs)
+    except (httpx.HTTPError, ProviderUnavailable):
+        breaker.record(False, time.monotonic() - start)
+        raise
+    breaker.record(response.status_code < 500, time.monotonic() - start)
+    return response
+
+
+async def _send(client, limiter, method, url, kwargs):
+    retries = getattr(settings, 'PROVIDER_HTTP_RETRIES', 2) if method == "GET" else 0
+    backoff = getattr(settings, 'PROVIDER_HTTP_BACKOFF', 0.3)
+    max_wait = getattr(settings, 'PROVIDER_MAX_RETRY_AFTER', 5)
+    for attempt in range(retries + 1):
+        if limiter is not None:
+            await limiter.aacquire(max_wait)
+        response = await client.request(method, url, **kwargs)
+        if response.status_code == 429 and limiter is not None:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            print(f"[WARNING] {limiter.name} rate limited us, backing off for {retry_after:.1f}s")
+            if limiter.shared:
+                # The shared block is written to the cache backend, which is synchronous
+                await sync_to_async(limiter.penalize, thread_sensitive=False)(retry_after)
+            else:
+                limiter.penalize(retry_after)
+            if retry_after <= max_wait:
+                await limiter.aacquire(max_wait)
+                response = await client.request(method, url, **kwargs)
+            return response
+        if response.status_code not in RETRY_STATUSES or attempt == retries:
+            return response
+        await asyncio.sleep(backoff * (2 ** attempt))
+    return response
+
+
+async def get(url, **kwargs):
+    """
+    Send a GET request through the shared async provider client.
+    """
+    return await request("GET", url, **kwargs)
+
+
+async def post(url, **kwargs):
+    """
+    Send a POST request through the shared async provider client.
+    """
+    return await request("POST", url, **kwargs)
@@ -0,0 +1,373 @@
+"""
+Native async versions of the recommendation and emotion endpoints.
+
+These are plain Django async views (DRF's @api_view is synchronous only), mounted
+under /api/async/. Provider calls go through async_http_client and
+async_cached_get, so under an ASGI server (see DEPLOYMENT.md) a single process
+multiplexes every in-flight provider call on one event loop instead of pinning a
+worker thread per request. Under WSGI they still work, one request at a time.
+
+Parsing of provider responses, validation and the fallback catalogs are shared
+with the synchronous views in views.py.
+"""
+import json
+import random
+from functools import wraps
+from types import SimpleNamespace
+
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
+from rest_framework.exceptions import AuthenticationFailed, NotAuthenticated, PermissionDenied
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .circuit_breaker import ProviderUnavailable, is_provider_available
+from .fanout import afetch_categories, afetch_concurrently
+from .media_catalog import lookup_titles
+from .personalization import get_preferences
+from .response_cache import async_cached_get, async_get_cached_response
+from .spotify_auth import get_spotify_token, spotify_token_manager
+from .tmdb_collector import TmdbCollector, finalize_tmdb_results
+from .views import (
+    EMOTION_TO_SPOTIFY_GENRE, MEDIA_CATALOG_CANDIDATES, SPOTIFY_RECOMMENDATIONS_URL, SPOTIFY_SEARCH_URL,
+    TMDB_KINDS, InvalidImageError, format_google_books, format_spotify_tracks, get_cached_spotify_tracks,
+    get_cached_tmdb_recommendation, get_tmdb_api_key, google_books_params, infer_text_emotion,
+    infer_uploaded_facial_emotion, paginate_categories, parse_recommendation_request, personalize_items,
+    project_items, save_mood_history, spotify_recommendation_params, spotify_search_params, tmdb_discover_params,
+)
+
+
+def async_api_view(methods, permission_classes=None, authentication_classes=None):
+    """
+    Restrict an async view to the given HTTP methods and exempt it from CSRF checks, like @api_view.
+
+    :param permission_classes: DRF permission classes the request must pass, e.g. [IsAuthenticated]. Requests are
+                               only authenticated when permissions are given.
+    :param authentication_classes: DRF authentication classes, defaulting to DEFAULT_AUTHENTICATION_CLASSES.
+    """
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            if request.method not in methods:
+                return JsonResponse({"error": f"Method \"{request.method}\" not allowed."}, status=405)
+            if permission_classes:
+                # Token lookups use the ORM, which must stay on the thread-sensitive executor
+                denied = await sync_to_async(check_permissions)(request, permission_classes, authentication_classes)
+                if denied is not None:
+                    return denied
+            return await view(request, *args, **kwargs)
+        wrapper.csrf_exempt = True
+        return wrapper
+    return decorator
+
+
+def check_permissions(request, permission_classes, authentication_classes=None):
+    """
+    Authenticate a request with the DRF authenticators and check its permissions.
+
+    Sets request.user on success. Authenticators and permissions may query the database, so this is synchronous.
+
+    :return: None if the request is allowed, otherwise a 401 or 403 JsonResponse.
+    """
+    authenticators = [cls() for cls in (authentication_classes or api_settings.DEFAULT_AUTHENTICATION_CLASSES)]
+    drf_request = Request(request, authenticators=authenticators)
+    try:
+        for permission in (cls() for cls in permission_classes):
+            if not permission.has_permission(drf_request, None):
+                raise NotAuthenticated() if drf_request.user is None or not drf_request.user.is_authenticated \
+                    else PermissionDenied()
+    except (AuthenticationFailed, NotAuthenticated, PermissionDenied) as e:
+        response = JsonResponse({"detail": str(e.detail)}, status=e.status_code)
+        if isinstance(e, (AuthenticationFailed, NotAuthenticated)) and authenticators:
+            auth_header = authenticators[0].authenticate_header(drf_request)
+            if auth_header:
+                response["WWW-Authenticate"] = auth_header
+            else:
+                response.status_code = 403
+        return response
+    return None
+
+
+def get_request_data(request):
+    """
+    Return the JSON or form body of a request as a dict.
+    """
+    if request.content_type == "application/json":
+        try:
+            return json.loads(request.body or b"{}")
+        except ValueError:
+            return {}
+    return request.POST
+
+
+def error_response(response):
+    """
+    Convert a DRF error Response from the shared validation helpers into a JsonResponse.
+    """
+    return JsonResponse(response.data, status=response.status_code)
+
+
+async def aspotify_cached_get(url, params):
+    """Async version of spotify_cached_get."""
+    token = await sync_to_async(get_spotify_token, thread_sensitive=False)()
+    response = await async_cached_get(url, headers={"Authorization": f"Bearer {token}"}, params=params)
+    if response.status_code == 401:
+        await sync_to_async(spotify_token_manager.invalidate, thread_sensitive=False)()
+        token = await sync_to_async(get_spotify_token, thread_sensitive=False)()
+        response = await async_cached_get(url, headers={"Authorization": f"Bearer {token}"}, params=params)
+    return response
+
+
+async def aget_music_recommendation(emotion):
+    """Async version of get_music_recommendation."""
+    if is_provider_available("spotify"):
+        try:
+            return format_spotify_tracks(await afetch_spotify_tracks(emotion))
+        except ProviderUnavailable:
+            pass
+    tracks = await sync_to_async(get_cached_spotify_tracks, thread_sensitive=False)(emotion)
+    print(f"[WARNING] Spotify is unavailable, serving {len(tracks)} cached music recommendations")
+    return format_spotify_tracks(tracks)
+
+
+async def afetch_spotify_tracks(emotion):
+    """Async version of fetch_spotify_tracks."""
+    seed_genres = EMOTION_TO_SPOTIFY_GENRE.get(emotion.lower())
+
+    tracks = []
+    # Try genre-based recommendations
+    if seed_genres:
+        rec_resp = await aspotify_cached_get(SPOTIFY_RECOMMENDATIONS_URL,
+                                             params=spotify_recommendation_params(seed_genres))
+        if rec_resp.status_code == 200:
+            tracks = rec_resp.json().get("tracks", [])
+    # Fallback to search if no genre recommendations
+    if not tracks:
+        search_resp = await aspotify_cached_get(SPOTIFY_SEARCH_URL, params=spotify_search_params(emotion))
+        tracks = search_resp.json().get("tracks", {}).get("items", [])
+    return tracks
+
+
+async def aget_story_recommendation(emotion):
+    """Async version of get_story_recommendation."""
+    url = "https://www.googleapis.com/books/v1/volumes"
+    if is_provider_available("google_books"):
+        try:
+            resp = await async_cached_get(url, params=google_books_params(emotion))
+            return format_google_books(resp.json().get("items", []), 30)
+        except ProviderUnavailable:
+            pass
+    resp = await async_get_cached_response(url, params=google_books_params(emotion))
+    if resp is None:
+        print("[WARNING] Google Books is unavailable, skipping story recommendations")
+        return []
+    print("[WARNING] Google Books is unavailable, serving cached story recommendations")
+    return format_google_books(resp.json().get("items", []), 30)
+
+
+async def afetch_tmdb_results(url, params, label):
+    """Async version of fetch_tmdb_results."""
+    resp = await async_cached_get(url, params=params)
+    if resp.status_code != 200:
+        print(f"[ERROR] TMDB API request failed: {resp.status_code} {resp.text}")
+        return []
+    results = resp.json().get("results", [])
+    print(f"[DEBUG] TMDB API returned {len(results)} {label}")
+    return results
+
+
+async def aiter_tmdb_pages(kind, api_key, genre_ids, primary_genre):
+    """
+    Async version of iter_tmdb_pages: lazily yield the TMDB result pages for an emotion.
+    """
+    label = TMDB_KINDS[kind]["label"]
+    discover_url = f"https://api.themoviedb.org/3/discover/{kind}"
+
+    resp = await async_cached_get(discover_url, params=tmdb_discover_params(api_key, primary_genre, 1))
+    print(f"[DEBUG] TMDB API response status: {resp.status_code}")
+
+    if resp.status_code == 200:
+        data = resp.json()
+        total_pages = min(data.get("total_pages", 1), 5)  # Limit to 5 pages max
+        yield data.get("results", [])
+
+        if total_pages > 1:
+            pages_to_fetch = min(3, total_pages - 1)
+            pages = random.sample(range(2, total_pages + 1), pages_to_fetch) if total_pages > 2 else [2]
+            page_calls = [
+                lambda page_num=page_num: afetch_tmdb_results(
+                    discover_url, tmdb_discover_params(api_key, primary_genre, page_num),
+                    f"additional {label} from page {page_num}")
+                for page_num in pages
+            ]
+            async for results in afetch_concurrently(page_calls):
+                yield results
+    else:
+        print(f"[ERROR] TMDB API request failed: {resp.status_code} {resp.text}")
+
+    if len(genre_ids) > 1:
+        secondary_genre = random.choice([g for g in genre_ids if g != primary_genre])
+        yield await afetch_tmdb_results(discover_url, tmdb_discover_params(api_key, secondary_genre, 1),
+                                        f"{label} for secondary genre {secondary_genre}")
+
+    yield await afetch_tmdb_results(
+        f"https://api.themoviedb.org/3/{kind}/popular", {"api_key": api_key, "language": "en-US", "page": 1},
+        f"popular {label}")
+
+
+async def aget_tmdb_recommendation(kind, emotion):
+    """Async version of get_tmdb_recommendation."""
+    config = TMDB_KINDS[kind]
+    label = config["label"]
+    genre_ids = config["genres"].get(emotion.lower(), config["default_genres"])
+    primary_genre = random.choice(genre_ids)
+
+    target = 50
+    collector = TmdbCollector(kind, target)
+
+    # Answer from the local media catalog when it already holds enough titles
+    catalog_results = await sync_to_async(lookup_titles, thread_sensitive=False)(
+        kind, genre_ids, MEDIA_CATALOG_CANDIDATES)
+    if len(catalog_results) >= target:
+        collector.add_results(random.sample(catalog_results, len(catalog_results)))
+        return collector.finalize()
+
+    if not is_provider_available("tmdb"):
+        return await sync_to_async(get_cached_tmdb_recommendation, thread_sensitive=False)(kind, emotion, target)
+
+    api_key = get_tmdb_api_key()
+    if not api_key:
+        return config["defaults"].copies(emotion)
+
+    try:
+        pages = aiter_tmdb_pages(kind, api_key, genre_ids, primary_genre)
+        try:
+            async for results in pages:
+                collector.add_results(results)
+                if collector.done:
+                    break
+        finally:
+            await pages.aclose()
+
+        if len(collector) < 10:
+            print(f"[WARNING] Not enough {label} found ({len(collector)}), adding default {label}")
+            collector.add_defaults(config["defaults"].fill(emotion, collector.titles, target - len(collector)))
+    except ProviderUnavailable as e:
+        print(f"[WARNING] {str(e)}, serving cached {label}")
+        return await sync_to_async(get_cached_tmdb_recommendation, thread_sensitive=False)(kind, emotion, target)
+    except Exception as e:
+        print(f"[ERROR] Exception in aget_tmdb_recommendation for {kind}: {str(e)}")
+        return finalize_tmdb_results(config["defaults"].copies(emotion), target)
+
+    return collector.finalize()
+
+
+async def aget_movie_recommendation(emotion):
+    return await aget_tmdb_recommendation("movie", emotion)
+
+
+async def aget_webseries_recommendation(emotion):
+    return await aget_tmdb_recommendation("tv", emotion)
+
+
+# Async provider functions keyed by response category, mirroring CATEGORY_FETCHERS
+ASYNC_CATEGORY_FETCHERS = {
+    "music": aget_music_recommendation,
+    "movies": aget_movie_recommendation,
+    "webseries": aget_webseries_recommendation,
+    "stories": aget_story_recommendation,
+}
+
+
+@async_api_view(["POST"])
+async def recommendations(request):
+    """
+    Async version of the recommendations endpoint, with the same parameters and response.
+
+    :param request: The request object containing the emotion input.
+    :return: The JSON response containing the recommendations.
+    """
+    params, error = parse_recommendation_request(
+        SimpleNamespace(data=get_request_data(request), query_params=request.GET))
+    if error is not None:
+        return error_response(error)
+    emotion, categories = params["emotion"], params["categories"]
+    await sync_to_async(save_mood_history)(params["user_id"], emotion)
+    preferences = await sync_to_async(get_preferences, thread_sensitive=False)(params["user_id"])
+
+    try:
+        response_data = {
+            "emotion": emotion,
+            "recommendations": {category: [] for category in categories},
+            "category_status": {},
+            "next_cursors": {category: None for category in categories},
+        }
+        full_sets = {}
+        fetchers = {category: ASYNC_CATEGORY_FETCHERS[category] for category in categories}
+        async for category, items, fetch_status, elapsed_ms in afetch_categories(
+                emotion, fetchers, budget=params["budget"]):
+            response_data["category_status"][category] = fetch_status
+            if fetch_status != "ok":
+                print(f"No {category} recommendations ({fetch_status} after {elapsed_ms} ms)")
+                continue
+            full_sets[category] = project_items(personalize_items(category, items, preferences), params["fields"])
+
+        # Return the first page of each category; the rest stays available under a cursor for /api/recommendations/page/
+        pages, cursors = await sync_to_async(paginate_categories, thread_sensitive=False)(
+            emotion, full_sets, params["page_size"])
+        response_data["recommendations"].update(pages)
+        response_data["next_cursors"].update(cursors)
+        return JsonResponse(response_data)
+    except Exception as e:
+        print(f"Error in async recommendations API: {str(e)}")
+        return JsonResponse({"error": str(e)}, status=500)
+
+
+@async_api_view(["POST"])
+async def music_recommendation(request):
+    """
+    Async version of the music recommendation endpoint.
+    """
+    emotion = get_request_data(request).get("emotion", "")
+    if not emotion:
+        return JsonResponse({"error": "No emotion provided"}, status=400)
+    return JsonResponse({"emotion": emotion, "recommendations": await aget_music_recommendation(emotion)})
+
+
+@async_api_view(["POST"])
+async def text_emotion(request):
+    """
+    Async version of the text emotion endpoint: infer the emotion and return music recommendations.
+    """
+    data = get_request_data(request)
+    text = data.get("text", "")
+    if not text:
+        return JsonResponse({"error": "No text provided"}, status=400)
+
+    emotion = await sync_to_async(infer_text_emotion, thread_sensitive=False)(text)
+    recommendations = await aget_music_recommendation(emotion)
+    await sync_to_async(save_mood_history)(data.get("user_id"), emotion)
+    return JsonResponse({"emotion": emotion, "recommendations": recommendations})
+
+
+@async_api_view(["POST"], permission_classes=[IsAuthenticated])
+async def facial_emotion(request):
+    """
+    Async version of the facial emotion endpoint: infer the emotion and return music recommendations.
+    """
+    if 'file' not in request.FILES:
+        return JsonResponse({"error": "No image file provided"}, status=400)
+
+    try:
+        emotion = await sync_to_async(infer_uploaded_facial_emotion, thread_sensitive=False)(request.FILES['file'])
+        if emotion is None:
+            return JsonResponse({"error": "Failed to infer emotion from the image."}, status=500)
+        recommendations = await aget_music_recommendation(emotion)
+        await sync_to_async(save_mood_history)(request.POST.get("user_id"), emotion)
+        return JsonResponse({"emotion": emotion, "recommendations": recommendations})
+    except InvalidImageError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    except Exception as e:
+        print(f"Exception occurred during image processing: {str(e)}")
+        return JsonResponse({"error": str(e)}, status=500)
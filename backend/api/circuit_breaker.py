@@ -0,0 +1,175 @@
+"""
+Per-provider circuit breakers for the outbound provider calls.
+
+Each provider's breaker tracks the outcome and latency of its most recent calls.
+When too many of them fail or are slow the breaker opens and calls to that
+provider are rejected immediately, so the recommendation functions serve cached
+responses or fall back to their built-in catalogs instead of waiting on a failing
+chain. After a cool-down
+the breaker lets a few probe calls through (half-open) and closes again once they
+succeed.
+"""
+import threading
+import time
+from collections import deque
+
+from django.conf import settings
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+
+class ProviderUnavailable(Exception):
+    """
+    Raised instead of calling a provider whose circuit breaker is open, or that is rate limited for too long.
+    """
+
+    def __init__(self, provider, reason="circuit open"):
+        super().__init__(f"{provider} is unavailable ({reason})")
+        self.provider = provider
+
+
+class CircuitBreaker:
+    """
+    Closed/open/half-open circuit breaker over a sliding window of recent calls.
+    """
+
+    def __init__(self, name, window=20, min_calls=10, failure_rate=0.5, slow_call_seconds=5.0,
+                 slow_call_rate=0.8, open_seconds=30.0, half_open_calls=3):
+        """
+        :param name: The provider name.
+        :param window: Number of recent calls the failure and slow-call rates are computed over.
+        :param min_calls: Minimum number of calls in the window before the breaker can open.
+        :param failure_rate: Fraction of failed calls that opens the breaker.
+        :param slow_call_seconds: Calls taking longer than this count as slow.
+        :param slow_call_rate: Fraction of slow calls that opens the breaker.
+        :param open_seconds: How long the breaker stays open before allowing probe calls.
+        :param half_open_calls: Number of successful probe calls needed to close the breaker.
+        """
+        self.name = name
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.half_open_calls = half_open_calls
+        self._calls = deque(maxlen=window)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probes = 0
+        self._probe_successes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self):
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._probes = 0
+            self._probe_successes = 0
+        return self._state
+
+    def allow(self):
+        """
+        Return whether a call may be made now; in the half-open state this reserves a probe slot.
+        """
+        with self._lock:
+            state = self._current_state()
+            if state == CLOSED:
+                return True
+            if state == HALF_OPEN and self._probes < self.half_open_calls:
+                self._probes += 1
+                return True
+            return False
+
+    def is_available(self):
+        """
+        Return whether the provider is worth calling, without reserving a probe slot.
+        """
+        return self.state != OPEN
+
+    def record(self, success, duration):
+        """
+        Record the outcome of a call.
+
+        :param success: False if the call raised or returned a server error.
+        :param duration: The call duration in seconds.
+        """
+        slow = duration >= self.slow_call_seconds
+        with self._lock:
+            state = self._current_state()
+            if state == HALF_OPEN:
+                if not success or slow:
+                    self._open()
+                else:
+                    self._probe_successes += 1
+                    if self._probe_successes >= self.half_open_calls:
+                        print(f"[DEBUG] {self.name} circuit closed")
+                        self._state = CLOSED
+                        self._calls.clear()
+                return
+
+            self._calls.append((success, slow))
+            if state == CLOSED and len(self._calls) >= self.min_calls:
+                failure_rate, slow_rate = self._rates()
+                if failure_rate >= self.failure_rate or slow_rate >= self.slow_call_rate:
+                    self._open()
+
+    def _rates(self):
+        total = len(self._calls)
+        if not total:
+            return 0.0, 0.0
+        failures = sum(1 for success, _ in self._calls if not success)
+        slow = sum(1 for _, is_slow in self._calls if is_slow)
+        return failures / total, slow / total
+
+    def _open(self):
+        print(f"[WARNING] {self.name} circuit opened for {self.open_seconds}s")
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+
+    def snapshot(self):
+        """
+        Return the breaker state and recent failure/slow-call rates for inspection.
+        """
+        with self._lock:
+            state = self._current_state()
+            failure_rate, slow_rate = self._rates()
+            snapshot = {
+                "state": state,
+                "recent_calls": len(self._calls),
+                "failure_rate": round(failure_rate, 3),
+                "slow_call_rate": round(slow_rate, 3),
+            }
+            if state == OPEN:
+                snapshot["retry_in_seconds"] = round(self.open_seconds - (time.monotonic() - self._opened_at), 1)
+            return snapshot
+
+
+def get_circuit_breaker(provider):
+    """
+    Return the circuit breaker of a provider, creating it from PROVIDER_CIRCUIT_BREAKER on first use.
+    """
+    breaker = _breakers.get(provider)
+    if breaker is None:
+        with _breakers_lock:
+            breaker = _breakers.get(provider)
+            if breaker is None:
+                breaker = CircuitBreaker(provider, **getattr(settings, 'PROVIDER_CIRCUIT_BREAKER', {}))
+                _breakers[provider] = breaker
+    return breaker
+
+
+def is_provider_available(provider):
+    """
+    Return False while the provider's circuit breaker is open.
+    """
+    return get_circuit_breaker(provider).is_available()
+
@@ -0,0 +1,157 @@
+"""
+Memoization of text emotion results by normalized text.
+
+Inputs are normalized (case folded, punctuation removed, whitespace collapsed)
+and hashed, so "I feel sad!", "i feel sad" and " I  feel SAD " share one entry.
+Keys are prefixed with the identity of the model that computed them (see
+TextEmotionEngine.identity), so results of a previous model or label list are
+never served after a redeploy.
+Results live in a bounded in-process LRU of TEXT_EMOTION_CACHE_SIZE entries and,
+with TEXT_EMOTION_CACHE_SHARED=True, also in the Django cache (Redis when
+REDIS_URL is set) so workers reuse each other's results. Only results of real
+model inference are stored, never the fallback emotion. Hit and miss counters
+are kept per worker.
+"""
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+
+STAT_NAMES = ("local_hit", "shared_hit", "miss")
+
+
+def normalize_text(text):
+    """
+    Fold case, drop punctuation and collapse whitespace.
+    """
+    text = "".join(" " if unicodedata.category(char).startswith("P") else char for char in str(text).casefold())
+    return " ".join(text.split())
+
+
+def make_cache_key(text, model_identity=""):
+    """
+    Return the cache key of a text: the model identity and a hash of the normalized text.
+    """
+    return f"text_emotion:{model_identity}:{hashlib.sha1(normalize_text(text).encode('utf-8')).hexdigest()}"
+
+
+class LruCache:
+    """
+    Thread-safe mapping that drops its least recently used entries beyond max_entries.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+_local = None
+_local_lock = threading.Lock()
+_stats = dict.fromkeys(STAT_NAMES, 0)
+_stats_lock = threading.Lock()
+
+
+def get_local_cache():
+    """
+    Return the in-process LRU, sized by TEXT_EMOTION_CACHE_SIZE.
+    """
+    global _local
+    if _local is None:
+        with _local_lock:
+            if _local is None:
+                _local = LruCache(getattr(settings, 'TEXT_EMOTION_CACHE_SIZE', 10000))
+    return _local
+
+
+def _record(name):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def _shared_get(key):
+    try:
+        return cache.get(key)
+    except Exception as e:
+        print(f"[ERROR] Text emotion cache unavailable: {str(e)}")
+        return None
+
+
+def _shared_set(key, emotion):
+    try:
+        cache.set(key, emotion, timeout=getattr(settings, 'TEXT_EMOTION_CACHE_TTL', 86400))
+    except Exception as e:
+        print(f"[ERROR] Failed to cache text emotion: {str(e)}")
+
+
+def get_or_infer(text, infer_fn, model_identity=""):
+    """
+    Return the cached emotion of a text, running infer_fn on a miss.
+
+    :param text: The input text.
+    :param infer_fn: Function classifying one text; exceptions propagate and nothing is cached.
+    :param model_identity: Identity of the model behind infer_fn, part of the cache key.
+    :return: The emotion label.
+    """
+    key = make_cache_key(text, model_identity)
+    local = get_local_cache()
+    emotion = local.get(key)
+    if emotion is not None:
+        _record("local_hit")
+        return emotion
+
+    shared = getattr(settings, 'TEXT_EMOTION_CACHE_SHARED', False)
+    if shared:
+        emotion = _shared_get(key)
+        if emotion is not None:
+            _record("shared_hit")
+            local.set(key, emotion)
+            return emotion
+
+    _record("miss")
+    emotion = infer_fn(text)
+    local.set(key, emotion)
+    if shared:
+        _shared_set(key, emotion)
+    return emotion
+
+
+def get_stats():
+    """
+    Return this worker's hit and miss counters, hit ratio and LRU size.
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    total = sum(stats.values())
+    stats["hit_ratio"] = round((stats["local_hit"] + stats["shared_hit"]) / total, 3) if total else None
+    local = get_local_cache()
+    stats["entries"] = len(local)
+    stats["max_entries"] = local.max_entries
+    stats["shared"] = getattr(settings, 'TEXT_EMOTION_CACHE_SHARED', False)
+    return stats
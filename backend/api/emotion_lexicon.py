@@ -0,0 +1,154 @@
+"""
+Keyword fast path for text emotion inference.
+
+Many inputs name their emotion outright ("so happy today", "i feel lonely").
+Every keyword and phrase of LEXICON is compiled into a single regular
+expression, scanned once over the normalized text. Each match adds its weight to
+its emotion (phrases weigh more than single words). The confidence of the best
+emotion is its share of all matched weight times a saturating function of its
+own weight, so one clear keyword is enough while mixed signals are not.
+
+Texts are left to the model (match returns None) when the confidence is below
+TEXT_EMOTION_LEXICON_THRESHOLD, when they are longer than
+TEXT_EMOTION_LEXICON_MAX_WORDS, or when a negation ("not", "don't", "never")
+precedes a keyword, since negation changes the meaning in ways a lexicon cannot
+follow.
+"""
+import math
+import re
+import threading
+import time
+
+from django.conf import settings
+
+from .emotion_cache import normalize_text
+
+# Keywords and phrases of every emotion, matched on normalized text (see emotion_cache.normalize_text)
+LEXICON = {
+    "happy": ["happy", "happier", "happiest", "joy", "joyful", "glad", "delighted", "cheerful", "great day",
+              "feeling good", "feel good", "feel great", "feeling great", "so good", "blessed"],
+    "sad": ["sad", "sadder", "saddest", "unhappy", "depressed", "heartbroken", "miserable", "crying", "cry",
+            "cried", "tears", "down today", "feeling down", "feel down", "gloomy", "grief", "grieving"],
+    "angry": ["angry", "angrier", "mad at", "furious", "rage", "raging", "pissed", "livid", "outraged", "hate",
+              "hatred", "so mad", "irate"],
+    "relaxed": ["relaxed", "relaxing", "chill", "chilled", "chilling", "calm", "peaceful", "at ease",
+                "laid back", "unwind", "unwinding", "serene", "cozy", "lazy sunday"],
+    "energetic": ["energetic", "energized", "pumped", "full of energy", "hyped", "workout", "ready to go",
+                  "powered up"],
+    "nostalgic": ["nostalgic", "nostalgia", "good old days", "old times", "memories", "reminiscing",
+                  "miss the days", "back in the day", "childhood", "throwback"],
+    "anxious": ["anxious", "anxiety", "nervous", "worried", "worry", "worrying", "stressed", "stress",
+                "panic", "panicking", "on edge", "uneasy", "scared", "afraid", "overthinking"],
+    "hopeful": ["hopeful", "hope", "hoping", "optimistic", "looking forward", "things will get better",
+                "better days", "fingers crossed", "new beginning"],
+    "proud": ["proud", "pride", "accomplished", "achieved", "nailed it", "i did it", "promoted", "graduated",
+              "got the job"],
+    "lonely": ["lonely", "loneliness", "alone", "isolated", "by myself", "no one", "nobody", "left out",
+               "miss you", "missing you"],
+    "neutral": ["neutral", "okay", "ok", "fine", "meh", "nothing special", "normal day", "so so"],
+    "amused": ["amused", "funny", "hilarious", "lol", "lmao", "haha", "hahaha", "laughing", "made me laugh",
+               "cracking up", "jokes"],
+    "frustrated": ["frustrated", "frustrating", "frustration", "annoyed", "annoying", "irritated", "fed up",
+                   "sick of", "tired of", "stuck", "ugh"],
+    "romantic": ["romantic", "in love", "love you", "crush", "date night", "my partner", "my girlfriend",
+                 "my boyfriend", "valentine", "sweetheart", "darling"],
+    "surprised": ["surprised", "surprise", "shocked", "unexpected", "didn t expect", "wow", "cannot believe",
+                  "can t believe", "omg", "no way"],
+    "confused": ["confused", "confusing", "puzzled", "don t understand", "makes no sense",
+                 "no idea", "not sure what", "unsure", "baffled"],
+    "excited": ["excited", "exciting", "thrilled", "can t wait", "cannot wait", "stoked", "ecstatic",
+                "so pumped", "big day"],
+    "shy": ["shy", "awkward", "embarrassed", "timid", "introverted", "nervous to talk", "blushing", "bashful"],
+    "bored": ["bored", "boring", "boredom", "nothing to do", "dull", "tedious", "so slow", "uninterested"],
+    "playful": ["playful", "silly", "goofy", "mischievous", "fun", "having fun", "let s play", "feeling cheeky",
+                "cheeky"],
+}
+
+# Words that flip or hedge the keyword after them; "t" is the tail of "don't" once punctuation is folded
+NEGATIONS = {"not", "no", "never", "t", "dont", "cant", "isnt", "wasnt", "didnt", "aint", "hardly", "without"}
+
+# Words before a keyword that are searched for a negation
+NEGATION_WINDOW = 3
+
+WORD_WEIGHT = 1.0
+PHRASE_WEIGHT = 1.5
+
+
+def compile_lexicon(lexicon):
+    """
+    Compile a lexicon into one alternation regex and a term -> (emotion, weight) table.
+
+    Longer terms come first in the alternation so phrases win over the words inside them.
+    """
+    terms = {}
+    for emotion, phrases in lexicon.items():
+        for phrase in phrases:
+            term = normalize_text(phrase)
+            terms[term] = (emotion, PHRASE_WEIGHT if " " in term else WORD_WEIGHT)
+    alternation = "|".join(re.escape(term) for term in sorted(terms, key=len, reverse=True))
+    return re.compile(rf"\b(?:{alternation})\b"), terms
+
+
+PATTERN, TERMS = compile_lexicon(LEXICON)
+
+
+def score(text):
+    """
+    Score a text against the lexicon.
+
+    :return: Tuple of the best emotion (or None), its confidence in [0, 1] and whether a keyword was negated.
+    """
+    normalized = normalize_text(text)
+    weights = {}
+    negated = False
+    for found in PATTERN.finditer(normalized):
+        preceding = normalized[:found.start()].split()[-NEGATION_WINDOW:]
+        if NEGATIONS.intersection(preceding):
+            negated = True
+            continue
+        emotion, weight = TERMS[found.group()]
+        weights[emotion] = weights.get(emotion, 0) + weight
+    if not weights:
+        return None, 0.0, negated
+    best = max(weights, key=weights.get)
+    share = weights[best] / sum(weights.values())
+    return best, share * (1 - math.exp(-weights[best])), negated
+
+
+_stats = {"answered": 0, "deferred": 0, "seconds": 0.0}
+_stats_lock = threading.Lock()
+
+
+def match(text):
+    """
+    Return the emotion of a text if the lexicon is confident about it, otherwise None.
+    """
+    if not getattr(settings, 'TEXT_EMOTION_LEXICON_ENABLED', True):
+        return None
+    start = time.perf_counter()
+    emotion = None
+    if len(str(text).split()) <= getattr(settings, 'TEXT_EMOTION_LEXICON_MAX_WORDS', 30):
+        best, confidence, negated = score(text)
+        if not negated and confidence >= getattr(settings, 'TEXT_EMOTION_LEXICON_THRESHOLD', 0.6):
+            emotion = best
+    elapsed = time.perf_counter() - start
+    with _stats_lock:
+        _stats["answered" if emotion else "deferred"] += 1
+        _stats["seconds"] += elapsed
+    return emotion
+
+
+def get_stats():
+    """
+    Return how many texts this worker answered from the lexicon and how long matching took on average.
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+    total = stats["answered"] + stats["deferred"]
+    return {
+        "answered": stats["answered"],
+        "deferred": stats["deferred"],
+        "answered_ratio": round(stats["answered"] / total, 3) if total else None,
+        "mean_match_us": round(stats["seconds"] / total * 1e6, 1) if total else None,
+        "threshold": getattr(settings, 'TEXT_EMOTION_LEXICON_THRESHOLD', 0.6),
+    }
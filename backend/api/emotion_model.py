@@ -0,0 +1,378 @@
+"""
+CPU inference engine for the text emotion model.
+
+The fine-tuned sequence classifier downloaded by download_models.py
+(ai_ml/models/text_emotion_model/model.safetensors) is loaded on first use. The
+safetensors file is memory-mapped copy-on-write and every weight tensor is a view
+into that mapping, so no weights are copied when loading. When the application
+is preloaded in the gunicorn master (TEXT_EMOTION_PRELOAD=True and --preload),
+all workers share the same physical pages. The tokenizer, config and label map
+are loaded once per process.
+
+With TEXT_EMOTION_BATCH_MAX_SIZE above 1, concurrent calls are grouped by a
+MicroBatcher into padded batches of up to that many texts, collected for at most
+TEXT_EMOTION_BATCH_MAX_WAIT_MS, so concurrent requests share one forward pass.
+
+Texts whose emotion is obvious from keywords are answered by emotion_lexicon
+without touching the model. Model results are memoized by normalized text in
+emotion_cache, so repeated phrases skip inference entirely.
+
+The classifier's output labels must be the app's emotion vocabulary
+(views.EMOTIONS), in the order of the classifier head. They come from
+TEXT_EMOTION_LABELS, a labels.json list next to the weights, or the id2label map
+of a config.json there. Missing or unknown labels, or a label count that does not
+match the classifier head, mark the engine "misconfigured": requests answer
+TEXT_EMOTION_FALLBACK and the error is reported by text_emotion_stats, while
+preloading at startup (TEXT_EMOTION_PRELOAD) raises ImproperlyConfigured.
+
+torch and transformers are optional: without them, or without the model file,
+infer_text_emotion returns TEXT_EMOTION_FALLBACK as before.
+"""
+import hashlib
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from . import emotion_cache, emotion_lexicon
+from .micro_batcher import MicroBatcher
+
+# Size in bytes of each safetensors dtype
+SAFETENSORS_ITEM_SIZES = {
+    "F64": 8, "F32": 4, "F16": 2, "BF16": 2,
+    "I64": 8, "I32": 4, "I16": 2, "I8": 1, "U8": 1, "BOOL": 1,
+}
+
+# Files that let the tokenizer be loaded from the model directory itself
+TOKENIZER_FILES = ("tokenizer.json", "vocab.txt", "tokenizer_config.json")
+
+# JSON list of the classifier's labels in output order, shipped next to the weights
+LABELS_FILE = "labels.json"
+
+
+class MappedSafetensors:
+    """
+    A safetensors file mapped into memory, with the location of every tensor in it.
+
+    The file is mapped copy-on-write: pages are shared with every other process
+    mapping the same file (or forked after mapping it) until one of them writes.
+    """
+
+    def __init__(self, path):
+        self.path = str(path)
+        with open(self.path, "rb") as f:
+            self.buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+        header_size = struct.unpack("<Q", self.buffer[:8])[0]
+        header = json.loads(self.buffer[8:8 + header_size])
+        self.metadata = header.pop("__metadata__", {})
+        data_start = 8 + header_size
+        # name -> (dtype, shape, offset, size) with offsets relative to the start of the file
+        self.tensors = {
+            name: (info["dtype"], tuple(info["shape"]), data_start + info["data_offsets"][0],
+                   info["data_offsets"][1] - info["data_offsets"][0])
+            for name, info in header.items()
+        }
+
+    @property
+    def nbytes(self):
+        return len(self.buffer)
+
+    def numpy(self, name):
+        """
+        Return a tensor as a numpy array backed by the mapping.
+        """
+        import numpy as np
+
+        dtype, shape, offset, size = self.tensors[name]
+        np_dtype = {"F64": np.float64, "F32": np.float32, "F16": np.float16, "I64": np.int64, "I32": np.int32,
+                    "I16": np.int16, "I8": np.int8, "U8": np.uint8, "BOOL": np.bool_}[dtype]
+        return np.frombuffer(self.buffer, dtype=np_dtype, count=size // SAFETENSORS_ITEM_SIZES[dtype],
+                             offset=offset).reshape(shape)
+
+    def torch_state_dict(self):
+        """
+        Return every tensor as a torch tensor backed by the mapping.
+        """
+        import torch
+
+        dtypes = {"F64": torch.float64, "F32": torch.float32, "F16": torch.float16, "BF16": torch.bfloat16,
+                  "I64": torch.int64, "I32": torch.int32, "I16": torch.int16, "I8": torch.int8,
+                  "U8": torch.uint8, "BOOL": torch.bool}
+        state_dict = {}
+        for name, (dtype, shape, offset, size) in self.tensors.items():
+            count = size // SAFETENSORS_ITEM_SIZES[dtype]
+            if count == 0:
+                state_dict[name] = torch.empty(shape, dtype=dtypes[dtype])
+                continue
+            state_dict[name] = torch.frombuffer(self.buffer, dtype=dtypes[dtype], count=count,
+                                                offset=offset).reshape(shape)
+        return state_dict
+
+
+def read_labels(model_dir):
+    """
+    Return the classifier labels from TEXT_EMOTION_LABELS, labels.json or config.json, in output order.
+
+    :raises ImproperlyConfigured: If none of them defines the labels.
+    """
+    labels = getattr(settings, 'TEXT_EMOTION_LABELS', [])
+    labels_path = os.path.join(model_dir, LABELS_FILE)
+    config_path = os.path.join(model_dir, "config.json")
+    if not labels and os.path.exists(labels_path):
+        with open(labels_path) as f:
+            labels = json.load(f)
+    elif not labels and os.path.exists(config_path):
+        with open(config_path) as f:
+            id2label = json.load(f).get("id2label", {})
+        labels = [id2label[key] for key in sorted(id2label, key=int)]
+    if not labels:
+        raise ImproperlyConfigured(f"The text emotion labels are not defined: set TEXT_EMOTION_LABELS or add "
+                                   f"{LABELS_FILE} to {model_dir}")
+    return [str(label).strip().lower() for label in labels]
+
+
+def check_labels(labels, weights):
+    """
+    Check that every label is an app emotion and that the classifier head has one output per label.
+
+    :raises ImproperlyConfigured: If a check fails.
+    """
+    from .views import EMOTIONS
+
+    unknown = [label for label in labels if label not in EMOTIONS]
+    if unknown:
+        raise ImproperlyConfigured(f"Text emotion labels {', '.join(unknown)} are not app emotions "
+                                   f"({', '.join(EMOTIONS)})")
+    heads = [name for name in weights.tensors if name.endswith("classifier.weight")]
+    if heads:
+        outputs = weights.tensors[heads[-1]][1][0]
+        if outputs != len(labels):
+            raise ImproperlyConfigured(f"The text emotion classifier has {outputs} outputs "
+                                       f"but {len(labels)} labels are configured")
+
+
+def model_identity(weights_path, labels):
+    """
+    Return a short hash of the weights file's size and modification time and of the label list.
+    """
+    stat = os.stat(weights_path)
+    return hashlib.sha1(f"{stat.st_size}:{stat.st_mtime_ns}:{','.join(labels)}".encode("utf-8")).hexdigest()[:12]
+
+
+def resident_memory_bytes():
+    """
+    Return the resident set size of this process in bytes, or None where /proc is not available.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class TextEmotionEngine:
+    """
+    Lazily loaded text emotion classifier with load and latency statistics.
+    """
+
+    def __init__(self, model_dir):
+        """
+        :param model_dir: Directory holding model.safetensors and, optionally, config.json and tokenizer files.
+        """
+        self.model_dir = str(model_dir)
+        self.status = "not_loaded"
+        self.error = None
+        self.model = None
+        self.tokenizer = None
+        self.labels = None
+        self.weights = None
+        self.batcher = None
+        self.identity = ""
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.load_seconds = None
+        self.rss_before_load = None
+        self.rss_after_load = None
+        self.calls = 0
+        self.texts = 0
+        self.total_seconds = 0.0
+        self.last_seconds = None
+
+    @property
+    def ready(self):
+        return self.status == "ready"
+
+    def load(self, strict=False):
+        """
+        Load the tokenizer, config and memory-mapped weights once; later calls return immediately.
+
+        :param strict: Raise instead of returning False when the labels are misconfigured, e.g. at startup.
+        :return: True if the model is ready, False if it is unavailable or misconfigured.
+        :raises ImproperlyConfigured: With strict=True, if the labels do not match the app emotions or the
+                                      classifier head.
+        """
+        if self.status == "not_loaded":
+            with self._lock:
+                if self.status == "not_loaded":
+                    self._load_once()
+        if strict and self.status == "misconfigured":
+            raise ImproperlyConfigured(self.error)
+        return self.ready
+
+    def _load_once(self):
+        start = time.perf_counter()
+        self.rss_before_load = resident_memory_bytes()
+        try:
+            self._load()
+            self.status = "ready"
+        except ImproperlyConfigured as e:
+            self.status = "misconfigured"
+            self.error = str(e)
+            print(f"[ERROR] Text emotion model is misconfigured, using the fallback emotion: {str(e)}")
+        except Exception as e:
+            self.status = "unavailable"
+            self.error = str(e)
+            print(f"[WARNING] Text emotion model unavailable, using the fallback emotion: {str(e)}")
+        self.load_seconds = time.perf_counter() - start
+        self.rss_after_load = resident_memory_bytes()
+        if self.ready:
+            print(f"[DEBUG] Loaded text emotion model in {self.load_seconds:.2f}s "
+                  f"({self.weights.nbytes / 2 ** 20:.0f} MiB mapped, labels: {', '.join(self.labels)})")
+
+    def _load(self):
+        weights_path = os.path.join(self.model_dir, "model.safetensors")
+        if not os.path.exists(weights_path):
+            raise FileNotFoundError(f"{weights_path} not found, run download_models.py")
+        self.weights = MappedSafetensors(weights_path)
+        labels = read_labels(self.model_dir)
+        check_labels(labels, self.weights)
+        self.identity = model_identity(weights_path, labels)
+
+        import torch
+        from transformers import AutoConfig, AutoModelForSequenceClassification, AutoTokenizer
+
+        threads = getattr(settings, 'TEXT_EMOTION_THREADS', 0)
+        if threads:
+            torch.set_num_threads(threads)
+
+        base_model = getattr(settings, 'TEXT_EMOTION_BASE_MODEL', 'distilbert-base-uncased')
+        has_config = os.path.exists(os.path.join(self.model_dir, "config.json"))
+        config = AutoConfig.from_pretrained(self.model_dir if has_config else base_model)
+        config.num_labels = len(labels)
+        config.id2label = dict(enumerate(labels))
+        config.label2id = {label: i for i, label in enumerate(labels)}
+
+        model = AutoModelForSequenceClassification.from_config(config)
+        # assign=True keeps the mapped tensors as parameters instead of copying them into the new model
+        missing, unexpected = model.load_state_dict(self.weights.torch_state_dict(), strict=False, assign=True)
+        if missing:
+            print(f"[WARNING] Text emotion model is missing {len(missing)} weights, e.g. {missing[0]}")
+        if unexpected:
+            print(f"[WARNING] Text emotion model has {len(unexpected)} unused weights, e.g. {unexpected[0]}")
+        model.eval()
+
+        has_tokenizer = any(os.path.exists(os.path.join(self.model_dir, name)) for name in TOKENIZER_FILES)
+        self.tokenizer = AutoTokenizer.from_pretrained(self.model_dir if has_tokenizer else base_model)
+        self.labels = labels
+        self.model = model
+        self._torch = torch
+
+        max_batch_size = getattr(settings, 'TEXT_EMOTION_BATCH_MAX_SIZE', 1)
+        if max_batch_size > 1:
+            self.batcher = MicroBatcher(self.predict, max_batch_size=max_batch_size,
+                                        max_wait=getattr(settings, 'TEXT_EMOTION_BATCH_MAX_WAIT_MS', 5) / 1000,
+                                        name="text-emotion-batcher")
+
+    def classify(self, text):
+        """
+        Classify one text, batched with concurrent calls when batching is enabled.
+        """
+        if self.batcher is None:
+            return self.predict([text])[0]
+        return self.batcher(text, timeout=getattr(settings, 'TEXT_EMOTION_TIMEOUT', 10))
+
+    def predict(self, texts):
+        """
+        Classify a batch of texts.
+
+        :param texts: List of strings.
+        :return: List of emotion labels, one per text.
+        """
+        start = time.perf_counter()
+        encoded = self.tokenizer(list(texts), padding=True, truncation=True, return_tensors="pt",
+                                 max_length=getattr(settings, 'TEXT_EMOTION_MAX_LENGTH', 128))
+        with self._torch.inference_mode():
+            logits = self.model(**encoded).logits
+        labels = [self.labels[index] for index in logits.argmax(dim=-1).tolist()]
+        elapsed = time.perf_counter() - start
+        with self._stats_lock:
+            self.calls += 1
+            self.texts += len(labels)
+            self.total_seconds += elapsed
+            self.last_seconds = elapsed
+        return labels
+
+    def stats(self):
+        """
+        Return the load time, memory use and per-call latency of the engine.
+        """
+        with self._stats_lock:
+            return {
+                "status": self.status,
+                "error": self.error,
+                "model_dir": self.model_dir,
+                "labels": self.labels,
+                "identity": self.identity,
+                "load_seconds": round(self.load_seconds, 3) if self.load_seconds is not None else None,
+                "weights_mapped_bytes": self.weights.nbytes if self.weights is not None else None,
+                "rss_bytes": resident_memory_bytes(),
+                "rss_load_delta_bytes": (self.rss_after_load - self.rss_before_load
+                                         if self.rss_after_load is not None and self.rss_before_load is not None
+                                         else None),
+                "calls": self.calls,
+                "texts": self.texts,
+                "mean_call_ms": round(self.total_seconds / self.calls * 1000, 2) if self.calls else None,
+                "last_call_ms": round(self.last_seconds * 1000, 2) if self.last_seconds is not None else None,
+                "batching": self.batcher.stats() if self.batcher is not None else None,
+            }
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine():
+    """
+    Return the process-wide text emotion engine; the model itself is loaded on first use.
+    """
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = TextEmotionEngine(getattr(settings, 'TEXT_EMOTION_MODEL_DIR', ''))
+    return _engine
+
+
+def infer(text):
+    """
+    Return the emotion of a text, or TEXT_EMOTION_FALLBACK if the model is unavailable or fails.
+
+    Confident keyword matches are answered by the lexicon; only the remaining texts reach the model.
+    """
+    emotion = emotion_lexicon.match(text)
+    if emotion:
+        return emotion
+    fallback = getattr(settings, 'TEXT_EMOTION_FALLBACK', 'happy')
+    engine = get_engine()
+    if not engine.load():
+        return fallback
+    try:
+        return emotion_cache.get_or_infer(text, engine.classify, engine.identity)
+    except Exception as e:
+        print(f"[ERROR] Text emotion inference failed: {str(e)}")
+        return fallback
@@ -0,0 +1,546 @@
+"""
+Built-in movie and web series catalogs used when TMDB cannot be reached.
+
+The catalogs are built once at import into read-only structures: the titles of
+each catalog are grouped by the emotions they suit, every emotion gets a
+precomputed ordering with its own groups first, and the set of all titles is
+kept so a fallback list can be assembled without rescanning the collected items.
+"""
+from types import MappingProxyType
+
+
+class FallbackCatalog:
+    """
+    Read-only, emotion-indexed list of fallback titles.
+    """
+
+    def __init__(self, groups):
+        """
+        :param groups: List of (emotions, items) pairs; items are dicts shaped like the collector output.
+        """
+        frozen_groups = [(emotions, tuple(MappingProxyType(dict(item)) for item in items))
+                         for emotions, items in groups]
+        self.items = tuple(item for _, items in frozen_groups for item in items)
+        self.titles = frozenset(item["title"] for item in self.items)
+
+        by_emotion = {}
+        for emotion in {emotion for emotions, _ in frozen_groups for emotion in emotions}:
+            own = {}
+            for emotions, items in frozen_groups:
+                if emotion in emotions:
+                    for item in items:
+                        own.setdefault(item["title"], item)
+            rest = tuple(item for item in self.items if item["title"] not in own)
+            by_emotion[emotion] = tuple(own.values()) + rest
+        self.by_emotion = MappingProxyType(by_emotion)
+
+    def for_emotion(self, emotion=None):
+        """
+        Return the titles ordered for an emotion, or in catalog order for an unknown emotion.
+        """
+        if emotion is None:
+            return self.items
+        return self.by_emotion.get(emotion.lower(), self.items)
+
+    def copies(self, emotion=None):
+        """
+        Return mutable copies of every title, ordered for the emotion.
+        """
+        return [dict(item) for item in self.for_emotion(emotion)]
+
+    def fill(self, emotion, exclude_titles, count):
+        """
+        Return copies of up to `count` titles for the emotion whose title is not in `exclude_titles`.
+
+        :param emotion: The emotion the titles are ordered for.
+        :param exclude_titles: Set of titles that are already collected.
+        :param count: Maximum number of titles to return.
+        """
+        candidates = self.for_emotion(emotion)
+        if exclude_titles.isdisjoint(self.titles):
+            return [dict(item) for item in candidates[:count]]
+        return [dict(item) for item in candidates if item["title"] not in exclude_titles][:count]
+
+
+DEFAULT_MOVIES = FallbackCatalog([
+    # Uplifting and Happy Movies
+    (("happy", "hopeful", "proud", "nostalgic"), [
+        {
+            "title": "The Pursuit of Happyness",
+            "year": "2006",
+            "description": "A struggling salesman takes custody of his son as he's poised to begin a life-changing professional career.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/lUqW75zJiHHYJQQQpJJCaNa8p1U.jpg",
+            "external_url": "https://www.themoviedb.org/movie/1402",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=The+Pursuit+of+Happyness+2006+trailer",
+            "rating": 8.0
+        },
+        {
+            "title": "La La Land",
+            "year": "2016",
+            "description": "While navigating their careers in Los Angeles, a pianist and an actress fall in love while attempting to reconcile their aspirations for the future.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/uDO8zWDhfWwoFdKS4fzkUJt0Rf0.jpg",
+            "external_url": "https://www.themoviedb.org/movie/313369",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=La+La+Land+2016+trailer",
+            "rating": 8.0
+        },
+        {
+            "title": "Forrest Gump",
+            "year": "1994",
+            "description": "The presidencies of Kennedy and Johnson, the events of Vietnam, Watergate, and other historical events unfold from the perspective of an Alabama man with an IQ of 75.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/h5J4W4veyxMXDMjeNxZI46TsHOb.jpg",
+            "external_url": "https://www.themoviedb.org/movie/13",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Forrest+Gump+1994+trailer",
+            "rating": 8.4
+        },
+    ]),
+
+    # Emotional and Dramatic Movies
+    (("sad", "lonely", "shy", "neutral"), [
+        {
+            "title": "The Shawshank Redemption",
+            "year": "1994",
+            "description": "Two imprisoned men bond over a number of years, finding solace and eventual redemption through acts of common decency.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/q6y0Go1tsGEsmtFryDOJo3dEmqu.jpg",
+            "external_url": "https://www.themoviedb.org/movie/278",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=The+Shawshank+Redemption+1994+trailer",
+            "rating": 9.2
+        },
+        {
+            "title": "Schindler's List",
+            "year": "1993",
+            "description": "In German-occupied Poland during World War II, industrialist Oskar Schindler gradually becomes concerned for his Jewish workforce after witnessing their persecution by the Nazis.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/sF1U4EUQS8YHUYjNl3pMGNIQyr0.jpg",
+            "external_url": "https://www.themoviedb.org/movie/424",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Schindler%27s+List+1993+trailer",
+            "rating": 8.9
+        },
+        {
+            "title": "The Green Mile",
+            "year": "1999",
+            "description": "The lives of guards on Death Row are affected by one of their charges: a black man accused of child murder and rape, yet who has a mysterious gift.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/velWPhVMQeQKcxggNEU8YmIo52R.jpg",
+            "external_url": "https://www.themoviedb.org/movie/497",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=The+Green+Mile+1999+trailer",
+            "rating": 8.5
+        },
+    ]),
+
+    # Action and Exciting Movies
+    (("angry", "energetic", "excited", "bored"), [
+        {
+            "title": "The Dark Knight",
+            "year": "2008",
+            "description": "When the menace known as the Joker wreaks havoc and chaos on the people of Gotham, Batman must accept one of the greatest psychological and physical tests of his ability to fight injustice.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/qJ2tW6WMUDux911r6m7haRef0WH.jpg",
+            "external_url": "https://www.themoviedb.org/movie/155",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=The+Dark+Knight+2008+trailer",
+            "rating": 9.0
+        },
+        {
+            "title": "Inception",
+            "year": "2010",
+            "description": "A thief who steals corporate secrets through the use of dream-sharing technology is given the inverse task of planting an idea into the mind of a C.E.O.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/9gk7adHYeDvHkCSEqAvQNLV5Uge.jpg",
+            "external_url": "https://www.themoviedb.org/movie/27205",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Inception+2010+trailer",
+            "rating": 8.5
+        },
+        {
+            "title": "Mad Max: Fury Road",
+            "year": "2015",
+            "description": "In a post-apocalyptic wasteland, a woman rebels against a tyrannical ruler in search for her homeland with the aid of a group of female prisoners, a psychotic worshiper, and a drifter named Max.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/hA2ple9q4qnwxp3hKVNhroW8zQn.jpg",
+            "external_url": "https://www.themoviedb.org/movie/76341",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Mad+Max+Fury+Road+2015+trailer",
+            "rating": 8.1
+        },
+    ]),
+
+    # Adventure and Fantasy Movies
+    (("hopeful", "energetic", "relaxed", "playful"), [
+        {
+            "title": "The Lord of the Rings: The Fellowship of the Ring",
+            "year": "2001",
+            "description": "A meek Hobbit from the Shire and eight companions set out on a journey to destroy the powerful One Ring and save Middle-earth from the Dark Lord Sauron.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/6oom5QYQ2yQTMJIbnvbkBL9cHo6.jpg",
+            "external_url": "https://www.themoviedb.org/movie/120",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=The+Lord+of+the+Rings%3A+The+Fellowship+of+the+Ring+2001+trailer",
+            "rating": 8.8
+        },
+        {
+            "title": "Avatar",
+            "year": "2009",
+            "description": "A paraplegic Marine dispatched to the moon Pandora on a unique mission becomes torn between following his orders and protecting the world he feels is his home.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/jRXYjXNq0Cs2TcJjLkki24MLp7u.jpg",
+            "external_url": "https://www.themoviedb.org/movie/19995",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Avatar+2009+trailer",
+            "rating": 7.5
+        },
+        {
+            "title": "The Princess Bride",
+            "year": "1987",
+            "description": "While home sick in bed, a young boy's grandfather reads him the story of a farmboy-turned-pirate who encounters numerous obstacles, enemies and allies in his quest to be reunited with his true love.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/dvjqlp2sAhUeFjUOfQDgqwpphHj.jpg",
+            "external_url": "https://www.themoviedb.org/movie/2493",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=The+Princess+Bride+1987+trailer",
+            "rating": 8.1
+        },
+    ]),
+
+    # Crime and Thriller Movies
+    (("anxious", "frustrated", "angry"), [
+        {
+            "title": "The Godfather",
+            "year": "1972",
+            "description": "The aging patriarch of an organized crime dynasty transfers control of his clandestine empire to his reluctant son.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/3bhkrj58Vtu7enYsRolD1fZdja1.jpg",
+            "external_url": "https://www.themoviedb.org/movie/238",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=The+Godfather+1972+trailer",
+            "rating": 9.2
+        },
+        {
+            "title": "Pulp Fiction",
+            "year": "1994",
+            "description": "The lives of two mob hitmen, a boxer, a gangster and his wife, and a pair of diner bandits intertwine in four tales of violence and redemption.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/d5iIlFn5s0ImszYzBPb8JPIf36R.jpg",
+            "external_url": "https://www.themoviedb.org/movie/680",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Pulp+Fiction+1994+trailer",
+            "rating": 8.9
+        },
+        {
+            "title": "The Silence of the Lambs",
+            "year": "1991",
+            "description": "A young F.B.I. cadet must receive the help of an incarcerated and manipulative cannibal killer to help catch another serial killer, a madman who skins his victims.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/rplLJ2hPcOQmkFhTqUte0MkEaO2.jpg",
+            "external_url": "https://www.themoviedb.org/movie/274",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=The+Silence+of+the+Lambs+1991+trailer",
+            "rating": 8.6
+        },
+    ]),
+
+    # Comedy Movies
+    (("happy", "amused", "playful", "bored", "neutral"), [
+        {
+            "title": "The Grand Budapest Hotel",
+            "year": "2014",
+            "description": "The adventures of Gustave H, a legendary concierge at a famous hotel, and Zero Moustafa, the lobby boy who becomes his most trusted friend.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/eWdyYQreja6JGCzqHWXpWHDrrPo.jpg",
+            "external_url": "https://www.themoviedb.org/movie/120467",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=The+Grand+Budapest+Hotel+2014+trailer",
+            "rating": 8.1
+        },
+        {
+            "title": "The Hangover",
+            "year": "2009",
+            "description": "Three buddies wake up from a bachelor party in Las Vegas, with no memory of the previous night and the bachelor missing.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/uluhlXubGu1VxU63X9VHCLWDAYP.jpg",
+            "external_url": "https://www.themoviedb.org/movie/18785",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=The+Hangover+2009+trailer",
+            "rating": 7.8
+        },
+        {
+            "title": "Superbad",
+            "year": "2007",
+            "description": "Two co-dependent high school seniors are forced to deal with separation anxiety after their plan to stage a booze-soaked party goes awry.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/ek8e8txUyUwd2BNqj6lFAuuNmpC.jpg",
+            "external_url": "https://www.themoviedb.org/movie/8363",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Superbad+2007+trailer",
+            "rating": 7.5
+        },
+    ]),
+
+    # Science Fiction Movies
+    (("surprised", "confused", "excited"), [
+        {
+            "title": "The Matrix",
+            "year": "1999",
+            "description": "A computer hacker learns from mysterious rebels about the true nature of his reality and his role in the war against its controllers.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/f89U3ADr1oiB1s9GkdPOEpXUk5H.jpg",
+            "external_url": "https://www.themoviedb.org/movie/603",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=The+Matrix+1999+trailer",
+            "rating": 8.7
+        },
+        {
+            "title": "Interstellar",
+            "year": "2014",
+            "description": "A team of explorers travel through a wormhole in space in an attempt to ensure humanity's survival.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/gEU2QniE6E77NI6lCU6MxlNBvIx.jpg",
+            "external_url": "https://www.themoviedb.org/movie/157336",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Interstellar+2014+trailer",
+            "rating": 8.1
+        },
+        {
+            "title": "Blade Runner 2049",
+            "year": "2017",
+            "description": "A young blade runner's discovery of a long-buried secret leads him to track down former blade runner Rick Deckard, who's been missing for thirty years.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/gajva2L0rPYkEWjzgFlBXCAVBE5.jpg",
+            "external_url": "https://www.themoviedb.org/movie/335984",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Blade+Runner+2049+2017+trailer",
+            "rating": 8.0
+        },
+    ]),
+
+    # Romantic Movies
+    (("romantic", "lonely"), [
+        {
+            "title": "The Notebook",
+            "year": "2004",
+            "description": "A poor yet passionate young man falls in love with a rich young woman, giving her a sense of freedom, but they are soon separated because of their social differences.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/rNzQyW4f8B8cQeg7Dgj3n6eT5k9.jpg",
+            "external_url": "https://www.themoviedb.org/movie/11036",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=The+Notebook+2004+trailer",
+            "rating": 7.8
+        },
+    ]),
+])
+
+
+DEFAULT_WEBSERIES = FallbackCatalog([
+    # Comedy/Light-hearted Series (Happy, Amused, Playful)
+    (("happy", "amused", "playful"), [
+        {
+            "title": "Friends",
+            "year": "1994",
+            "description": "Follows the personal and professional lives of six twenty to thirty-something-year-old friends living in Manhattan.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/f496cm9enuEsZkSPzCwnTESEK5s.jpg",
+            "external_url": "https://www.themoviedb.org/tv/1668",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Friends+TV+show+trailer",
+            "rating": 8.4
+        },
+        {
+            "title": "The Office",
+            "year": "2005",
+            "description": "A mockumentary on a group of typical office workers, where the workday consists of ego clashes, inappropriate behavior, and tedium.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/qWnJzyZhyy74gjpSjIXWmuk0ifX.jpg",
+            "external_url": "https://www.themoviedb.org/tv/2316",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=The+Office+TV+show+trailer",
+            "rating": 8.5
+        },
+        {
+            "title": "Brooklyn Nine-Nine",
+            "year": "2013",
+            "description": "Comedy series following the exploits of Det. Jake Peralta and his diverse, lovable colleagues as they police the NYPD's 99th Precinct.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/f53Gpqm4KXBq5PWIHh2zXb4gvwe.jpg",
+            "external_url": "https://www.themoviedb.org/tv/48891",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Brooklyn+Nine-Nine+trailer",
+            "rating": 8.2
+        },
+    ]),
+
+    # Drama Series (Sad, Lonely, Shy)
+    (("sad", "lonely", "shy"), [
+        {
+            "title": "This Is Us",
+            "year": "2016",
+            "description": "A heartwarming and emotional story about a unique set of triplets, their struggles and their wonderful parents.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/rDlCxDMN1UJxmOEtmiGVDoBLqSv.jpg",
+            "external_url": "https://www.themoviedb.org/tv/67136",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=This+Is+Us+trailer",
+            "rating": 8.1
+        },
+        {
+            "title": "The Crown",
+            "year": "2016",
+            "description": "Follows the political rivalries and romance of Queen Elizabeth II's reign and the events that shaped the second half of the twentieth century.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/6nxTO2tDr0oAC5Iw7or5Y3MIjKJ.jpg",
+            "external_url": "https://www.themoviedb.org/tv/65494",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=The+Crown+Netflix+trailer",
+            "rating": 8.2
+        },
+        {
+            "title": "Normal People",
+            "year": "2020",
+            "description": "Follows Marianne and Connell, from different backgrounds but the same small town in Ireland, as they weave in and out of each other's romantic lives.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/5zDBVLZSW7Vf4WwbJbseFwgo3jd.jpg",
+            "external_url": "https://www.themoviedb.org/tv/95794",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Normal+People+Hulu+trailer",
+            "rating": 8.0
+        },
+    ]),
+
+    # Action/Thriller Series (Angry, Excited, Bored)
+    (("angry", "excited", "bored"), [
+        {
+            "title": "Breaking Bad",
+            "year": "2008",
+            "description": "A high school chemistry teacher diagnosed with inoperable lung cancer turns to manufacturing and selling methamphetamine in order to secure his family's future.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/ggFHVNu6YYI5L9pCfOacjizRGt.jpg",
+            "external_url": "https://www.themoviedb.org/tv/1396",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Breaking+Bad+trailer",
+            "rating": 9.2
+        },
+        {
+            "title": "The Boys",
+            "year": "2019",
+            "description": "A group of vigilantes set out to take down corrupt superheroes who abuse their superpowers.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/dzOxNbbz1liFzHU1IPvdgUR647b.jpg",
+            "external_url": "https://www.themoviedb.org/tv/76479",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=The+Boys+Amazon+trailer",
+            "rating": 8.4
+        },
+        {
+            "title": "Peaky Blinders",
+            "year": "2013",
+            "description": "A gangster family epic set in 1919 Birmingham, England; centered on a gang who sew razor blades in the peaks of their caps, and their fierce boss Tommy Shelby.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/bGZn5RVzMMXge2WqqlKibqMZH6q.jpg",
+            "external_url": "https://www.themoviedb.org/tv/60574",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Peaky+Blinders+trailer",
+            "rating": 8.5
+        },
+    ]),
+
+    # Sci-Fi/Fantasy Series (Surprised, Confused)
+    (("surprised", "confused"), [
+        {
+            "title": "Stranger Things",
+            "year": "2016",
+            "description": "When a young boy disappears, his mother, a police chief, and his friends must confront terrifying supernatural forces in order to get him back.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/x2LSRK2Cm7MZhjluni1msVJ3wDF.jpg",
+            "external_url": "https://www.themoviedb.org/tv/66732",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Stranger+Things+trailer",
+            "rating": 8.6
+        },
+        {
+            "title": "The Mandalorian",
+            "year": "2019",
+            "description": "The travels of a lone bounty hunter in the outer reaches of the galaxy, far from the authority of the New Republic.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/sWgBv7LV2PRoQgkxwlibdGXKz1S.jpg",
+            "external_url": "https://www.themoviedb.org/tv/82856",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=The+Mandalorian+trailer",
+            "rating": 8.5
+        },
+        {
+            "title": "Black Mirror",
+            "year": "2011",
+            "description": "An anthology series exploring a twisted, high-tech multiverse where humanity's greatest innovations and darkest instincts collide.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/4n1R4CXstrYrAVKrn8ScKCkk8ka.jpg",
+            "external_url": "https://www.themoviedb.org/tv/42009",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Black+Mirror+trailer",
+            "rating": 8.3
+        },
+    ]),
+
+    # Mystery/Crime Series (Anxious, Frustrated)
+    (("anxious", "frustrated"), [
+        {
+            "title": "Sherlock",
+            "year": "2010",
+            "description": "A modern update finds the famous sleuth and his doctor partner solving crime in 21st century London.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/7WTsnHkbA0FaG6R9twfFde0I9hl.jpg",
+            "external_url": "https://www.themoviedb.org/tv/19885",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Sherlock+BBC+trailer",
+            "rating": 8.5
+        },
+        {
+            "title": "True Detective",
+            "year": "2014",
+            "description": "Seasonal anthology series in which police investigations unearth the personal and professional secrets of those involved, both within and outside the law.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/xAKMTPYJYLDxTrFOn0rs9X0prGz.jpg",
+            "external_url": "https://www.themoviedb.org/tv/46648",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=True+Detective+HBO+trailer",
+            "rating": 8.2
+        },
+        {
+            "title": "Mindhunter",
+            "year": "2017",
+            "description": "In the late 1970s, two FBI agents expand criminal science by delving into the psychology of murder and getting uneasily close to all-too-real monsters.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/fbKE87mojpIETWepSbD5UIcjHYS.jpg",
+            "external_url": "https://www.themoviedb.org/tv/67744",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Mindhunter+Netflix+trailer",
+            "rating": 8.1
+        },
+    ]),
+
+    # Epic/Adventure Series (Hopeful, Proud, Energetic)
+    (("hopeful", "proud", "energetic"), [
+        {
+            "title": "Game of Thrones",
+            "year": "2011",
+            "description": "Nine noble families fight for control over the lands of Westeros, while an ancient enemy returns after being dormant for millennia.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/u3bZgnGQ9T01sWNhyveQz0wH0Hl.jpg",
+            "external_url": "https://www.themoviedb.org/tv/1399",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Game+of+Thrones+trailer",
+            "rating": 8.3
+        },
+        {
+            "title": "The Witcher",
+            "year": "2019",
+            "description": "Geralt of Rivia, a solitary monster hunter, struggles to find his place in a world where people often prove more wicked than beasts.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/zrPpUlehQaBf8YX2NrVrKK8IEpf.jpg",
+            "external_url": "https://www.themoviedb.org/tv/71912",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=The+Witcher+Netflix+trailer",
+            "rating": 8.1
+        },
+        {
+            "title": "Vikings",
+            "year": "2013",
+            "description": "Vikings transports us to the brutal and mysterious world of Ragnar Lothbrok, a Viking warrior and farmer who yearns to explore - and raid - the distant shores across the ocean.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/mBDlsOhNOV1MkNii81aT14EYQ4S.jpg",
+            "external_url": "https://www.themoviedb.org/tv/44217",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Vikings+History+Channel+trailer",
+            "rating": 8.0
+        },
+    ]),
+
+    # Feel-good/Relaxing Series (Relaxed, Nostalgic)
+    (("relaxed", "nostalgic"), [
+        {
+            "title": "Ted Lasso",
+            "year": "2020",
+            "description": "American college football coach Ted Lasso heads to London to manage AFC Richmond, a struggling English Premier League football team.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/oX7QdfiQEbyvIvpKgJHRCgbrLdK.jpg",
+            "external_url": "https://www.themoviedb.org/tv/97546",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Ted+Lasso+Apple+TV+trailer",
+            "rating": 8.5
+        },
+        {
+            "title": "The Good Place",
+            "year": "2016",
+            "description": "Four people and their otherworldly frienemy struggle in the afterlife to define what it means to be good.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/p7uJ7zJ9k0v7ob1tBZMJYvU98aJ.jpg",
+            "external_url": "https://www.themoviedb.org/tv/66573",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=The+Good+Place+NBC+trailer",
+            "rating": 8.2
+        },
+        {
+            "title": "Schitt's Creek",
+            "year": "2015",
+            "description": "When rich video-store magnate Johnny Rose and his family suddenly find themselves broke, they are forced to leave their pampered lives to regroup in Schitt's Creek.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/qrI0UeLOXn7dcQe1J2cDQZ4bCOj.jpg",
+            "external_url": "https://www.themoviedb.org/tv/61664",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Schitt%27s+Creek+trailer",
+            "rating": 8.1
+        },
+    ]),
+
+    # Romantic Series (Romantic)
+    (("romantic",), [
+        {
+            "title": "Bridgerton",
+            "year": "2020",
+            "description": "Wealth, lust, and betrayal set against the backdrop of Regency-era England, seen through the eyes of the powerful Bridgerton family.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/o4MoP6qVBhAJknMjW6Vz1NUcuJZ.jpg",
+            "external_url": "https://www.themoviedb.org/tv/91239",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Bridgerton+Netflix+trailer",
+            "rating": 7.8
+        },
+        {
+            "title": "Modern Love",
+            "year": "2019",
+            "description": "An anthology series that explores love in all of its complicated and beautiful forms, as well as its effects on the human connection.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/bdGipIhCWwzTgErOqHruuJ56nEO.jpg",
+            "external_url": "https://www.themoviedb.org/tv/89351",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Modern+Love+Amazon+trailer",
+            "rating": 7.8
+        },
+        {
+            "title": "Jane the Virgin",
+            "year": "2014",
+            "description": "A young, devout Catholic woman discovers that she was accidentally artificially inseminated.",
+            "poster_url": "https://image.tmdb.org/t/p/w500/ql8t0HGhSPeiysiQeNh1s7UgrG.jpg",
+            "external_url": "https://www.themoviedb.org/tv/61418",
+            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Jane+the+Virgin+trailer",
+            "rating": 7.7
+        },
+    ]),
+])
@@ -0,0 +1,337 @@
+"""
+Concurrent fan-out of the per-category recommendation fetches.
+
+The music, movie, web series and story providers are independent of each other,
+so they are submitted to a shared thread pool and their results are yielded as
+soon as each one finishes. Every category has its own deadline; a category that
+misses it is reported as timed out instead of holding up the others. A caller can
+also give an overall latency budget: categories still running when it expires
+are reported as pending and keep running in the background, so the responses
+they fetch land in the provider cache for the next request. Identical concurrent
+fetches of the same category and emotion are coalesced into one.
+
+Providers that need several pages (e.g. TMDB) fetch them on a separate pool with
+fetch_concurrently, so nested page requests never wait on the category pool.
+
+afetch_categories and afetch_concurrently are the event-loop counterparts used by
+the async views: every fetch is a task on the running loop instead of a thread.
+A task that misses its deadline is cancelled once no request waits for it, since
+under WSGI its event loop does not outlive the request.
+"""
+import asyncio
+import copy
+import threading
+import time
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from functools import partial
+from itertools import islice
+
+from django.conf import settings
+
+from .singleflight import recommendation_flights
+
+_executors = {}
+_executors_lock = threading.Lock()
+
+
+def _get_pool(name, max_workers):
+    executor = _executors.get(name)
+    if executor is None:
+        with _executors_lock:
+            executor = _executors.get(name)
+            if executor is None:
+                executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=name)
+                _executors[name] = executor
+    return executor
+
+
+def get_executor():
+    """
+    Return the process-wide thread pool used for category fetches, creating it on first use.
+
+    :return: The shared ThreadPoolExecutor instance.
+    """
+    return _get_pool('recommendations', getattr(settings, 'RECOMMENDATION_FANOUT_WORKERS', 16))
+
+
+def get_page_executor():
+    """
+    Return the process-wide thread pool used for provider page fetches, creating it on first use.
+
+    :return: The shared ThreadPoolExecutor instance.
+    """
+    return _get_pool('provider-pages', getattr(settings, 'PROVIDER_PAGE_WORKERS', 32))
+
+
+def get_category_timeout(category):
+    """
+    Return the deadline in seconds configured for a recommendation category.
+
+    :param category: The category name, e.g. "music" or "movies".
+    :return: The deadline in seconds.
+    """
+    timeouts = getattr(settings, 'RECOMMENDATION_CATEGORY_TIMEOUTS', {})
+    return timeouts.get(category, getattr(settings, 'RECOMMENDATION_DEFAULT_TIMEOUT', 10.0))
+
+
+# Seconds between checks for queued fetches that started running and now have a deadline
+QUEUED_POLL_INTERVAL = 0.05
+
+
+def _timed(started_at, fn, *args):
+    started_at.append(time.monotonic())
+    return fn(*args)
+
+
+def fetch_categories(emotion, fetchers, timeouts=None, budget=None):
+    """
+    Run every category fetcher concurrently and yield the results in completion order.
+
+    :param emotion: The emotion passed to every fetcher.
+    :param fetchers: Mapping of category name to a callable taking the emotion.
+    :param timeouts: Optional mapping of category name to a deadline in seconds.
+    :param budget: Optional overall latency budget in seconds. Categories that are
+                   still running when it expires are left to finish in the background.
+    :return: Generator of (category, items, status, elapsed_ms) tuples, where status is
+             "ok", "error", "timed_out" (the category missed its own deadline) or
+             "pending" (the budget expired first), and items is None unless status is "ok".
+    """
+    for _, category, items, fetch_status, elapsed_ms in fetch_batch([emotion], fetchers, timeouts, budget):
+        yield category, items, fetch_status, elapsed_ms
+
+
+def fetch_batch(emotions, fetchers, timeouts=None, budget=None):
+    """
+    Run every category fetcher for several emotions concurrently and yield the results in completion order.
+
+    All (emotion, category) fetches share the category thread pool, so a large batch
+    queues on the same concurrency limit as single requests instead of adding threads.
+    A category's own deadline starts when its fetch starts running, so fetches waiting
+    in the pool queue are not timed out before they ran; the budget still counts from
+    the start of the batch. Emotions are fetched as given; callers de-duplicate them first.
+
+    :param emotions: Iterable of emotions.
+    :param fetchers: Mapping of category name to a callable taking the emotion.
+    :param timeouts: Optional mapping of category name to a deadline in seconds.
+    :param budget: Optional overall latency budget in seconds, shared by the whole batch.
+    :return: Generator of (emotion, category, items, status, elapsed_ms) tuples, see fetch_categories.
+    """
+    timeouts = timeouts or {}
+    executor = get_executor()
+    start = time.monotonic()
+
+    pending = {}
+    started = {}
+    for emotion in emotions:
+        for category, fetcher in fetchers.items():
+            key = f"{category}:{emotion.strip().lower()}"
+            started_at = []
+            future = executor.submit(_timed, started_at, recommendation_flights.do, key, fetcher, emotion)
+            pending[future] = (emotion, category)
+            started[future] = started_at
+
+    def deadline(future):
+        _, category = pending[future]
+        started_at = started[future]
+        timeout_deadline = (started_at[0] + timeouts.get(category, get_category_timeout(category))
+                            if started_at else float("inf"))
+        if budget is not None and start + budget < timeout_deadline:
+            return start + budget, "pending"
+        return timeout_deadline, "timed_out"
+
+    while pending:
+        deadlines = {future: deadline(future) for future in pending}
+        next_deadline = min(deadline_at for deadline_at, _ in deadlines.values())
+        if any(not started[future] for future in pending):
+            # Queued fetches get their deadline once they start, which does not wake up wait()
+            next_deadline = min(next_deadline, time.monotonic() + QUEUED_POLL_INTERVAL)
+        done, _ = wait(pending, timeout=max(0.0, next_deadline - time.monotonic()),
+                       return_when=FIRST_COMPLETED)
+
+        for future in done:
+            emotion, category = pending.pop(future)
+            elapsed_ms = int((time.monotonic() - start) * 1000)
+            try:
+                yield emotion, category, future.result(), "ok", elapsed_ms
+            except Exception as e:
+                print(f"[ERROR] Error getting {category} recommendations for {emotion}: {str(e)}")
+                yield emotion, category, None, "error", elapsed_ms
+
+        now = time.monotonic()
+        expired = [(future, deadline(future)[1]) for future in pending if deadline(future)[0] <= now]
+        for future, fetch_status in expired:
+            emotion, category = pending.pop(future)
+            if fetch_status == "pending":
+                print(f"[DEBUG] {category} recommendations for {emotion} still pending when the budget expired")
+                future.add_done_callback(partial(_log_background_fetch, category, start))
+            else:
+                # A running fetch cannot be interrupted; it finishes in the background.
+                future.cancel()
+                print(f"[WARNING] {category} recommendations for {emotion} missed their deadline")
+            yield emotion, category, None, fetch_status, int((now - start) * 1000)
+
+
+# In-flight category tasks of each event loop, keyed like the single-flight keys
+_async_flights = weakref.WeakKeyDictionary()
+
+# Number of requests waiting for each in-flight category task
+_async_flight_waiters = weakref.WeakKeyDictionary()
+
+
+def _start_async_flight(key, fetcher, emotion):
+    """
+    Return the running task for a key, starting fetcher(emotion) if there is none.
+
+    :return: Tuple of the task and whether this call started it.
+    """
+    loop = asyncio.get_running_loop()
+    flights = _async_flights.setdefault(loop, {})
+    task = flights.get(key)
+    if task is not None:
+        _async_flight_waiters[task] += 1
+        return task, False
+    task = loop.create_task(fetcher(emotion))
+    flights[key] = task
+    _async_flight_waiters[task] = 1
+    task.add_done_callback(lambda _: flights.pop(key, None))
+    return task, True
+
+
+def _release_async_flight(task):
+    """
+    Stop waiting for a task, cancelling it once no request waits for it any more.
+
+    :return: True if the task was cancelled.
+    """
+    waiters = _async_flight_waiters.get(task, 1) - 1
+    _async_flight_waiters[task] = waiters
+    if waiters > 0 or task.done():
+        return False
+    task.cancel()
+    return True
+
+
+async def afetch_categories(emotion, fetchers, timeouts=None, budget=None):
+    """
+    Async version of fetch_categories for coroutine fetchers.
+
+    Identical concurrent fetches on the same event loop are coalesced into one task.
+    A task that misses its deadline or the budget is cancelled once no other request
+    waits for it, and the generator awaits the cancelled tasks before it finishes, so
+    nothing is left pending on the loop.
+
+    :param emotion: The emotion passed to every fetcher.
+    :param fetchers: Mapping of category name to a coroutine function taking the emotion.
+    :param timeouts: Optional mapping of category name to a deadline in seconds.
+    :param budget: Optional overall latency budget in seconds.
+    :return: Async generator of (category, items, status, elapsed_ms) tuples, see fetch_categories.
+    """
+    timeouts = timeouts or {}
+    start = time.monotonic()
+
+    pending = {}
+    deadlines = {}
+    shared = set()
+    for category, fetcher in fetchers.items():
+        task, leader = _start_async_flight(f"{category}:{emotion.strip().lower()}", fetcher, emotion)
+        pending[task] = category
+        if not leader:
+            shared.add(category)
+        deadline = start + timeouts.get(category, get_category_timeout(category))
+        if budget is not None and start + budget < deadline:
+            deadlines[category] = (start + budget, "pending")
+        else:
+            deadlines[category] = (deadline, "timed_out")
+
+    cancelled = []
+    try:
+        while pending:
+            next_deadline = min(deadlines[category][0] for category in pending.values())
+            done, _ = await asyncio.wait(set(pending), timeout=max(0.0, next_deadline - time.monotonic()),
+                                         return_when=asyncio.FIRST_COMPLETED)
+
+            for task in done:
+                category = pending.pop(task)
+                _release_async_flight(task)
+                elapsed_ms = int((time.monotonic() - start) * 1000)
+                if task.cancelled():
+                    print(f"[ERROR] {category} recommendations were cancelled")
+                    yield category, None, "error", elapsed_ms
+                    continue
+                try:
+                    result = task.result()
+                except Exception as e:
+                    print(f"[ERROR] Error getting {category} recommendations: {str(e)}")
+                    yield category, None, "error", elapsed_ms
+                    continue
+                yield category, copy.deepcopy(result) if category in shared else result, "ok", elapsed_ms
+
+            now = time.monotonic()
+            for task in [t for t, category in pending.items() if deadlines[category][0] <= now]:
+                category = pending.pop(task)
+                fetch_status = deadlines[category][1]
+                if _release_async_flight(task):
+                    print(f"[WARNING] {category} recommendations {fetch_status.replace('_', ' ')}, cancelled")
+                    cancelled.append(task)
+                yield category, None, fetch_status, int((now - start) * 1000)
+    finally:
+        # The consumer stopped early: nobody reads the remaining results
+        cancelled.extend(task for task in pending if _release_async_flight(task))
+        if cancelled:
+            await asyncio.gather(*cancelled, return_exceptions=True)
+
+
+async def afetch_concurrently(calls):
+    """
+    Start zero-argument coroutine functions as tasks and yield their results in the given order.
+
+    Closing the generator early cancels the tasks whose results were not consumed.
+
+    :param calls: Iterable of zero-argument coroutine functions.
+    :return: Async generator of the call results.
+    """
+    tasks = [asyncio.ensure_future(call()) for call in calls]
+    try:
+        for task in tasks:
+            yield await task
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def _log_background_fetch(category, start, future):
+    elapsed_ms = int((time.monotonic() - start) * 1000)
+    if future.cancelled() or future.exception() is not None:
+        print(f"[ERROR] Background {category} fetch failed after {elapsed_ms} ms")
+    else:
+        print(f"[DEBUG] Background {category} fetch finished after {elapsed_ms} ms")
+
+
+def fetch_concurrently(calls, max_parallel=None):
+    """
+    Run zero-argument callables concurrently and yield their results in the given order.
+
+    At most `max_parallel` calls are in flight at once. Closing the generator early,
+    e.g. by breaking out of the loop once enough items are collected, cancels the
+    calls that have not started yet.
+
+    :param calls: Iterable of zero-argument callables.
+    :param max_parallel: Maximum number of concurrent calls, defaults to PROVIDER_PAGE_PARALLELISM.
+    :return: Generator of the call results.
+    """
+    executor = get_page_executor()
+    max_parallel = max_parallel or getattr(settings, 'PROVIDER_PAGE_PARALLELISM', 4)
+    calls = iter(calls)
+    in_flight = deque(executor.submit(call) for call in islice(calls, max_parallel))
+    try:
+        while in_flight:
+            result = in_flight.popleft().result()
+            next_call = next(calls, None)
+            if next_call is not None:
+                in_flight.append(executor.submit(next_call))
+            yield result
+    finally:
+        for future in in_flight:
+            future.cancel()
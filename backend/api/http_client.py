@@ -0,0 +1,146 @@
+"""
+Shared HTTP client for the outbound provider calls (Spotify, TMDB, Google Books).
+
+Every provider host gets its own requests session with a keep-alive connection
+pool, so repeated calls reuse warm TCP/TLS connections instead of opening a new
+one per request. All calls get default connect/read timeouts and a small retry
+policy for connection errors and transient 5xx responses. Requests to providers
+with a configured rate limit take a token from that provider's bucket first, and
+every call is reported to the provider's circuit breaker.
+"""
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .circuit_breaker import ProviderUnavailable, get_circuit_breaker
+from .rate_limit import get_rate_limiter, parse_retry_after
+
+# Provider name for every outbound host, used to look up per-provider policies
+PROVIDER_HOSTS = {
+    "accounts.spotify.com": "spotify",
+    "api.spotify.com": "spotify",
+    "api.themoviedb.org": "tmdb",
+    "www.googleapis.com": "google_books",
+}
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_provider(url):
+    """
+    Return the provider name for a URL, falling back to its host name.
+
+    :param url: The full request URL.
+    :return: The provider name, e.g. "tmdb".
+    """
+    host = urlsplit(url).netloc
+    return PROVIDER_HOSTS.get(host, host)
+
+
+def get_session(host):
+    """
+    Return the pooled session for a host, creating it on first use.
+
+    :param host: The host name, e.g. "api.themoviedb.org".
+    :return: The requests.Session bound to that host's connection pool.
+    """
+    session = _sessions.get(host)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(host)
+            if session is None:
+                session = _build_session()
+                _sessions[host] = session
+    return session
+
+
+def _build_session():
+    retry = Retry(
+        total=getattr(settings, 'PROVIDER_HTTP_RETRIES', 2),
+        backoff_factor=getattr(settings, 'PROVIDER_HTTP_BACKOFF', 0.3),
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset(["GET"]),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=getattr(settings, 'PROVIDER_HTTP_POOL_MAXSIZE', 16),
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def request(method, url, **kwargs):
+    """
+    Send a request through the pooled session of the URL's host.
+
+    Calls to a provider whose circuit breaker is open fail fast with
+    ProviderUnavailable. A 429 response blocks the provider for its Retry-After
+    period, and the request is retried once if that period is within
+    PROVIDER_MAX_RETRY_AFTER seconds. Calls that would wait longer than that for
+    the rate limit raise ProviderUnavailable and count as failures.
+
+    :param method: The HTTP method, e.g. "GET".
+    :param url: The full request URL.
+    :param kwargs: Any keyword arguments accepted by requests.Session.request.
+    :return: The requests.Response object.
+    """
+    kwargs.setdefault("timeout", (
+        getattr(settings, 'PROVIDER_HTTP_CONNECT_TIMEOUT', 3.05),
+        getattr(settings, 'PROVIDER_HTTP_READ_TIMEOUT', 10.0),
+    ))
+    provider = get_provider(url)
+    breaker = get_circuit_breaker(provider)
+    if not breaker.allow():
+        raise ProviderUnavailable(provider)
+
+    session = get_session(urlsplit(url).netloc)
+    limiter = get_rate_limiter(provider)
+    start = time.monotonic()
+    try:
+        response = _send(session, limiter, method, url, kwargs)
+    except (requests.RequestException, ProviderUnavailable):
+        breaker.record(False, time.monotonic() - start)
+        raise
+    breaker.record(response.status_code < 500, time.monotonic() - start)
+    return response
+
+
+def _send(session, limiter, method, url, kwargs):
+    if limiter is None:
+        return session.request(method, url, **kwargs)
+
+    max_wait = getattr(settings, 'PROVIDER_MAX_RETRY_AFTER', 5)
+    limiter.acquire(max_wait)
+    response = session.request(method, url, **kwargs)
+    if response.status_code == 429:
+        retry_after = parse_retry_after(response.headers.get("Retry-After"))
+        print(f"[WARNING] {limiter.name} rate limited us, backing off for {retry_after:.1f}s")
+        limiter.penalize(retry_after)
+        if retry_after <= max_wait:
+            limiter.acquire(max_wait)
+            response = session.request(method, url, **kwargs)
+    return response
+
+
+def get(url, **kwargs):
+    """
+    Send a GET request through the shared provider client.
+    """
+    return request("GET", url, **kwargs)
+
+
+def post(url, **kwargs):
+    """
+    Send a POST request through the shared provider client.
+    """
+    return request("POST", url, **kwargs)
@@ -0,0 +1,71 @@
+import csv
+import statistics
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api import emotion_lexicon, emotion_model
+
+DEFAULT_SAMPLES = Path(settings.BASE_DIR) / "benchmarks" / "text_emotion_samples.csv"
+
+
+class Command(BaseCommand):
+    """
+    Measure the accuracy and latency of the lexicon fast path, and of the text model
+    behind it, on a labeled sample file.
+
+    The sample file is a CSV with "text" and "emotion" columns. For every threshold
+    the lexicon's coverage (share of texts it answers) and accuracy on those texts
+    are reported. When the model is available, its accuracy on the texts the lexicon
+    defers and the accuracy of the whole cascade are reported too.
+    """
+    help = "Report lexicon and model accuracy and latency on labeled text emotion samples."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--samples', default=str(DEFAULT_SAMPLES),
+                            help="CSV file with text and emotion columns.")
+        parser.add_argument('--thresholds', nargs='+', type=float,
+                            help="Lexicon confidence thresholds to compare (default: TEXT_EMOTION_LEXICON_THRESHOLD).")
+
+    def handle(self, *args, **options):
+        with open(options['samples'], newline='', encoding='utf-8') as f:
+            samples = [(row['text'], row['emotion'].strip().lower()) for row in csv.DictReader(f)]
+        thresholds = options['thresholds'] or [getattr(settings, 'TEXT_EMOTION_LEXICON_THRESHOLD', 0.6)]
+        max_words = getattr(settings, 'TEXT_EMOTION_LEXICON_MAX_WORDS', 30)
+
+        scores, timings = [], []
+        for text, _ in samples:
+            start = time.perf_counter()
+            best, confidence, negated = emotion_lexicon.score(text)
+            timings.append(time.perf_counter() - start)
+            usable = not negated and len(text.split()) <= max_words
+            scores.append((best, confidence if usable else 0.0))
+        timings.sort()
+        self.stdout.write(f"{len(samples)} samples, lexicon match p50 {statistics.median(timings) * 1e6:.1f} us, "
+                          f"p95 {timings[int(len(timings) * 0.95)] * 1e6:.1f} us")
+
+        engine = emotion_model.get_engine()
+        predictions = None
+        if engine.load():
+            start = time.perf_counter()
+            predictions = engine.predict([text for text, _ in samples])
+            elapsed = time.perf_counter() - start
+            correct = sum(predicted == label for predicted, (_, label) in zip(predictions, samples))
+            self.stdout.write(f"model: accuracy {correct / len(samples):.1%}, "
+                              f"{elapsed / len(samples) * 1000:.2f} ms per text")
+        else:
+            self.stdout.write(f"model: unavailable ({engine.error})")
+
+        for threshold in thresholds:
+            answered = [i for i, (_, confidence) in enumerate(scores) if confidence >= threshold]
+            correct = sum(scores[i][0] == samples[i][1] for i in answered)
+            line = (f"threshold {threshold:.2f}: lexicon answers {len(answered)}/{len(samples)} "
+                    f"({len(answered) / len(samples):.1%}), accuracy {correct / len(answered):.1%}"
+                    if answered else f"threshold {threshold:.2f}: lexicon answers nothing")
+            if predictions is not None:
+                deferred = set(range(len(samples))) - set(answered)
+                model_correct = sum(predictions[i] == samples[i][1] for i in deferred)
+                line += f", cascade accuracy {(correct + model_correct) / len(samples):.1%}"
+            self.stdout.write(line)
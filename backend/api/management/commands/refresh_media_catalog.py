@@ -0,0 +1,79 @@
+import time
+from functools import partial
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import http_client
+from api.fanout import fetch_concurrently
+from api.media_catalog import get_media_catalog
+from api.views import MOVIE_EMOTION_TO_GENRES, TV_EMOTION_TO_GENRES, get_tmdb_api_key, tmdb_discover_params
+
+GENRE_MAPS = {
+    "movie": MOVIE_EMOTION_TO_GENRES,
+    "tv": TV_EMOTION_TO_GENRES,
+}
+
+
+class Command(BaseCommand):
+    """
+    Incrementally refresh the local TMDB media catalog.
+
+    Only genres that were not refreshed within --max-age hours are re-fetched, so the
+    command is cheap to run frequently, e.g. hourly from cron or a scheduled job.
+    """
+    help = "Fetch TMDB discover pages for every emotion genre into the local media catalog."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--max-age', type=float, default=24,
+                            help="Refresh genres whose data is older than this many hours.")
+        parser.add_argument('--pages', type=int, default=5,
+                            help="Number of discover pages fetched per genre.")
+        parser.add_argument('--prune-days', type=float, default=7,
+                            help="Delete titles not seen in a refresh for this many days.")
+        parser.add_argument('--concurrency', type=int, default=4,
+                            help="Number of TMDB pages fetched at the same time.")
+
+    def handle(self, *args, **options):
+        catalog = get_media_catalog()
+        if catalog is None:
+            raise CommandError("MEDIA_CATALOG_PATH is not configured.")
+        api_key = get_tmdb_api_key()
+        if not api_key:
+            raise CommandError("TMDB_API_KEY environment variable is missing.")
+
+        start = time.monotonic()
+        for kind, genre_map in GENRE_MAPS.items():
+            genres = sorted({genre for genre_ids in genre_map.values() for genre in genre_ids})
+            stale = catalog.stale_genres(kind, genres, options['max_age'] * 3600)
+            for genre in stale:
+                stored = self.refresh_genre(catalog, api_key, kind, genre, options['pages'], options['concurrency'])
+                self.stdout.write(f"{kind} genre {genre}: {stored} titles")
+            self.stdout.write(f"Refreshed {len(stale)} of {len(genres)} {kind} genres")
+
+        pruned = catalog.prune(options['prune_days'] * 86400)
+        self.stdout.write(self.style.SUCCESS(
+            f"Media catalog refreshed in {time.monotonic() - start:.1f}s ({pruned} stale titles pruned)"
+        ))
+
+    def refresh_genre(self, catalog, api_key, kind, genre, pages, concurrency):
+        """
+        Fetch the discover pages of one genre and store them; the genre is only marked
+        as refreshed when every page was fetched successfully.
+        """
+        url = f"https://api.themoviedb.org/3/discover/{kind}"
+        calls = [partial(http_client.get, url, params=tmdb_discover_params(api_key, genre, page))
+                 for page in range(1, pages + 1)]
+        stored = 0
+        complete = True
+        for response in fetch_concurrently(calls, max_parallel=concurrency):
+            if response.status_code != 200:
+                self.stderr.write(f"TMDB request failed for {kind} genre {genre}: {response.status_code}")
+                complete = False
+                continue
+            data = response.json()
+            stored += catalog.upsert(kind, genre, data.get("results", []))
+            if data.get("page", 1) >= data.get("total_pages", 1):
+                break
+        if complete:
+            catalog.mark_refreshed(kind, genre)
+        return stored
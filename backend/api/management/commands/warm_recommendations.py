@@ -0,0 +1,88 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand
+
+from api.fanout import fetch_categories, fetch_concurrently
+from api.response_cache import cached_get
+from api.views import (
+    CATEGORY_FETCHERS, EMOTIONS, MOVIE_EMOTION_TO_GENRES, TV_EMOTION_TO_GENRES,
+    get_tmdb_api_key, tmdb_discover_params,
+)
+
+TMDB_MAX_PAGES = 5
+
+
+class Command(BaseCommand):
+    """
+    Pre-fetch music, movie, web series and story recommendations for every emotion so
+    the provider response cache is warm after a deploy or cache flush.
+
+    The cache must be shared with the web workers (i.e. REDIS_URL is set) for this to
+    help. Run it from build.sh or on a schedule, e.g. every few hours from cron.
+    """
+    help = "Pre-fetch and cache recommendations for every emotion."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--emotions', nargs='+', choices=EMOTIONS, default=list(EMOTIONS),
+                            help="Emotions to warm (default: all).")
+        parser.add_argument('--concurrency', type=int, default=4,
+                            help="Number of emotions warmed at the same time.")
+        parser.add_argument('--skip-tmdb-pages', action='store_true',
+                            help="Do not warm every TMDB discover page of each emotion's genres.")
+
+    def handle(self, *args, **options):
+        start = time.monotonic()
+        emotions = options['emotions']
+
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+            for emotion, counts in zip(emotions, executor.map(self.warm_emotion, emotions)):
+                self.stdout.write(f"{emotion}: " + ", ".join(f"{c}={n}" for c, n in counts.items()))
+
+        if not options['skip_tmdb_pages']:
+            warmed = self.warm_tmdb_pages(emotions, options['concurrency'])
+            self.stdout.write(f"Warmed {warmed} TMDB discover pages")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Warmed recommendations for {len(emotions)} emotions in {time.monotonic() - start:.1f}s"
+        ))
+
+    def warm_emotion(self, emotion):
+        """
+        Fetch every category for one emotion, returning the item count per category.
+        """
+        return {
+            category: len(items) if fetch_status == "ok" else fetch_status
+            for category, items, fetch_status, _ in fetch_categories(emotion, CATEGORY_FETCHERS)
+        }
+
+    def warm_tmdb_pages(self, emotions, concurrency):
+        """
+        Fetch every discover page the movie and web series collectors can pick for the
+        given emotions, since they choose genres and pages at random.
+        """
+        api_key = get_tmdb_api_key()
+        if not api_key:
+            return 0
+
+        page_requests = set()
+        for kind, genre_map in (("movie", MOVIE_EMOTION_TO_GENRES), ("tv", TV_EMOTION_TO_GENRES)):
+            page_requests.add((f"https://api.themoviedb.org/3/{kind}/popular", None, 1))
+            for emotion in emotions:
+                for genre in genre_map.get(emotion, []):
+                    for page in range(1, TMDB_MAX_PAGES + 1):
+                        page_requests.add((f"https://api.themoviedb.org/3/discover/{kind}", genre, page))
+
+        def warm(url, genre, page):
+            if genre is None:
+                params = {"api_key": api_key, "language": "en-US", "page": page}
+            else:
+                params = tmdb_discover_params(api_key, genre, page)
+            try:
+                return cached_get(url, params=params).status_code == 200
+            except Exception as e:
+                self.stderr.write(f"Failed to warm {url} genre={genre} page={page}: {str(e)}")
+                return False
+
+        calls = [lambda request=request: warm(*request) for request in sorted(page_requests, key=str)]
+        return sum(fetch_concurrently(calls, max_parallel=concurrency))
@@ -0,0 +1,184 @@
+"""
+Local catalog of TMDB movies and TV shows, stored in a SQLite file.
+
+The refresh_media_catalog management command fills the catalog with the discover
+pages of every genre used by the emotion maps, re-fetching only genres whose data
+is older than the refresh interval. The movie and web series collectors answer
+from this index when it holds enough titles for an emotion and only fall back to
+live TMDB calls on a miss, so they keep working during TMDB outages.
+"""
+import os
+import sqlite3
+import threading
+import time
+
+from django.conf import settings
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS titles (
+    kind TEXT NOT NULL,
+    genre_id INTEGER NOT NULL,
+    tmdb_id INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    release_date TEXT,
+    overview TEXT,
+    poster_path TEXT NOT NULL,
+    rating REAL,
+    popularity REAL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (kind, genre_id, tmdb_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS titles_by_genre ON titles (kind, genre_id, popularity DESC);
+CREATE TABLE IF NOT EXISTS genre_refreshes (
+    kind TEXT NOT NULL,
+    genre_id INTEGER NOT NULL,
+    refreshed_at REAL NOT NULL,
+    PRIMARY KEY (kind, genre_id)
+) WITHOUT ROWID;
+"""
+
+# TMDB field names of the title and release date for each kind
+TMDB_FIELDS = {
+    "movie": ("title", "release_date"),
+    "tv": ("name", "first_air_date"),
+}
+
+
+class MediaCatalog:
+    """
+    SQLite-backed index of TMDB titles by kind ("movie" or "tv") and genre ID.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: Path of the SQLite file; it is created on the first write.
+        """
+        self.path = str(path)
+        self._local = threading.local()
+
+    def _connect(self, create=False):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            if not create and not os.path.exists(self.path):
+                return None
+            connection = sqlite3.connect(self.path, timeout=5)
+            connection.row_factory = sqlite3.Row
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(SCHEMA)
+            self._local.connection = connection
+        return connection
+
+    def lookup(self, kind, genre_ids, limit):
+        """
+        Return the most popular catalog titles of any of the given genres.
+
+        :param kind: "movie" or "tv".
+        :param genre_ids: The TMDB genre IDs to search.
+        :param limit: Maximum number of titles to return.
+        :return: List of dicts shaped like TMDB discover results, or [] if the catalog is empty.
+        """
+        connection = self._connect()
+        if connection is None:
+            return []
+        title_field, date_field = TMDB_FIELDS[kind]
+        placeholders = ",".join("?" for _ in genre_ids)
+        rows = connection.execute(
+            f"SELECT tmdb_id, title, release_date, overview, poster_path, rating, MAX(popularity) AS popularity, "
+            f"GROUP_CONCAT(genre_id) AS genre_ids "
+            f"FROM titles WHERE kind = ? AND genre_id IN ({placeholders}) "
+            f"GROUP BY tmdb_id ORDER BY popularity DESC LIMIT ?",
+            (kind, *genre_ids, limit),
+        ).fetchall()
+        return [
+            {
+                "id": row["tmdb_id"],
+                title_field: row["title"],
+                date_field: row["release_date"],
+                "overview": row["overview"],
+                "poster_path": row["poster_path"],
+                "vote_average": row["rating"],
+                "popularity": row["popularity"],
+                "genre_ids": [int(genre_id) for genre_id in row["genre_ids"].split(",")],
+            }
+            for row in rows
+        ]
+
+    def upsert(self, kind, genre_id, results):
+        """
+        Insert or update TMDB discover results for a genre; titles without a poster are skipped.
+
+        :param kind: "movie" or "tv".
+        :param genre_id: The TMDB genre ID the results were fetched for.
+        :param results: The "results" list of a TMDB discover response.
+        :return: The number of titles stored.
+        """
+        title_field, date_field = TMDB_FIELDS[kind]
+        now = time.time()
+        rows = [
+            (kind, genre_id, item["id"], item.get(title_field, ""), item.get(date_field, ""),
+             item.get("overview", ""), item["poster_path"], item.get("vote_average", 0),
+             item.get("popularity", 0), now)
+            for item in results
+            if item.get("id") and item.get("poster_path")
+        ]
+        connection = self._connect(create=True)
+        with connection:
+            connection.executemany("INSERT OR REPLACE INTO titles VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    def mark_refreshed(self, kind, genre_id):
+        connection = self._connect(create=True)
+        with connection:
+            connection.execute("INSERT OR REPLACE INTO genre_refreshes VALUES (?, ?, ?)",
+                               (kind, genre_id, time.time()))
+
+    def stale_genres(self, kind, genre_ids, max_age):
+        """
+        Return the genres that were never refreshed or were refreshed more than `max_age` seconds ago.
+        """
+        connection = self._connect(create=True)
+        refreshed = dict(connection.execute(
+            "SELECT genre_id, refreshed_at FROM genre_refreshes WHERE kind = ?", (kind,)
+        ).fetchall())
+        cutoff = time.time() - max_age
+        return [genre_id for genre_id in genre_ids if refreshed.get(genre_id, 0) < cutoff]
+
+    def prune(self, max_age):
+        """
+        Delete titles that have not been seen in a refresh for more than `max_age` seconds.
+
+        :return: The number of deleted titles.
+        """
+        connection = self._connect(create=True)
+        with connection:
+            return connection.execute("DELETE FROM titles WHERE updated_at < ?", (time.time() - max_age,)).rowcount
+
+
+_catalog = None
+
+
+def get_media_catalog():
+    """
+    Return the process-wide media catalog, or None if it is disabled.
+    """
+    global _catalog
+    path = getattr(settings, 'MEDIA_CATALOG_PATH', None)
+    if not path:
+        return None
+    if _catalog is None or _catalog.path != str(path):
+        _catalog = MediaCatalog(path)
+    return _catalog
+
+
+def lookup_titles(kind, genre_ids, limit):
+    """
+    Return catalog titles for the given genres, or [] if the catalog is disabled or unavailable.
+    """
+    catalog = get_media_catalog()
+    if catalog is None:
+        return []
+    try:
+        return catalog.lookup(kind, genre_ids, limit)
+    except sqlite3.Error as e:
+        print(f"[ERROR] Media catalog lookup failed: {str(e)}")
+        return []
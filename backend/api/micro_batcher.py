@@ -0,0 +1,140 @@
+"""
+Dynamic micro-batching of concurrent inference calls.
+
+Requests from concurrent threads are queued and a single worker thread turns them
+into batches: it waits for the first request, then keeps collecting for up to
+max_wait seconds or until max_batch_size requests are queued, and runs the batch
+function once for all of them. Within a batch, requests are sorted by size and
+split into buckets of similar size, so short texts are not padded to the length
+of the longest one. Every caller gets its own result (or exception) back; a
+caller that stops waiting cancels its request, which is then skipped.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError
+
+
+class MicroBatcher:
+    """
+    Groups concurrent calls into batches for a function taking a list of items.
+    """
+
+    def __init__(self, batch_fn, max_batch_size=16, max_wait=0.005, size_fn=len, max_size_ratio=2.0, name="batcher"):
+        """
+        :param batch_fn: Function taking a list of items and returning a list of results in the same order.
+        :param max_batch_size: Maximum number of items per batch.
+        :param max_wait: Seconds to keep collecting after the first item of a batch arrives.
+        :param size_fn: Function returning the size of an item (e.g. text length) used for bucketing.
+        :param max_size_ratio: A bucket is split when an item is this many times larger than its smallest item.
+        :param name: Name of the worker thread.
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.size_fn = size_fn
+        self.max_size_ratio = max_size_ratio
+        self.name = name
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self.batches = 0
+        self.items = 0
+        self.largest_batch = 0
+
+    def submit(self, item):
+        """
+        Queue an item for the next batch.
+
+        :return: A Future resolving to the item's result.
+        """
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def __call__(self, item, timeout=None):
+        """
+        Run an item through the next batch and wait for its result.
+
+        :raises TimeoutError: If there is no result within `timeout` seconds; the item is then not computed if its
+                              batch has not started yet.
+        """
+        future = self.submit(item)
+        try:
+            return future.result(timeout)
+        except TimeoutError:
+            future.cancel()
+            raise
+
+    def _ensure_worker(self):
+        if self._worker is not None and self._worker.is_alive():
+            return
+        with self._lock:
+            # Also restarts the worker in a process forked after it was started
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self._worker.start()
+
+    def _collect(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                batch.append(self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def buckets(self, batch):
+        """
+        Sort a batch by item size and split it into buckets of similar size.
+        """
+        batch = sorted(batch, key=lambda entry: self.size_fn(entry[0]))
+        buckets = [[batch[0]]]
+        for entry in batch[1:]:
+            smallest = max(self.size_fn(buckets[-1][0][0]), 1)
+            if self.size_fn(entry[0]) > smallest * self.max_size_ratio:
+                buckets.append([entry])
+            else:
+                buckets[-1].append(entry)
+        return buckets
+
+    def _run(self):
+        while True:
+            # Marks every future as running, dropping those whose caller already gave up
+            batch = [entry for entry in self._collect() if entry[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            with self._stats_lock:
+                self.batches += 1
+                self.items += len(batch)
+                self.largest_batch = max(self.largest_batch, len(batch))
+            for bucket in self.buckets(batch):
+                futures = [future for _, future in bucket]
+                try:
+                    results = self.batch_fn([item for item, _ in bucket])
+                    if len(results) != len(futures):
+                        raise ValueError(f"{self.name} returned {len(results)} results for {len(futures)} items")
+                except Exception as e:
+                    for future in futures:
+                        future.set_exception(e)
+                    continue
+                for future, result in zip(futures, results):
+                    future.set_result(result)
+
+    def stats(self):
+        """
+        Return the number of batches and items processed and the mean and largest batch size.
+        """
+        with self._stats_lock:
+            return {
+                "batches": self.batches,
+                "items": self.items,
+                "mean_batch_size": round(self.items / self.batches, 2) if self.batches else None,
+                "largest_batch": self.largest_batch,
+                "max_batch_size": self.max_batch_size,
+                "max_wait_ms": self.max_wait * 1000,
+            }
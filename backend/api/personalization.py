@@ -0,0 +1,166 @@
+"""
+Per-user preference vectors built from the mood and listening history, used to
+re-rank recommendations.
+
+A user's preferences are a compact dict cached in the Django cache (Redis when
+REDIS_URL is set): a recency-weighted mood distribution and artist/track
+affinities. Only a cache miss reads the profile from MongoDB. Mood writes made
+by the recommendation endpoints update the cached vector in place, and any other
+history write drops it, so the hot path never reads MongoDB for personalization.
+"""
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import ranking
+
+# Every older mood counts this much less than the one after it
+MOOD_DECAY = 0.9
+
+# Separators between track and artist names in listening history entries
+TRACK_SEPARATORS = (" - ", " – ", " by ", ",")
+
+
+def _cache_key(user_id):
+    return f"personalization:user:{user_id}"
+
+
+def _track_tokens(entry):
+    """
+    Split a listening history entry such as "Song - Artist" into lowercased names.
+    """
+    tokens = [str(entry)]
+    for separator in TRACK_SEPARATORS:
+        tokens = [part for token in tokens for part in token.split(separator)]
+    return {token.strip().lower() for token in tokens if token.strip()}
+
+
+def build_preferences(mood_history, listening_history):
+    """
+    Build the preference vector of a user from their history lists.
+
+    :param mood_history: List of emotions, oldest first.
+    :param listening_history: List of track entries, oldest first.
+    :return: Dict with "moods" (emotion to decayed count) and "artists" (lowercased name to affinity in [0, 1]).
+    """
+    length = getattr(settings, 'PERSONALIZATION_HISTORY_LENGTH', 100)
+    moods = Counter()
+    recent_moods = [mood for mood in mood_history if mood][-length:]
+    for age, mood in enumerate(reversed(recent_moods)):
+        moods[mood.strip().lower()] += MOOD_DECAY ** age
+
+    artists = Counter()
+    for entry in listening_history[-length:]:
+        for token in _track_tokens(entry):
+            artists[token] += 1
+    top = artists.most_common(getattr(settings, 'PERSONALIZATION_MAX_ARTISTS', 200))
+    strongest = top[0][1] if top else 1
+    return {
+        "moods": dict(moods),
+        "artists": {name: count / strongest for name, count in top},
+    }
+
+
+def get_preferences(user_id):
+    """
+    Return the cached preference vector of a user, building it from MongoDB on a miss.
+
+    :param user_id: The MongoDB user profile ID.
+    :return: The preference dict, or None if there is no user ID or the profile cannot be read.
+    """
+    if not user_id:
+        return None
+    preferences = cache.get(_cache_key(user_id))
+    if preferences is not None:
+        return preferences
+    try:
+        from users.models import UserProfile
+        profile = UserProfile.objects.only("mood_history", "listening_history").get(id=user_id)
+    except Exception as e:
+        print(f"[WARNING] Could not load preferences of user {user_id}: {str(e)}")
+        return None
+    preferences = build_preferences(profile.mood_history, profile.listening_history)
+    cache.set(_cache_key(user_id), preferences, getattr(settings, 'PERSONALIZATION_CACHE_TTL', 3600))
+    return preferences
+
+
+def record_mood(user_id, emotion):
+    """
+    Apply a new mood to the user's cached preference vector, if one is cached.
+    """
+    preferences = cache.get(_cache_key(user_id))
+    if preferences is None:
+        return
+    moods = {mood: count * MOOD_DECAY for mood, count in preferences["moods"].items()}
+    moods[emotion.strip().lower()] = moods.get(emotion.strip().lower(), 0) + 1
+    preferences["moods"] = moods
+    cache.set(_cache_key(user_id), preferences, getattr(settings, 'PERSONALIZATION_CACHE_TTL', 3600))
+
+
+def invalidate_preferences(user_id):
+    """
+    Drop the cached preference vector of a user after their history changed.
+    """
+    cache.delete(_cache_key(user_id))
+
+
+def genre_affinities(preferences, emotion_to_genres):
+    """
+    Weight every genre by the share of the user's recent moods that map to it.
+
+    :param preferences: The user's preference dict.
+    :param emotion_to_genres: Mapping of emotion to genre IDs, e.g. MOVIE_EMOTION_TO_GENRES.
+    :return: Dict of genre ID to affinity in [0, 1].
+    """
+    weights = Counter()
+    for mood, count in preferences["moods"].items():
+        for genre in emotion_to_genres.get(mood, ()):
+            weights[genre] += count
+    strongest = max(weights.values(), default=0)
+    return {genre: weight / strongest for genre, weight in weights.items()} if strongest else {}
+
+
+def item_affinities(category, items, preferences, genre_maps):
+    """
+    Return the affinity in [0, 1] of the user for every recommendation item.
+
+    Music items match on their artists and track name, movies and web series on their genres.
+
+    :param genre_maps: Mapping of category to its emotion-to-genre mapping.
+    """
+    if category == "music":
+        artists = preferences["artists"]
+        return [
+            max([artists.get(name.strip().lower(), 0) for name in item.get("artist", "").split(",")]
+                + [artists.get(item.get("name", "").strip().lower(), 0)])
+            if isinstance(item, dict) else 0
+            for item in items
+        ]
+    if category in genre_maps:
+        genres = genre_affinities(preferences, genre_maps[category])
+        return [
+            max([genres.get(genre, 0) for genre in item.get("genre_ids", ())], default=0)
+            if isinstance(item, dict) else 0
+            for item in items
+        ]
+    return None
+
+
+def personalize(category, items, preferences, genre_maps):
+    """
+    Re-rank a category's items by the user's affinities, keeping the provider ranking as the baseline.
+
+    :param category: The category name, e.g. "music".
+    :param items: The ranked recommendation items.
+    :param preferences: The user's preference dict, or None to keep the order.
+    :param genre_maps: Mapping of category to its emotion-to-genre mapping.
+    :return: The items in personalized order.
+    """
+    if not preferences or not items:
+        return items
+    affinities = item_affinities(category, items, preferences, genre_maps)
+    if not affinities or not any(affinities):
+        return items
+    order = ranking.rerank(affinities, getattr(settings, 'PERSONALIZATION_WEIGHT', 0.3))
+    return [items[index] for index in order]
@@ -0,0 +1,200 @@
+"""
+Vectorized scoring and diversity-aware selection of recommendation candidates.
+
+Candidate features (rating, popularity, vote count, release year) are held in a
+NumPy matrix, normalized per column to [0, 1] and scored for all candidates with
+a single matrix-vector product against RECOMMENDATION_RANKING_WEIGHTS. A small
+random "jitter" feature keeps results varied between requests, as the shuffle it
+replaces did. Features a provider does not have are constant and drop out.
+
+Selection is maximal marginal relevance (MMR) over the candidates' genres (or
+artists or book categories): each pick trades the candidate's score against its
+genre similarity to the items already picked, so one genre cannot fill the whole
+list. Only the best-scored RANKING_POOL_FACTOR * count candidates enter the
+greedy MMR loop, which keeps selection cheap for very large candidate sets.
+"""
+import datetime
+
+import numpy as np
+from django.conf import settings
+
+FEATURES = ("rating", "popularity", "votes", "recency", "jitter")
+
+DEFAULT_WEIGHTS = {
+    "rating": 0.45,
+    "popularity": 0.25,
+    "votes": 0.1,
+    "recency": 0.1,
+    "jitter": 0.1,
+}
+
+# A title loses half of its recency score every this many years
+RECENCY_HALF_LIFE_YEARS = 10
+
+# Candidates considered by MMR per selected item
+RANKING_POOL_FACTOR = 10
+
+
+def get_weights():
+    """
+    Return the feature weights as an array in FEATURES order.
+    """
+    weights = {**DEFAULT_WEIGHTS, **getattr(settings, 'RECOMMENDATION_RANKING_WEIGHTS', {})}
+    return np.array([weights[name] for name in FEATURES], dtype=np.float64)
+
+
+def parse_year(value):
+    """
+    Return the year of a date string such as "2020-01-01" or "2020", or 0 if there is none.
+    """
+    year = str(value or "")[:4]
+    return int(year) if year.isdigit() else 0
+
+
+def _min_max(column):
+    low = column.min()
+    span = column.max() - low
+    if span <= 0:
+        return np.zeros_like(column)
+    return (column - low) / span
+
+
+def feature_matrix(rating, popularity=None, votes=None, year=None, rng=None):
+    """
+    Build the normalized (n, len(FEATURES)) feature matrix of n candidates.
+
+    :param rating: Sequence of ratings on any scale.
+    :param popularity: Optional sequence of popularity values; log-scaled.
+    :param votes: Optional sequence of vote or rating counts; log-scaled.
+    :param year: Optional sequence of release years, 0 when unknown.
+    :param rng: Optional numpy Generator for the jitter column.
+    """
+    rating = np.asarray(rating, dtype=np.float64)
+    n = len(rating)
+    zeros = np.zeros(n)
+    popularity = np.log1p(np.maximum(np.asarray(popularity, dtype=np.float64), 0)) if popularity is not None else zeros
+    votes = np.log1p(np.maximum(np.asarray(votes, dtype=np.float64), 0)) if votes is not None else zeros
+    if year is not None:
+        year = np.asarray(year, dtype=np.float64)
+        age = np.maximum(datetime.date.today().year - year, 0)
+        recency = np.where(year > 0, np.exp2(-age / RECENCY_HALF_LIFE_YEARS), 0.0)
+    else:
+        recency = zeros
+    rng = rng or np.random.default_rng()
+
+    features = np.empty((n, len(FEATURES)))
+    features[:, 0] = _min_max(rating)
+    features[:, 1] = _min_max(popularity)
+    features[:, 2] = _min_max(votes)
+    features[:, 3] = recency
+    features[:, 4] = rng.random(n)
+    return features
+
+
+def score(features, weights=None):
+    """
+    Return the weighted score of every candidate, scaled to [0, 1].
+    """
+    if weights is None:
+        weights = get_weights()
+    return _min_max(features @ weights)
+
+
+def group_matrix(groups):
+    """
+    Build the row-normalized (n, g) membership matrix of n candidates over g distinct group labels.
+
+    :param groups: Sequence of iterables of labels, e.g. genre IDs or artist names.
+    """
+    vocabulary = {}
+    rows, cols = [], []
+    for row, labels in enumerate(groups):
+        for label in labels or ():
+            rows.append(row)
+            cols.append(vocabulary.setdefault(label, len(vocabulary)))
+    matrix = np.zeros((len(groups), max(len(vocabulary), 1)), dtype=np.float32)
+    matrix[rows, cols] = 1.0
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    np.divide(matrix, norms, out=matrix, where=norms > 0)
+    return matrix
+
+
+def top_k(scores, count):
+    """
+    Return the indices of the `count` highest scores, best first.
+    """
+    count = min(count, len(scores))
+    if count <= 0:
+        return np.empty(0, dtype=np.intp)
+    if count < len(scores):
+        best = np.argpartition(-scores, count - 1)[:count]
+    else:
+        best = np.arange(len(scores))
+    return best[np.argsort(-scores[best], kind="stable")]
+
+
+def mmr_select(scores, groups, count, diversity):
+    """
+    Greedily select `count` candidates by maximal marginal relevance.
+
+    :param scores: Array of candidate scores in [0, 1].
+    :param groups: Sequence of label iterables of every candidate (see group_matrix), or None.
+    :param count: Number of candidates to select.
+    :param diversity: Weight in [0, 1] of the genre-similarity penalty; 0 ranks by score only.
+    :return: Array of the selected indices in selection order.
+    """
+    pool = top_k(scores, count * RANKING_POOL_FACTOR)
+    count = min(count, len(pool))
+    if groups is None or diversity <= 0 or count <= 1:
+        return pool[:count]
+
+    pool_scores = scores[pool]
+    # Only the pool's labels are needed, so the matrix stays small for large candidate sets
+    pool_groups = group_matrix([groups[index] for index in pool])
+    relevance = (1 - diversity) * pool_scores
+    max_similarity = np.zeros(len(pool))
+    available = np.ones(len(pool), dtype=bool)
+    selected = np.empty(count, dtype=np.intp)
+    for position in range(count):
+        marginal = np.where(available, relevance - diversity * max_similarity, -np.inf)
+        best = int(np.argmax(marginal))
+        selected[position] = best
+        available[best] = False
+        np.maximum(max_similarity, pool_groups @ pool_groups[best], out=max_similarity)
+    return pool[selected]
+
+
+def rank(count, rating, popularity=None, votes=None, year=None, groups=None, diversity=None, weights=None, rng=None):
+    """
+    Score candidates and select the best `count` of them, diversified over their groups.
+
+    :param count: Number of candidates to select.
+    :param rating: Sequence of candidate ratings; defines the number of candidates.
+    :param popularity: Optional sequence of popularity values.
+    :param votes: Optional sequence of vote counts.
+    :param year: Optional sequence of release years (0 when unknown).
+    :param groups: Optional sequence of label iterables (genres, artists, ...) used for diversity.
+    :param diversity: MMR diversity weight, defaults to RECOMMENDATION_RANKING_DIVERSITY.
+    :param weights: Optional feature weight array in FEATURES order.
+    :param rng: Optional numpy Generator for the jitter feature.
+    :return: List of the selected candidate indices in ranked order.
+    """
+    if len(rating) == 0:
+        return []
+    scores = score(feature_matrix(rating, popularity, votes, year, rng), weights)
+    if diversity is None:
+        diversity = getattr(settings, 'RECOMMENDATION_RANKING_DIVERSITY', 0.3)
+    return mmr_select(scores, groups, count, diversity).tolist()
+
+
+def rerank(affinity, weight):
+    """
+    Blend an existing ranking with per-item affinities.
+
+    :param affinity: Sequence of affinities in [0, 1], one per item in current ranked order.
+    :param weight: Share of the affinity in the blended score; 0 keeps the current order.
+    :return: List of item indices in the new order.
+    """
+    affinity = np.asarray(affinity, dtype=np.float64)
+    position = 1 - np.arange(len(affinity)) / max(len(affinity), 1)
+    return np.argsort(-((1 - weight) * position + weight * affinity), kind="stable").tolist()
@@ -0,0 +1,221 @@
+"""
+Per-provider token-bucket rate limiting for outbound provider calls.
+
+Each provider has a bucket that refills at its allowed request rate, so a request
+only waits when the budget is actually exhausted. With PROVIDER_RATE_LIMIT_SHARED
+enabled the bucket state lives in the Django cache and is shared by every worker.
+A 429 response blocks the provider for its Retry-After period. Callers give up
+with ProviderUnavailable instead of waiting longer than they can afford, so a long
+block makes them use their fallbacks rather than tie up worker threads.
+"""
+import asyncio
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from .circuit_breaker import ProviderUnavailable
+
+# Longest block a single 429 can impose, however large its Retry-After
+MAX_BLOCK_SECONDS = 3600
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+class TokenBucket:
+    """
+    A token bucket holding up to `capacity` tokens that refills at `rate` tokens per second.
+    """
+
+    def __init__(self, name, rate, capacity, shared=False):
+        """
+        :param name: The provider name, used to build the shared cache keys.
+        :param rate: Tokens added per second.
+        :param capacity: Maximum number of tokens, i.e. the allowed burst.
+        :param shared: Keep the bucket in the Django cache instead of in process memory.
+        """
+        self.name = name
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self.shared = shared
+        self._tokens = self.capacity
+        self._updated = time.time()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def _state_key(self):
+        return f"ratelimit:{self.name}:bucket"
+
+    @property
+    def _lock_key(self):
+        return f"ratelimit:{self.name}:lock"
+
+    @property
+    def _blocked_key(self):
+        return f"ratelimit:{self.name}:blocked_until"
+
+    def acquire(self, max_wait=None):
+        """
+        Take one token, sleeping only as long as needed for the budget to allow it.
+
+        :param max_wait: Longest time in seconds the caller can wait in total; None waits as long as needed.
+        :raises ProviderUnavailable: If no token can be taken within max_wait, e.g. during a long 429 block.
+        """
+        give_up_at = None if max_wait is None else time.monotonic() + max_wait
+        while True:
+            wait = self.try_acquire()
+            if wait <= 0:
+                return
+            self._check_wait(wait, give_up_at)
+            time.sleep(wait)
+
+    async def aacquire(self, max_wait=None):
+        """
+        Take one token like acquire(), waiting without blocking the event loop.
+        """
+        give_up_at = None if max_wait is None else time.monotonic() + max_wait
+        while True:
+            if self.shared:
+                wait = await sync_to_async(self.try_acquire, thread_sensitive=False)()
+            else:
+                wait = self.try_acquire()
+            if wait <= 0:
+                return
+            self._check_wait(wait, give_up_at)
+            await asyncio.sleep(wait)
+
+    def _check_wait(self, wait, give_up_at):
+        if give_up_at is not None and time.monotonic() + wait > give_up_at:
+            raise ProviderUnavailable(self.name, f"rate limited for another {wait:.1f}s")
+
+    def try_acquire(self):
+        """
+        Take one token if one is available right now.
+
+        :return: 0 if a token was taken, otherwise the seconds to wait before trying again.
+        """
+        wait = self._blocked_for()
+        if wait > 0:
+            return wait
+        return self._take_shared() if self.shared else self._take_local()
+
+    def penalize(self, retry_after):
+        """
+        Block the provider for `retry_after` seconds, e.g. after a 429 response.
+
+        :param retry_after: The number of seconds to wait before the next request, capped at MAX_BLOCK_SECONDS.
+        """
+        retry_after = min(retry_after, MAX_BLOCK_SECONDS)
+        blocked_until = time.time() + retry_after
+        self._blocked_until = max(self._blocked_until, blocked_until)
+        if self.shared:
+            try:
+                cache.set(self._blocked_key, blocked_until, timeout=int(retry_after) + 1)
+            except Exception as e:
+                print(f"[ERROR] Failed to share {self.name} rate limit block: {str(e)}")
+
+    def _blocked_for(self):
+        blocked_until = self._blocked_until
+        if self.shared:
+            try:
+                blocked_until = max(blocked_until, cache.get(self._blocked_key, 0))
+            except Exception:
+                pass
+        return blocked_until - time.time()
+
+    def _refill(self, tokens, updated, now):
+        return min(self.capacity, tokens + (now - updated) * self.rate)
+
+    def _take_local(self):
+        """
+        Take a token from the in-process bucket.
+
+        :return: 0 if a token was taken, otherwise the seconds until one is available.
+        """
+        with self._lock:
+            now = time.time()
+            self._tokens = self._refill(self._tokens, self._updated, now)
+            self._updated = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0
+            return (1 - self._tokens) / self.rate
+
+    def _take_shared(self):
+        """
+        Take a token from the bucket stored in the Django cache.
+
+        The read-modify-write is guarded by a short-lived cache lock; if the cache is
+        unavailable the in-process bucket is used instead.
+
+        :return: 0 if a token was taken, otherwise the seconds until one is available.
+        """
+        try:
+            if not cache.add(self._lock_key, 1, timeout=1):
+                return 0.005
+            try:
+                now = time.time()
+                tokens, updated = cache.get(self._state_key, (self.capacity, now))
+                tokens = self._refill(tokens, updated, now)
+                wait = 0
+                if tokens >= 1:
+                    tokens -= 1
+                else:
+                    wait = (1 - tokens) / self.rate
+                cache.set(self._state_key, (tokens, now), timeout=max(60, int(self.capacity / self.rate) * 2))
+                return wait
+            finally:
+                cache.delete(self._lock_key)
+        except Exception as e:
+            print(f"[ERROR] Shared {self.name} rate limit unavailable, using local bucket: {str(e)}")
+            return self._take_local()
+
+
+def parse_retry_after(value, default=1.0):
+    """
+    Parse a Retry-After header given either in seconds or as an HTTP date.
+
+    :param value: The header value, or None if it was missing.
+    :param default: The delay to use when the header is missing or invalid.
+    :return: The delay in seconds.
+    """
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+
+def get_rate_limiter(provider):
+    """
+    Return the token bucket configured for a provider.
+
+    :param provider: The provider name, e.g. "tmdb".
+    :return: The TokenBucket, or None if the provider has no configured limit.
+    """
+    limiter = _limiters.get(provider)
+    if limiter is None:
+        config = getattr(settings, 'PROVIDER_RATE_LIMITS', {}).get(provider)
+        if not config:
+            return None
+        with _limiters_lock:
+            limiter = _limiters.get(provider)
+            if limiter is None:
+                limiter = TokenBucket(
+                    provider,
+                    rate=config["rate"],
+                    capacity=config.get("capacity", config["rate"]),
+                    shared=getattr(settings, 'PROVIDER_RATE_LIMIT_SHARED', False),
+                )
+                _limiters[provider] = limiter
+    return limiter
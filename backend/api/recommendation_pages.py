@@ -0,0 +1,85 @@
+"""
+Short-lived cursors over computed recommendation sets.
+
+The providers return more items than the first page shows (e.g. 50 movies of
+which 30 are displayed). Instead of discarding the rest, the full set of every
+category is stored in the Django cache under a random set id, and each category
+gets a cursor of the form "<set id>.<category>.<offset>". Follow-up pages are
+sliced from the stored set, so they make no provider calls and continue exactly
+where page one stopped. With REDIS_URL set the cursors work across workers.
+"""
+import secrets
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def _cache_key(set_id):
+    return f"recommendations:pages:{set_id}"
+
+
+def make_cursor(set_id, category, offset):
+    return f"{set_id}.{category}.{offset}"
+
+
+def parse_cursor(cursor):
+    """
+    Split a cursor into its set id, category and offset.
+
+    :raises ValueError: If the cursor is malformed.
+    """
+    set_id, category, offset = str(cursor).split(".")
+    offset = int(offset)
+    if not set_id or offset < 0:
+        raise ValueError(cursor)
+    return set_id, category, offset
+
+
+def store_result_set(emotion, categories):
+    """
+    Store the full items of every category for follow-up pages.
+
+    :param emotion: The emotion the items were computed for.
+    :param categories: Mapping of category name to its complete, ordered item list.
+    :return: The id of the stored set.
+    """
+    set_id = secrets.token_urlsafe(12)
+    cache.set(_cache_key(set_id), {"emotion": emotion, "categories": categories},
+              getattr(settings, 'RECOMMENDATION_CURSOR_TTL', 600))
+    return set_id
+
+
+def paginate(set_id, category, items, offset, page_size):
+    """
+    Slice one page from a category's items.
+
+    :return: Tuple of the page and the cursor of the next page, or None on the last page.
+    """
+    end = offset + page_size if page_size else len(items)
+    next_cursor = make_cursor(set_id, category, end) if set_id and end < len(items) else None
+    return items[offset:end], next_cursor
+
+
+def load_page(cursor, page_size):
+    """
+    Return the page a cursor points to from its stored set.
+
+    :param cursor: A cursor returned with a previous page.
+    :param page_size: Number of items per page; None returns the rest of the set.
+    :return: Dict with emotion, category, offset, items and next_cursor, or None if the set expired.
+    :raises ValueError: If the cursor is malformed or names a category that is not in the set.
+    """
+    set_id, category, offset = parse_cursor(cursor)
+    result_set = cache.get(_cache_key(set_id))
+    if result_set is None:
+        return None
+    if category not in result_set["categories"]:
+        raise ValueError(cursor)
+    items, next_cursor = paginate(set_id, category, result_set["categories"][category], offset, page_size)
+    return {
+        "emotion": result_set["emotion"],
+        "category": category,
+        "offset": offset,
+        "items": items,
+        "next_cursor": next_cursor,
+    }
@@ -0,0 +1,38 @@
+"""
+Renderers and chunk encoders for the streaming recommendations endpoint.
+
+Each chunk is an event name plus a JSON payload. NDJSON puts the event name into
+the object and writes one object per line; server-sent events use the standard
+"event:"/"data:" framing so the stream can be consumed with EventSource.
+"""
+import json
+
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+def encode_ndjson(event, data):
+    return (json.dumps({"event": event, **data}, cls=JSONEncoder) + "\n").encode("utf-8")
+
+
+def encode_sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data, cls=JSONEncoder)}\n\n".encode("utf-8")
+
+
+class NDJSONRenderer(BaseRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = None
+    encode = staticmethod(encode_ndjson)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        # Only used for non-streamed responses, i.e. validation errors
+        response = (renderer_context or {}).get('response')
+        event = "error" if response is not None and response.status_code >= 400 else "result"
+        return self.encode(event, data or {})
+
+
+class EventStreamRenderer(NDJSONRenderer):
+    media_type = 'text/event-stream'
+    format = 'sse'
+    encode = staticmethod(encode_sse)
@@ -0,0 +1,265 @@
+"""
+TTL response cache for provider GET requests, stored in the Django cache backend.
+
+Successful JSON responses are cached under (provider, endpoint, normalized params)
+with a per-provider TTL from PROVIDER_CACHE_TTLS. Once an entry is older than its
+TTL it is still served for the provider's stale window while a single background
+refresh fetches a new copy (stale-while-revalidate). Hit, stale and miss counts
+are kept per provider in the cache so they add up across workers.
+
+async_cached_get is the same cache for the async views: it shares entries and
+counters with cached_get but fetches through async_http_client.
+
+While a provider's circuit breaker is open, get_cached_response (and
+async_get_cached_response) serve whatever is still cached for it, fresh or stale,
+without contacting the provider.
+"""
+import asyncio
+import hashlib
+import json
+import time
+from urllib.parse import urlsplit
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+from . import async_http_client, http_client
+from .fanout import get_page_executor
+
+# Query parameters that carry credentials and must not become part of the cache key
+SECRET_PARAMS = {"api_key", "key"}
+
+STAT_NAMES = ("hit", "stale", "miss")
+
+
+class CachedResponse:
+    """
+    Minimal stand-in for requests.Response built from a cached JSON body.
+    """
+    status_code = 200
+
+    def __init__(self, data):
+        self._data = data
+        self.headers = {}
+
+    def json(self):
+        return self._data
+
+    @property
+    def text(self):
+        return json.dumps(self._data)
+
+
+def get_cache_policy(provider):
+    """
+    Return the (ttl, stale) pair in seconds configured for a provider.
+
+    :param provider: The provider name, e.g. "tmdb".
+    :return: Tuple of TTL and stale window; a TTL of 0 disables caching.
+    """
+    policy = getattr(settings, 'PROVIDER_CACHE_TTLS', {}).get(provider, {})
+    return policy.get("ttl", 0), policy.get("stale", 0)
+
+
+def make_cache_key(provider, url, params=None):
+    """
+    Build the cache key for a provider request.
+
+    :param provider: The provider name.
+    :param url: The request URL.
+    :param params: The query parameters; credentials are ignored and values are normalized.
+    :return: The cache key.
+    """
+    normalized = sorted(
+        (str(name), str(value).strip().lower())
+        for name, value in (params or {}).items()
+        if name not in SECRET_PARAMS and value is not None
+    )
+    digest = hashlib.sha1(json.dumps(normalized).encode("utf-8")).hexdigest()
+    return f"provider:{provider}:{urlsplit(url).path}:{digest}"
+
+
+def cached_get(url, params=None, **kwargs):
+    """
+    GET a provider URL through the response cache.
+
+    :param url: The request URL.
+    :param params: The query parameters.
+    :param kwargs: Extra keyword arguments passed to http_client.get, e.g. headers.
+    :return: A CachedResponse on a cache hit, otherwise the live requests.Response.
+    """
+    provider = http_client.get_provider(url)
+    ttl, stale = get_cache_policy(provider)
+    if not ttl:
+        return http_client.get(url, params=params, **kwargs)
+
+    key = make_cache_key(provider, url, params)
+    entry = _safe_cache_get(key)
+    if entry is not None:
+        age = time.time() - entry["stored_at"]
+        if age < ttl:
+            _record(provider, "hit")
+            return CachedResponse(entry["data"])
+        _record(provider, "stale")
+        _refresh_in_background(key, url, params, kwargs, ttl, stale)
+        return CachedResponse(entry["data"])
+
+    _record(provider, "miss")
+    return _fetch_and_store(key, url, params, kwargs, ttl, stale)
+
+
+async def async_cached_get(url, params=None, **kwargs):
+    """
+    GET a provider URL through the response cache without blocking the event loop.
+
+    :param url: The request URL.
+    :param params: The query parameters.
+    :param kwargs: Extra keyword arguments passed to async_http_client.get, e.g. headers.
+    :return: A CachedResponse on a cache hit, otherwise the live httpx.Response.
+    """
+    provider = http_client.get_provider(url)
+    ttl, stale = get_cache_policy(provider)
+    if not ttl:
+        return await async_http_client.get(url, params=params, **kwargs)
+
+    key = make_cache_key(provider, url, params)
+    entry = await _async_cache_call(_safe_cache_get, key)
+    if entry is not None:
+        age = time.time() - entry["stored_at"]
+        if age < ttl:
+            await _async_cache_call(_record, provider, "hit")
+            return CachedResponse(entry["data"])
+        await _async_cache_call(_record, provider, "stale")
+        if await _async_cache_call(cache.add, f"{key}:refreshing", 1, 30):
+            _start_async_refresh(key, url, params, kwargs, ttl, stale)
+        return CachedResponse(entry["data"])
+
+    await _async_cache_call(_record, provider, "miss")
+    return await _async_fetch_and_store(key, url, params, kwargs, ttl, stale)
+
+
+def get_cached_response(url, params=None):
+    """
+    Return the cached response of a provider request, fresh or stale, without contacting the provider.
+
+    :param url: The request URL.
+    :param params: The query parameters.
+    :return: A CachedResponse, or None if nothing is cached.
+    """
+    provider = http_client.get_provider(url)
+    ttl, _ = get_cache_policy(provider)
+    if not ttl:
+        return None
+    entry = _safe_cache_get(make_cache_key(provider, url, params))
+    if entry is None:
+        return None
+    _record(provider, "hit" if time.time() - entry["stored_at"] < ttl else "stale")
+    return CachedResponse(entry["data"])
+
+
+async def async_get_cached_response(url, params=None):
+    """
+    Async version of get_cached_response.
+    """
+    return await _async_cache_call(get_cached_response, url, params)
+
+
+def get_stats():
+    """
+    Return the hit, stale and miss counters of every provider with a cache policy.
+
+    :return: Dict of provider name to a dict of counters and the hit ratio.
+    """
+    stats = {}
+    for provider in getattr(settings, 'PROVIDER_CACHE_TTLS', {}):
+        counts = cache.get_many([f"provider_cache_stats:{provider}:{name}" for name in STAT_NAMES])
+        counters = {name: counts.get(f"provider_cache_stats:{provider}:{name}", 0) for name in STAT_NAMES}
+        total = sum(counters.values())
+        counters["hit_ratio"] = round((counters["hit"] + counters["stale"]) / total, 3) if total else None
+        stats[provider] = counters
+    return stats
+
+
+def _fetch_and_store(key, url, params, kwargs, ttl, stale):
+    response = http_client.get(url, params=params, **kwargs)
+    if response.status_code == 200:
+        try:
+            entry = {"data": response.json(), "stored_at": time.time()}
+        except ValueError:
+            return response
+        try:
+            cache.set(key, entry, timeout=ttl + stale)
+        except Exception as e:
+            print(f"[ERROR] Failed to cache provider response: {str(e)}")
+    return response
+
+
+def _refresh_in_background(key, url, params, kwargs, ttl, stale):
+    # Only one worker refreshes a stale entry; everyone else keeps serving it
+    if not cache.add(f"{key}:refreshing", 1, timeout=30):
+        return
+
+    def refresh():
+        try:
+            _fetch_and_store(key, url, params, kwargs, ttl, stale)
+        except Exception as e:
+            print(f"[ERROR] Background refresh of {url} failed: {str(e)}")
+        finally:
+            cache.delete(f"{key}:refreshing")
+
+    get_page_executor().submit(refresh)
+
+
+async def _async_fetch_and_store(key, url, params, kwargs, ttl, stale):
+    response = await async_http_client.get(url, params=params, **kwargs)
+    if response.status_code == 200:
+        try:
+            entry = {"data": response.json(), "stored_at": time.time()}
+        except ValueError:
+            return response
+        try:
+            await _async_cache_call(cache.set, key, entry, ttl + stale)
+        except Exception as e:
+            print(f"[ERROR] Failed to cache provider response: {str(e)}")
+    return response
+
+
+# Background refresh tasks, referenced until they finish so they are not garbage collected
+_refresh_tasks = set()
+
+
+def _start_async_refresh(key, url, params, kwargs, ttl, stale):
+    async def refresh():
+        try:
+            await _async_fetch_and_store(key, url, params, kwargs, ttl, stale)
+        except Exception as e:
+            print(f"[ERROR] Background refresh of {url} failed: {str(e)}")
+        finally:
+            await _async_cache_call(cache.delete, f"{key}:refreshing")
+
+    task = asyncio.ensure_future(refresh())
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
+
+
+async def _async_cache_call(fn, *args):
+    # Cache backends are synchronous; run them off the event loop without serializing requests
+    return await sync_to_async(fn, thread_sensitive=False)(*args)
+
+
+def _safe_cache_get(key):
+    try:
+        return cache.get(key)
+    except Exception as e:
+        print(f"[ERROR] Provider response cache unavailable: {str(e)}")
+        return None
+
+
+def _record(provider, name):
+    key = f"provider_cache_stats:{provider}:{name}"
+    try:
+        cache.add(key, 0, timeout=None)
+        cache.incr(key)
+    except Exception:
+        pass
@@ -0,0 +1,111 @@
+"""
+Single-flight coalescing of identical concurrent fetches.
+
+When many requests ask for the same key at once (e.g. movie recommendations for
+"happy" during a spike), only the first caller runs the fetch and everyone else
+waits for and shares its result. With RECOMMENDATION_SINGLEFLIGHT_SHARED enabled
+the leader also takes a lease in the Django cache and publishes its result there,
+so callers in other workers wait for that fetch instead of starting their own.
+"""
+import copy
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Runs at most one fetch per key at a time and shares its result with concurrent callers.
+    """
+
+    def __init__(self, namespace="singleflight"):
+        """
+        :param namespace: Prefix for the cache keys used in shared mode.
+        """
+        self.namespace = namespace
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, *args):
+        """
+        Call fn(*args) unless a call for the same key is already in flight, in which case wait for it.
+
+        :param key: The coalescing key.
+        :param fn: The fetch function.
+        :param args: Positional arguments passed to fn.
+        :return: The result of the fetch; callers that waited get their own copy.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return copy.deepcopy(call.result)
+
+        try:
+            call.result = self._run_shared(key, fn, args) if self._shared_enabled() else fn(*args)
+            return call.result
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+    def _shared_enabled(self):
+        return getattr(settings, 'RECOMMENDATION_SINGLEFLIGHT_SHARED', False)
+
+    def _run_shared(self, key, fn, args):
+        """
+        Coalesce across workers: run the fetch only if no other worker holds the lease.
+        """
+        lease = getattr(settings, 'RECOMMENDATION_SINGLEFLIGHT_LEASE', 15)
+        lock_key = f"{self.namespace}:lock:{key}"
+        result_key = f"{self.namespace}:result:{key}"
+
+        try:
+            acquired = cache.add(lock_key, 1, timeout=lease)
+        except Exception as e:
+            print(f"[ERROR] Shared single-flight unavailable: {str(e)}")
+            return fn(*args)
+
+        if not acquired:
+            deadline = time.monotonic() + lease
+            while time.monotonic() < deadline:
+                result = cache.get(result_key)
+                if result is not None:
+                    return result
+                if cache.get(lock_key) is None:
+                    break
+                time.sleep(0.05)
+            result = cache.get(result_key)
+            if result is not None:
+                return result
+            # The other worker failed or took too long; fetch ourselves
+            return fn(*args)
+
+        try:
+            result = fn(*args)
+            cache.set(result_key, result, timeout=getattr(settings, 'RECOMMENDATION_SINGLEFLIGHT_RESULT_TTL', 5))
+            return result
+        finally:
+            cache.delete(lock_key)
+
+
+recommendation_flights = SingleFlight("recommendations")
@@ -0,0 +1,151 @@
+"""
+Process-wide cache for the Spotify client-credentials access token.
+
+Spotify tokens are valid for an hour, so instead of requesting a new one before
+every API call the token is kept in memory until shortly before it expires. Once
+the token enters its refresh window it is renewed on a background thread while
+callers keep using the still-valid token, and a lock makes sure only one refresh
+per process hits the token endpoint. Starting the background refresh never waits
+for that lock, and the refresh is skipped if the token was renewed meanwhile. When SPOTIFY_TOKEN_SHARED_CACHE is enabled
+the token is also stored in the Django cache so every worker can reuse it.
+"""
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import http_client
+
+SPOTIFY_TOKEN_URL = "https://accounts.spotify.com/api/token"
+
+
+class SpotifyTokenManager:
+    """
+    Caches a Spotify client-credentials token and refreshes it before it expires.
+    """
+
+    def __init__(self, refresh_margin=None, cache_key="spotify:access_token"):
+        """
+        :param refresh_margin: Seconds before expiry at which the token is refreshed.
+        :param cache_key: Key used when sharing the token through the Django cache.
+        """
+        self.refresh_margin = refresh_margin
+        self.cache_key = cache_key
+        self._token = None
+        self._expires_at = 0.0
+        self._lock = threading.Lock()
+        self._refreshing = False
+        self._refreshing_lock = threading.Lock()
+
+    def get_token(self):
+        """
+        Return a valid access token, fetching one only when none is cached.
+
+        :return: The access token, or None if Spotify did not issue one.
+        """
+        now = time.time()
+        if self._token and now < self._expires_at - self._get_refresh_margin():
+            return self._token
+
+        if self._token and now < self._expires_at:
+            # Still valid but close to expiry: renew without blocking the caller
+            self._refresh_in_background()
+            return self._token
+
+        with self._lock:
+            if self._token and time.time() < self._expires_at:
+                return self._token
+            if not self._load_shared_token():
+                self._refresh()
+            return self._token
+
+    def invalidate(self):
+        """
+        Drop the cached token, e.g. after Spotify rejected it with a 401.
+        """
+        with self._lock:
+            self._token = None
+            self._expires_at = 0.0
+            if self._shared_cache_enabled():
+                cache.delete(self.cache_key)
+
+    def _get_refresh_margin(self):
+        if self.refresh_margin is not None:
+            return self.refresh_margin
+        return getattr(settings, 'SPOTIFY_TOKEN_REFRESH_MARGIN', 60)
+
+    def _shared_cache_enabled(self):
+        return getattr(settings, 'SPOTIFY_TOKEN_SHARED_CACHE', False)
+
+    def _load_shared_token(self):
+        """
+        Adopt a token another worker stored in the Django cache if it is newer than ours.
+
+        :return: True if a usable shared token was adopted.
+        """
+        if not self._shared_cache_enabled():
+            return False
+        shared = cache.get(self.cache_key)
+        if not shared or shared.get("expires_at", 0) <= max(self._expires_at, time.time()):
+            return False
+        self._token = shared["access_token"]
+        self._expires_at = shared["expires_at"]
+        return time.time() < self._expires_at - self._get_refresh_margin()
+
+    def _refresh_in_background(self):
+        # A separate lock, so callers never wait for a token request that is in flight
+        with self._refreshing_lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+        threading.Thread(target=self._background_refresh, daemon=True).start()
+
+    def _background_refresh(self):
+        try:
+            with self._lock:
+                # Another caller may have renewed the token while this thread was starting
+                if self._token and time.time() < self._expires_at - self._get_refresh_margin():
+                    return
+                if not self._load_shared_token():
+                    self._refresh()
+        except Exception as e:
+            print(f"[ERROR] Background Spotify token refresh failed: {str(e)}")
+        finally:
+            with self._refreshing_lock:
+                self._refreshing = False
+
+    def _refresh(self):
+        """
+        Request a new token from Spotify. Must be called with the lock held.
+        """
+        print("[DEBUG] Requesting new Spotify access token")
+        response = http_client.post(
+            SPOTIFY_TOKEN_URL,
+            data={"grant_type": "client_credentials"},
+            auth=(os.getenv("SPOTIFY_CLIENT_ID"), os.getenv("SPOTIFY_CLIENT_SECRET")),
+        )
+        data = response.json()
+        token = data.get("access_token")
+        if not token:
+            print(f"[ERROR] Spotify token request failed: {response.status_code} {data}")
+            return
+
+        expires_in = int(data.get("expires_in", 3600))
+        self._token = token
+        self._expires_at = time.time() + expires_in
+        if self._shared_cache_enabled():
+            cache.set(self.cache_key, {"access_token": token, "expires_at": self._expires_at}, timeout=expires_in)
+
+
+spotify_token_manager = SpotifyTokenManager()
+
+
+def get_spotify_token():
+    """
+    Return the process-wide Spotify access token.
+
+    :return: The access token, or None if Spotify did not issue one.
+    """
+    return spotify_token_manager.get_token()
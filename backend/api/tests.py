@@ -1,7 +1,7 @@
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase, APIClient
-from unittest.mock import patch
+from unittest.mock import patch, MagicMock
 import tempfile
 import os
 
@@ -104,3 +104,1431 @@ class EmotionAPITestCase(APITestCase):
 
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
         self.assertEqual(response.data['error'], 'No emotion provided')
+
+
+class RecommendationFanoutTestCase(APITestCase):
+    def setUp(self):
+        self.client = APIClient()
+
+    def test_fetch_categories_runs_concurrently(self):
+        import time
+        from .fanout import fetch_categories
+
+        def slow(emotion):
+            time.sleep(0.2)
+            return [emotion]
+
+        start = time.monotonic()
+        results = list(fetch_categories('happy', {'a': slow, 'b': slow, 'c': slow}))
+        elapsed = time.monotonic() - start
+
+        self.assertEqual(sorted(r[0] for r in results), ['a', 'b', 'c'])
+        self.assertTrue(all(r[1] == ['happy'] and r[2] == 'ok' for r in results))
+        self.assertLess(elapsed, 0.5)
+
+    def test_fetch_categories_reports_timeouts_and_errors(self):
+        import time
+        from .fanout import fetch_categories
+
+        def broken(emotion):
+            raise ValueError('provider down')
+
+        fetchers = {'fast': lambda e: [1], 'slow': lambda e: time.sleep(1), 'broken': broken}
+        results = {r[0]: r for r in fetch_categories('sad', fetchers, timeouts={'slow': 0.1})}
+
+        self.assertEqual(results['fast'][2], 'ok')
+        self.assertEqual(results['slow'][2], 'timed_out')
+        self.assertEqual(results['broken'][2], 'error')
+
+    def test_fetch_categories_returns_pending_when_budget_expires(self):
+        import threading
+        import time
+        from .fanout import fetch_categories
+
+        finished = threading.Event()
+
+        def slow(emotion):
+            time.sleep(0.3)
+            finished.set()
+            return ['late']
+
+        start = time.monotonic()
+        results = {r[0]: r for r in fetch_categories('calm', {'fast': lambda e: [1], 'slow': slow}, budget=0.1)}
+
+        self.assertLess(time.monotonic() - start, 0.25)
+        self.assertEqual(results['fast'][2], 'ok')
+        self.assertEqual(results['slow'][2], 'pending')
+        # The straggler keeps running in the background
+        self.assertTrue(finished.wait(1))
+
+    def test_recommendations_reports_pending_categories(self):
+        import time
+        from . import views
+
+        fetchers = {
+            'music': lambda e: ['Song'],
+            'movies': lambda e: time.sleep(0.5) or [],
+            'webseries': lambda e: [],
+            'stories': lambda e: [],
+        }
+        with patch.dict(views.CATEGORY_FETCHERS, fetchers):
+            response = self.client.post(reverse('recommendations'), {'emotion': 'proud', 'deadline_ms': 100},
+                                        format='json')
+            invalid = self.client.post(reverse('recommendations'), {'emotion': 'proud', 'deadline_ms': 'soon'},
+                                       format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['recommendations']['music'], ['Song'])
+        self.assertEqual(response.data['recommendations']['movies'], [])
+        self.assertEqual(response.data['category_status']['movies'], 'pending')
+        self.assertEqual(response.data['category_status']['music'], 'ok')
+        self.assertEqual(invalid.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_recommendations_only_calls_requested_categories(self):
+        from . import views
+
+        movies = MagicMock(return_value=[{'title': 'Up', 'year': '2009', 'description': 'A long overview'}])
+        stories = MagicMock(return_value=[])
+        with patch.dict(views.CATEGORY_FETCHERS, {'movies': movies, 'stories': stories}):
+            response = self.client.post(reverse('recommendations') + '?categories=movies&fields=title,year',
+                                        {'emotion': 'happy'}, format='json')
+            unknown = self.client.post(reverse('recommendations'), {'emotion': 'happy', 'categories': ['podcasts']},
+                                       format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['recommendations'], {'movies': [{'title': 'Up', 'year': '2009'}]})
+        stories.assert_not_called()
+        self.assertEqual(unknown.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_recommendations_stream_sends_each_category(self):
+        import json
+        from . import views
+
+        fetchers = {'music': lambda e: [{'name': 'Song', 'artist': 'Band'}], 'stories': lambda e: ['Story']}
+        with patch.dict(views.CATEGORY_FETCHERS, fetchers):
+            response = self.client.get(reverse('recommendations_stream'),
+                                       {'emotion': 'happy', 'categories': 'music,stories', 'fields': 'name'})
+            chunks = [json.loads(line) for line in b''.join(response.streaming_content).splitlines()]
+            sse = self.client.get(reverse('recommendations_stream'), {'emotion': 'happy', 'categories': 'music'},
+                                  HTTP_ACCEPT='text/event-stream')
+            sse_body = b''.join(sse.streaming_content).decode()
+
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual([chunk['event'] for chunk in chunks], ['start', 'category', 'category', 'done'])
+        music = next(chunk for chunk in chunks if chunk.get('category') == 'music')
+        self.assertEqual(music['items'], [{'name': 'Song'}])
+        self.assertIn('elapsed_ms', music)
+        self.assertEqual(chunks[-1]['category_status'], {'music': 'ok', 'stories': 'ok'})
+        self.assertTrue(sse['Content-Type'].startswith('text/event-stream'))
+        self.assertIn('event: category\ndata: ', sse_body)
+
+    def test_recommendations_pages_come_from_the_stored_set(self):
+        from . import views
+
+        movies = MagicMock(return_value=[{'title': str(i), 'year': '2000'} for i in range(50)])
+        with patch.dict(views.CATEGORY_FETCHERS, {'movies': movies, 'stories': lambda e: ['Story']}):
+            first = self.client.post(reverse('recommendations'),
+                                     {'emotion': 'happy', 'categories': ['movies', 'stories'], 'fields': ['title']},
+                                     format='json')
+            cursor = first.data['next_cursors']['movies']
+            second = self.client.get(reverse('recommendations_page'), {'cursor': cursor, 'page_size': 15})
+            last = self.client.get(reverse('recommendations_page'), {'cursor': second.data['next_cursor']})
+            invalid = self.client.get(reverse('recommendations_page'), {'cursor': 'nonsense'})
+            expired = self.client.get(reverse('recommendations_page'), {'cursor': 'gone.movies.30'})
+
+        self.assertEqual(movies.call_count, 1)
+        self.assertEqual([m['title'] for m in first.data['recommendations']['movies']], [str(i) for i in range(30)])
+        self.assertIsNone(first.data['next_cursors']['stories'])
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.data['items'], [{'title': str(i)} for i in range(30, 45)])
+        self.assertEqual([m['title'] for m in last.data['items']], [str(i) for i in range(45, 50)])
+        self.assertIsNone(last.data['next_cursor'])
+        self.assertEqual(invalid.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(expired.status_code, status.HTTP_404_NOT_FOUND)
+
+    @patch('api.personalization.get_preferences', return_value=None)
+    @patch('api.views.save_mood_history')
+    def test_recommendations_batch_fetches_each_distinct_emotion_once(self, mock_save, mock_preferences):
+        from . import views
+
+        music = MagicMock(side_effect=lambda e: [f'{e} song'])
+        with patch.dict(views.CATEGORY_FETCHERS, {'music': music}):
+            response = self.client.post(reverse('recommendations_batch'), {
+                'items': [{'emotion': 'Happy', 'user_id': None}, {'emotion': 'sad'}, {'emotion': ' happy '}],
+                'categories': ['music'],
+            }, format='json')
+            by_list = self.client.post(reverse('recommendations_batch'),
+                                       {'emotions': ['relaxed', 'relaxed'], 'categories': ['music']}, format='json')
+            empty = self.client.post(reverse('recommendations_batch'), {'emotions': []}, format='json')
+            unknown = self.client.post(reverse('recommendations_batch'),
+                                       {'emotions': ['happy', 'made up'], 'categories': ['music']}, format='json')
+            fetched = sorted(call.args[0] for call in music.call_args_list)
+            users = self.client.post(reverse('recommendations_batch'), {
+                'emotions': ['happy', 'sad', 'happy'], 'user_ids': ['u1', 'u1', 'u2'], 'categories': ['music'],
+            }, format='json')
+            unhashable = self.client.post(reverse('recommendations_batch'), {
+                'items': [{'emotion': 'happy', 'user_id': 'u1'}, {'emotion': 'sad', 'user_id': ['u1']}],
+            }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['distinct_emotions'], 2)
+        self.assertEqual([r['emotion'] for r in response.data['results']], ['Happy', 'sad', ' happy '])
+        self.assertEqual(response.data['results'][0]['recommendations'], {'music': ['happy song']})
+        self.assertEqual(response.data['results'][2]['category_status'], {'music': 'ok'})
+        self.assertEqual(by_list.data['results'][1]['recommendations'], {'music': ['relaxed song']})
+        self.assertEqual(fetched, ['happy', 'relaxed', 'sad'])
+        self.assertEqual(empty.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(unknown.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(unknown.data['items'], [1])
+        self.assertEqual(users.status_code, status.HTTP_200_OK)
+        self.assertEqual(sorted(call.args[0] for call in mock_preferences.call_args_list if call.args[0]), ['u1', 'u2'])
+        self.assertEqual(unhashable.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(unhashable.data['items'], [1])
+        mock_save.assert_not_called()
+
+    def test_batch_deadlines_start_when_fetches_run(self):
+        import time
+        from concurrent.futures import ThreadPoolExecutor
+        from .fanout import fetch_batch
+
+        def slow(emotion):
+            time.sleep(0.15)
+            return [emotion]
+
+        executor = ThreadPoolExecutor(max_workers=1)
+        with patch('api.fanout.get_executor', return_value=executor):
+            results = list(fetch_batch(['happy', 'sad'], {'music': slow}, timeouts={'music': 0.25}))
+        executor.shutdown()
+
+        self.assertEqual(sorted((emotion, fetch_status) for emotion, _, _, fetch_status, _ in results),
+                         [('happy', 'ok'), ('sad', 'ok')])
+
+    def test_recommendations_assembles_categories(self):
+        from . import views
+
+        fetchers = {
+            'music': lambda e: ['Song'],
+            'movies': lambda e: [{'title': str(i)} for i in range(40)],
+            'webseries': lambda e: [],
+            'stories': lambda e: ['Story'],
+        }
+        with patch.dict(views.CATEGORY_FETCHERS, fetchers):
+            response = self.client.post(reverse('recommendations'), {'emotion': 'happy'}, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['recommendations']['music'], ['Song'])
+        self.assertEqual(len(response.data['recommendations']['movies']), 30)
+        self.assertEqual(response.data['recommendations']['stories'], ['Story'])
+
+
+class SpotifyTokenManagerTestCase(APITestCase):
+    def _token_response(self, token, expires_in=3600):
+        response = MagicMock(status_code=200)
+        response.json.return_value = {'access_token': token, 'expires_in': expires_in}
+        return response
+
+    @patch('api.spotify_auth.http_client.post')
+    def test_token_is_reused_until_refresh_window(self, mock_post):
+        from .spotify_auth import SpotifyTokenManager
+
+        mock_post.return_value = self._token_response('abc')
+        manager = SpotifyTokenManager(refresh_margin=60)
+
+        self.assertEqual(manager.get_token(), 'abc')
+        self.assertEqual(manager.get_token(), 'abc')
+        self.assertEqual(mock_post.call_count, 1)
+
+    @patch('api.spotify_auth.http_client.post')
+    def test_concurrent_callers_share_one_refresh(self, mock_post):
+        import threading
+        import time
+        from .spotify_auth import SpotifyTokenManager
+
+        def slow_post(*args, **kwargs):
+            time.sleep(0.1)
+            return self._token_response('abc')
+
+        mock_post.side_effect = slow_post
+        manager = SpotifyTokenManager(refresh_margin=60)
+        threads = [threading.Thread(target=manager.get_token) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(mock_post.call_count, 1)
+
+    @patch('api.spotify_auth.http_client.post')
+    def test_expired_token_is_refreshed(self, mock_post):
+        from .spotify_auth import SpotifyTokenManager
+
+        mock_post.side_effect = [self._token_response('old', expires_in=0), self._token_response('new')]
+        manager = SpotifyTokenManager(refresh_margin=0)
+
+        self.assertEqual(manager.get_token(), 'old')
+        self.assertEqual(manager.get_token(), 'new')
+
+    @patch('api.views.spotify_token_manager.invalidate')
+    @patch('api.views.get_spotify_token', side_effect=['revoked', 'fresh', 'fresh', 'newer'])
+    @patch('api.views.cached_get')
+    def test_requests_are_retried_with_a_fresh_token_after_401(self, mock_get, mock_token, mock_invalidate):
+        from .views import SPOTIFY_RECOMMENDATIONS_URL, SPOTIFY_SEARCH_URL, get_music_recommendation
+
+        empty = MagicMock(status_code=200)
+        empty.json.return_value = {'tracks': []}
+        search = MagicMock(status_code=200)
+        search.json.return_value = {'tracks': {'items': []}}
+        mock_get.side_effect = [MagicMock(status_code=401), empty, MagicMock(status_code=401), search]
+
+        get_music_recommendation('happy')
+
+        self.assertEqual(mock_invalidate.call_count, 2)
+        self.assertEqual([(call.args[0], call.kwargs['headers']['Authorization']) for call in mock_get.call_args_list], [
+            (SPOTIFY_RECOMMENDATIONS_URL, 'Bearer revoked'), (SPOTIFY_RECOMMENDATIONS_URL, 'Bearer fresh'),
+            (SPOTIFY_SEARCH_URL, 'Bearer fresh'), (SPOTIFY_SEARCH_URL, 'Bearer newer'),
+        ])
+
+    @patch('api.spotify_auth.http_client.post')
+    def test_background_refresh_does_not_block_callers(self, mock_post):
+        import threading
+        import time
+        from .spotify_auth import SpotifyTokenManager
+
+        release = threading.Event()
+
+        def slow_post(*args, **kwargs):
+            release.wait(5)
+            return self._token_response('new')
+
+        mock_post.side_effect = slow_post
+        manager = SpotifyTokenManager(refresh_margin=60)
+        manager._token, manager._expires_at = 'old', time.time() + 30
+
+        start = time.monotonic()
+        self.assertEqual(manager.get_token(), 'old')
+        self.assertEqual(manager.get_token(), 'old')
+        self.assertLess(time.monotonic() - start, 1)
+        release.set()
+        for _ in range(100):
+            if manager._token == 'new' and not manager._refreshing:
+                break
+            time.sleep(0.01)
+
+        self.assertEqual(manager.get_token(), 'new')
+        self.assertEqual(mock_post.call_count, 1)
+
+
+class ProviderHttpClientTestCase(APITestCase):
+    def test_sessions_are_pooled_per_host(self):
+        from . import http_client
+
+        self.assertIs(http_client.get_session('api.themoviedb.org'), http_client.get_session('api.themoviedb.org'))
+        self.assertIsNot(http_client.get_session('api.themoviedb.org'), http_client.get_session('api.spotify.com'))
+
+    @patch('requests.Session.request')
+    def test_requests_get_default_timeout(self, mock_request):
+        from . import http_client
+
+        mock_request.return_value = MagicMock(status_code=200)
+        http_client.get('https://api.themoviedb.org/3/movie/popular', params={'page': 1})
+
+        args, kwargs = mock_request.call_args
+        self.assertEqual(args, ('GET', 'https://api.themoviedb.org/3/movie/popular'))
+        self.assertIn('timeout', kwargs)
+
+
+class ProviderRateLimitTestCase(APITestCase):
+    def test_bucket_allows_burst_then_waits(self):
+        from .rate_limit import TokenBucket
+
+        bucket = TokenBucket('test', rate=10, capacity=2)
+
+        self.assertEqual(bucket._take_local(), 0)
+        self.assertEqual(bucket._take_local(), 0)
+        self.assertGreater(bucket._take_local(), 0)
+
+    def test_shared_bucket_uses_cache(self):
+        from django.core.cache import cache
+        from .rate_limit import TokenBucket
+
+        cache.delete('ratelimit:shared-test:bucket')
+        first = TokenBucket('shared-test', rate=10, capacity=1, shared=True)
+        second = TokenBucket('shared-test', rate=10, capacity=1, shared=True)
+
+        self.assertEqual(first._take_shared(), 0)
+        self.assertGreater(second._take_shared(), 0)
+
+    def test_parse_retry_after(self):
+        from .rate_limit import parse_retry_after
+
+        self.assertEqual(parse_retry_after('3'), 3.0)
+        self.assertEqual(parse_retry_after(None), 1.0)
+        self.assertEqual(parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'), 0.0)
+
+    @patch('time.sleep')
+    @patch('requests.Session.request')
+    def test_429_blocks_provider_and_retries(self, mock_request, mock_sleep):
+        from . import http_client
+        from .rate_limit import get_rate_limiter
+
+        limited = MagicMock(status_code=429, headers={'Retry-After': '0'})
+        ok = MagicMock(status_code=200, headers={})
+        mock_request.side_effect = [limited, ok]
+
+        response = http_client.get('https://api.themoviedb.org/3/movie/popular')
+
+        self.assertIs(response, ok)
+        self.assertEqual(mock_request.call_count, 2)
+        self.assertGreater(get_rate_limiter('tmdb')._blocked_until, 0)
+
+    @patch('time.sleep')
+    @patch('requests.Session.request')
+    def test_long_429_block_fails_fast(self, mock_request, mock_sleep):
+        from . import circuit_breaker, http_client, rate_limit
+        from .circuit_breaker import ProviderUnavailable
+
+        mock_request.return_value = MagicMock(status_code=429, headers={'Retry-After': '120'})
+        with patch.dict(rate_limit._limiters, clear=True), patch.dict(circuit_breaker._breakers, clear=True):
+            self.assertEqual(http_client.get('https://api.themoviedb.org/3/movie/popular').status_code, 429)
+            with self.assertRaisesMessage(ProviderUnavailable, 'rate limited'):
+                http_client.get('https://api.themoviedb.org/3/movie/popular')
+
+        self.assertEqual(mock_request.call_count, 1)
+        mock_sleep.assert_not_called()
+
+    def test_infinite_retry_after_is_capped(self):
+        from .rate_limit import MAX_BLOCK_SECONDS, TokenBucket
+
+        bucket = TokenBucket('inf-test', rate=10, capacity=1, shared=True)
+        bucket.penalize(float('inf'))
+
+        self.assertLessEqual(bucket._blocked_for(), MAX_BLOCK_SECONDS)
+        self.assertGreater(bucket.try_acquire(), 0)
+
+
+class TmdbPageFetchTestCase(APITestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def test_fetch_concurrently_keeps_order_and_cancels_early(self):
+        import time
+        from .fanout import fetch_concurrently
+
+        started = []
+
+        def call(n):
+            def run():
+                started.append(n)
+                time.sleep(0.05 * (3 - n) if n < 3 else 0)
+                return n
+            return run
+
+        results = []
+        for result in fetch_concurrently([call(n) for n in range(6)], max_parallel=2):
+            results.append(result)
+            if len(results) == 2:
+                break
+
+        self.assertEqual(results, [0, 1])
+        self.assertNotIn(5, started)
+
+    @patch('api.views.get_tmdb_api_key', return_value='key')
+    @patch('api.views.http_client.get')
+    def test_movie_collector_stops_once_target_is_met(self, mock_get, mock_key):
+        from .views import get_movie_recommendation
+
+        def page(request_url, params):
+            start = params.get('page', 1) * 100 + (params.get('with_genres') or 0) * 1000
+            response = MagicMock(status_code=200)
+            response.json.return_value = {
+                'total_pages': 5,
+                'results': [{'id': start + i, 'title': f'Movie {start + i}', 'poster_path': '/p.jpg',
+                             'release_date': '2020-01-01', 'vote_average': 7} for i in range(20)],
+            }
+            return response
+
+        mock_get.side_effect = lambda url, params=None, **kwargs: page(url, params)
+        movies = get_movie_recommendation('happy')
+
+        self.assertEqual(len(movies), 50)
+        # Page 1 plus three concurrently fetched extra pages; no fallback requests
+        self.assertEqual(mock_get.call_count, 4)
+
+    @patch('api.views.get_tmdb_api_key', return_value='key')
+    @patch('api.views.http_client.get')
+    def test_popular_list_is_only_fetched_after_secondary_genre_falls_short(self, mock_get, mock_key):
+        from .views import get_movie_recommendation
+
+        def page(request_url, params):
+            genre = params.get('with_genres')
+            # The primary genre has a single short page; the secondary genre alone completes the target
+            count = 40 if genre and mock_get.call_count > 1 else 20
+            start = (genre or 0) * 1000 + mock_get.call_count * 100
+            response = MagicMock(status_code=200)
+            response.json.return_value = {
+                'total_pages': 1,
+                'results': [{'id': start + i, 'title': f'Movie {start + i}', 'poster_path': '/p.jpg',
+                             'release_date': '2020-01-01', 'vote_average': 7} for i in range(count)],
+            }
+            return response
+
+        mock_get.side_effect = lambda url, params=None, **kwargs: page(url, params)
+        movies = get_movie_recommendation('happy')
+
+        self.assertEqual(len(movies), 50)
+        urls = [call.args[0] for call in mock_get.call_args_list]
+        self.assertEqual(len(urls), 2)
+        self.assertFalse(any(url.endswith('/popular') for url in urls))
+
+
+class ProviderResponseCacheTestCase(APITestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def _response(self, data):
+        response = MagicMock(status_code=200)
+        response.json.return_value = data
+        return response
+
+    def test_cache_key_ignores_credentials_and_case(self):
+        from .response_cache import make_cache_key
+
+        url = 'https://api.themoviedb.org/3/discover/movie'
+        self.assertEqual(make_cache_key('tmdb', url, {'api_key': 'a', 'q': 'Happy'}),
+                         make_cache_key('tmdb', url, {'api_key': 'b', 'q': 'happy '}))
+
+    @patch('api.response_cache.http_client.get')
+    def test_second_request_is_served_from_cache(self, mock_get):
+        from . import response_cache
+
+        mock_get.return_value = self._response({'results': [1, 2]})
+        url = 'https://api.themoviedb.org/3/movie/popular'
+
+        response_cache.cached_get(url, params={'page': 1})
+        cached = response_cache.cached_get(url, params={'page': 1})
+
+        self.assertEqual(cached.json(), {'results': [1, 2]})
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(response_cache.get_stats()['tmdb']['hit'], 1)
+        self.assertEqual(response_cache.get_stats()['tmdb']['miss'], 1)
+
+    @patch('api.response_cache.get_page_executor')
+    @patch('api.response_cache.http_client.get')
+    def test_stale_entry_is_served_while_refreshing(self, mock_get, mock_executor):
+        from . import response_cache
+
+        mock_executor.return_value.submit.side_effect = lambda fn: fn()
+        mock_get.side_effect = [self._response({'v': 1}), self._response({'v': 2})]
+        url = 'https://api.themoviedb.org/3/movie/popular'
+
+        with self.settings(PROVIDER_CACHE_TTLS={'tmdb': {'ttl': 0.01, 'stale': 60}}):
+            response_cache.cached_get(url)
+            import time
+            time.sleep(0.02)
+            stale = response_cache.cached_get(url)
+            fresh = response_cache.cached_get(url)
+
+        self.assertEqual(stale.json(), {'v': 1})
+        self.assertEqual(fresh.json(), {'v': 2})
+
+
+class SingleFlightTestCase(APITestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def _run_concurrently(self, flight, fetch, count=5):
+        import threading
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(flight.do('movies:happy', fetch, 'happy')))
+                   for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    def _slow_fetch(self, calls):
+        import time
+
+        def fetch(emotion):
+            calls.append(emotion)
+            time.sleep(0.1)
+            return [{'title': emotion}]
+        return fetch
+
+    def test_concurrent_callers_share_one_fetch(self):
+        from .singleflight import SingleFlight
+
+        calls = []
+        results = self._run_concurrently(SingleFlight(), self._slow_fetch(calls))
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [[{'title': 'happy'}]] * 5)
+
+    def test_shared_mode_coalesces_across_instances(self):
+        import threading
+        from .singleflight import SingleFlight
+
+        calls = []
+        fetch = self._slow_fetch(calls)
+        results = []
+        with self.settings(RECOMMENDATION_SINGLEFLIGHT_SHARED=True):
+            workers = [SingleFlight('test'), SingleFlight('test')]
+            threads = [threading.Thread(target=lambda w=w: results.append(w.do('k', fetch, 'sad'))) for w in workers]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [[{'title': 'sad'}]] * 2)
+
+    def test_errors_propagate_to_waiters(self):
+        from .singleflight import SingleFlight
+
+        def broken(emotion):
+            raise ValueError('down')
+
+        with self.assertRaises(ValueError):
+            SingleFlight().do('k', broken, 'happy')
+
+
+class WarmRecommendationsCommandTestCase(APITestCase):
+    @patch('api.management.commands.warm_recommendations.cached_get')
+    @patch('api.management.commands.warm_recommendations.get_tmdb_api_key', return_value='key')
+    def test_command_warms_every_emotion(self, mock_key, mock_cached_get):
+        from io import StringIO
+        from django.core.management import call_command
+        from . import views
+
+        mock_cached_get.return_value = MagicMock(status_code=200)
+        warmed = []
+        fetchers = {category: (lambda e, c=category: warmed.append((c, e)) or [])
+                    for category in views.CATEGORY_FETCHERS}
+        out = StringIO()
+        with patch.dict(views.CATEGORY_FETCHERS, fetchers):
+            call_command('warm_recommendations', '--emotions', 'happy', 'sad', stdout=out)
+
+        self.assertEqual(len(warmed), 8)
+        self.assertIn('Warmed recommendations for 2 emotions', out.getvalue())
+        self.assertTrue(mock_cached_get.called)
+
+
+class MediaCatalogTestCase(APITestCase):
+    def setUp(self):
+        import tempfile
+        from .media_catalog import MediaCatalog
+
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, 'catalog.sqlite3')
+        self.catalog = MediaCatalog(self.path)
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _results(self, start, count):
+        return [{'id': start + i, 'title': f'Movie {start + i}', 'poster_path': '/p.jpg',
+                 'release_date': '2020-01-01', 'vote_average': 7, 'popularity': start + i} for i in range(count)]
+
+    def test_lookup_by_genre_orders_by_popularity(self):
+        self.catalog.upsert('movie', 35, self._results(1, 10))
+        self.catalog.upsert('movie', 18, self._results(6, 10))
+
+        results = self.catalog.lookup('movie', [35, 18], 100)
+
+        self.assertEqual(len(results), 15)
+        self.assertEqual(results[0]['id'], 15)
+        self.assertEqual(self.catalog.lookup('tv', [35], 100), [])
+
+    def test_stale_genres(self):
+        self.catalog.mark_refreshed('movie', 35)
+
+        self.assertEqual(self.catalog.stale_genres('movie', [35, 18], 3600), [18])
+
+    @patch('api.views.http_client.get')
+    def test_movie_recommendation_answers_from_catalog(self, mock_get):
+        from .views import get_movie_recommendation, MOVIE_EMOTION_TO_GENRES
+
+        for genre in MOVIE_EMOTION_TO_GENRES['happy']:
+            self.catalog.upsert('movie', genre, self._results(genre * 100, 30))
+
+        with self.settings(MEDIA_CATALOG_PATH=self.path):
+            movies = get_movie_recommendation('happy')
+
+        self.assertEqual(len(movies), 50)
+        mock_get.assert_not_called()
+
+
+class CircuitBreakerTestCase(APITestCase):
+    def setUp(self):
+        from . import circuit_breaker
+
+        circuit_breaker._breakers.clear()
+        self.addCleanup(circuit_breaker._breakers.clear)
+
+    def _breaker(self, **kwargs):
+        from .circuit_breaker import CircuitBreaker
+
+        options = {'window': 10, 'min_calls': 4, 'failure_rate': 0.5, 'open_seconds': 60, 'half_open_calls': 2}
+        options.update(kwargs)
+        return CircuitBreaker('tmdb', **options)
+
+    def test_opens_after_failures_and_rejects_calls(self):
+        from .circuit_breaker import OPEN
+
+        breaker = self._breaker()
+        for success in (True, False, False, True):
+            breaker.record(success, 0.1)
+
+        self.assertEqual(breaker.state, OPEN)
+        self.assertFalse(breaker.allow())
+
+    def test_opens_on_slow_calls(self):
+        from .circuit_breaker import OPEN
+
+        breaker = self._breaker(slow_call_seconds=1, slow_call_rate=0.75)
+        for _ in range(4):
+            breaker.record(True, 2)
+
+        self.assertEqual(breaker.state, OPEN)
+
+    def test_half_open_probes_close_the_breaker(self):
+        from .circuit_breaker import CLOSED, HALF_OPEN
+
+        breaker = self._breaker(open_seconds=0)
+        for _ in range(4):
+            breaker.record(False, 0.1)
+
+        self.assertEqual(breaker.state, HALF_OPEN)
+        self.assertTrue(breaker.allow())
+        self.assertTrue(breaker.allow())
+        self.assertFalse(breaker.allow())
+        breaker.record(True, 0.1)
+        breaker.record(True, 0.1)
+        self.assertEqual(breaker.state, CLOSED)
+
+    @patch('requests.Session.request')
+    def test_http_client_fails_fast_while_open(self, mock_request):
+        from . import http_client
+        from .circuit_breaker import ProviderUnavailable
+
+        mock_request.return_value = MagicMock(status_code=503)
+        with self.settings(PROVIDER_CIRCUIT_BREAKER={'min_calls': 2, 'open_seconds': 60}):
+            for _ in range(2):
+                http_client.get('https://api.themoviedb.org/3/movie/popular')
+            with self.assertRaises(ProviderUnavailable):
+                http_client.get('https://api.themoviedb.org/3/movie/popular')
+
+        self.assertEqual(mock_request.call_count, 2)
+
+    @patch('api.views.http_client.get')
+    def test_movie_recommendation_uses_defaults_while_open(self, mock_get):
+        from .circuit_breaker import get_circuit_breaker
+        from .views import get_movie_recommendation
+
+        get_circuit_breaker('tmdb')._open()
+        with self.settings(MEDIA_CATALOG_PATH=''):
+            movies = get_movie_recommendation('happy')
+
+        self.assertTrue(movies)
+        mock_get.assert_not_called()
+        response = self.client.get(reverse('provider_health'))
+        self.assertEqual(response.json()['tmdb']['state'], 'open')
+
+    @patch('api.views.http_client.get')
+    def test_cached_responses_are_served_while_open(self, mock_get):
+        import time
+        from django.core.cache import cache
+        from .circuit_breaker import get_circuit_breaker
+        from .response_cache import make_cache_key
+        from .views import MOVIE_EMOTION_TO_GENRES, get_movie_recommendation, get_story_recommendation
+
+        cache.clear()
+        self.addCleanup(cache.clear)
+        book = {'volumeInfo': {'title': 'Cached Book', 'imageLinks': {'thumbnail': 'http://t.jpg'}}}
+        mock_get.return_value = MagicMock(status_code=200, json=MagicMock(return_value={'items': [book]}))
+        self.assertEqual(get_story_recommendation('happy')[0]['title'], 'Cached Book')
+
+        # A stale TMDB page of one of the emotion's genres
+        genre = MOVIE_EMOTION_TO_GENRES['happy'][-1]
+        results = [{'id': i, 'title': f'Cached {i}', 'poster_path': '/p.jpg', 'release_date': '2020-01-01',
+                    'vote_average': 7} for i in range(1, 21)]
+        key = make_cache_key('tmdb', 'https://api.themoviedb.org/3/discover/movie',
+                             {'language': 'en-US', 'sort_by': 'popularity.desc', 'include_adult': 'false',
+                              'with_genres': genre, 'page': 1})
+        cache.set(key, {'data': {'results': results}, 'stored_at': time.time() - 10 ** 6})
+
+        mock_get.reset_mock()
+        get_circuit_breaker('google_books')._open()
+        get_circuit_breaker('tmdb')._open()
+        with self.settings(MEDIA_CATALOG_PATH=''):
+            movies = get_movie_recommendation('happy')
+
+        self.assertEqual(get_story_recommendation('happy')[0]['title'], 'Cached Book')
+        self.assertEqual(len(movies), 20)
+        self.assertTrue(all(movie['title'].startswith('Cached') for movie in movies))
+        mock_get.assert_not_called()
+
+
+    def test_rejected_half_open_calls_serve_cached_responses(self):
+        import time
+        from django.core.cache import cache
+        from .circuit_breaker import ProviderUnavailable, get_circuit_breaker
+        from .response_cache import make_cache_key
+        from .views import (SPOTIFY_RECOMMENDATIONS_URL, get_music_recommendation, get_story_recommendation,
+                            google_books_params, spotify_recommendation_params)
+
+        cache.clear()
+        self.addCleanup(cache.clear)
+        track = {'name': 'Cached Song', 'artists': [{'name': 'Band'}], 'album': {'name': 'Album', 'images': [{'url': 'http://i'}]},
+                 'external_urls': {'spotify': 'http://s'}}
+        book = {'volumeInfo': {'title': 'Cached Book', 'imageLinks': {'thumbnail': 'http://t.jpg'}}}
+        cache.set(make_cache_key('spotify', SPOTIFY_RECOMMENDATIONS_URL, spotify_recommendation_params('happy')),
+                  {'data': {'tracks': [track]}, 'stored_at': time.time()})
+        cache.set(make_cache_key('google_books', 'https://www.googleapis.com/books/v1/volumes',
+                                 google_books_params('happy')),
+                  {'data': {'items': [book]}, 'stored_at': time.time()})
+
+        # Half-open breakers whose probe calls are all taken reject everyone else
+        for provider in ('spotify', 'google_books'):
+            breaker = get_circuit_breaker(provider)
+            breaker._open()
+            breaker._opened_at -= breaker.open_seconds
+            while breaker.allow():
+                pass
+
+        with patch('api.views.spotify_cached_get', side_effect=ProviderUnavailable('spotify')), \
+                patch('api.views.cached_get', side_effect=ProviderUnavailable('google_books')):
+            music = get_music_recommendation('happy')
+            stories = get_story_recommendation('happy')
+
+        self.assertEqual([t['name'] for t in music], ['Cached Song'])
+        self.assertEqual([s['title'] for s in stories], ['Cached Book'])
+
+
+class FallbackCatalogTestCase(APITestCase):
+    def test_emotion_ordering_puts_matching_titles_first(self):
+        from .fallback_catalogs import DEFAULT_WEBSERIES
+
+        first = DEFAULT_WEBSERIES.for_emotion('Romantic')[0]
+        self.assertIn(first, DEFAULT_WEBSERIES.items)
+        self.assertEqual(len(DEFAULT_WEBSERIES.for_emotion('romantic')), len(DEFAULT_WEBSERIES.items))
+        self.assertIs(DEFAULT_WEBSERIES.for_emotion('unknown'), DEFAULT_WEBSERIES.items)
+
+    def test_fill_skips_collected_titles_and_returns_copies(self):
+        from .fallback_catalogs import DEFAULT_MOVIES
+
+        taken = DEFAULT_MOVIES.for_emotion('happy')[0]['title']
+        filled = DEFAULT_MOVIES.fill('happy', {taken}, 5)
+
+        self.assertEqual(len(filled), 5)
+        self.assertNotIn(taken, [movie['title'] for movie in filled])
+        filled[0].pop('rating')
+        self.assertTrue(all('rating' in movie for movie in DEFAULT_MOVIES.items))
+
+    def test_generate_default_movies_returns_fresh_copies(self):
+        from .views import generate_default_movies
+
+        movies = generate_default_movies('sad')
+        movies[0]['title'] = 'Changed'
+
+        self.assertNotEqual(generate_default_movies('sad')[0]['title'], 'Changed')
+
+
+class TmdbCollectorTestCase(APITestCase):
+    def _page(self, ids, title='Show'):
+        return [{'id': i, 'name': f'{title} {i}', 'poster_path': '/p.jpg', 'first_air_date': '2019-05-01',
+                 'vote_average': i} for i in ids]
+
+    def test_deduplicates_on_id_and_title(self):
+        from .tmdb_collector import TmdbCollector
+
+        collector = TmdbCollector('tv', 10)
+        collector.add_results(self._page([1, 2, 3]))
+        collector.add_results(self._page([2, 3, 4]) + [{'id': 99, 'name': 'Show 1', 'poster_path': '/p.jpg'}])
+
+        self.assertEqual([record.tmdb_id for record in collector.records], [1, 2, 3, 4])
+
+    def test_stops_pulling_pages_once_target_is_met(self):
+        from .tmdb_collector import TmdbCollector
+
+        pulled = []
+
+        def pages():
+            for start in range(0, 100, 10):
+                pulled.append(start)
+                yield self._page(range(start + 1, start + 11))
+
+        collector = TmdbCollector('tv', 25).consume(pages())
+        series = collector.finalize()
+
+        self.assertEqual(pulled, [0, 10, 20])
+        self.assertEqual(len(series), 25)
+        self.assertTrue(series[0]['external_url'].startswith('https://www.themoviedb.org/tv/'))
+        self.assertNotIn('rating', series[0])
+
+
+class RankingTestCase(APITestCase):
+    def test_weighted_score_orders_candidates(self):
+        import numpy as np
+        from .ranking import FEATURES, rank
+
+        weights = np.array([{'rating': 0.5, 'popularity': 0.5}.get(name, 0) for name in FEATURES])
+        order = rank(3, rating=[5, 9, 9, 1], popularity=[10, 10, 500, 100], weights=weights)
+
+        self.assertEqual(order, [2, 1, 3])
+
+    def test_mmr_spreads_selection_over_genres(self):
+        from .ranking import rank
+
+        rating = [10, 9.9, 9.8, 9.7, 5]
+        genres = [[18], [18], [18], [18], [35]]
+        plain = rank(2, rating, groups=genres, diversity=0)
+        diverse = rank(2, rating, groups=genres, diversity=0.7)
+
+        self.assertEqual(len(plain), 2)
+        self.assertTrue(all(genres[index] == [18] for index in plain))
+        self.assertEqual(sorted(genres[index][0] for index in diverse), [18, 35])
+
+    def test_story_ranking_keeps_target_and_drops_features(self):
+        from .views import format_google_books
+
+        items = [{'volumeInfo': {'title': f'Book {i}', 'imageLinks': {'thumbnail': 't.jpg'}, 'averageRating': i % 5,
+                                 'ratingsCount': i, 'categories': ['Fiction' if i % 2 else 'Poetry']}}
+                 for i in range(40)] + [{'volumeInfo': {'title': 'No cover'}}]
+        stories = format_google_books(items, 30)
+
+        self.assertEqual(len(stories), 30)
+        self.assertNotIn('No cover', [story['title'] for story in stories])
+        self.assertNotIn('rating', stories[0])
+
+
+class PersonalizationTestCase(APITestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def test_build_preferences_weights_recent_moods_and_artists(self):
+        from .personalization import build_preferences
+
+        preferences = build_preferences(['sad', 'happy', 'happy'], ['Song A - Band', 'Song B by Band', 'Other - Solo'])
+
+        self.assertAlmostEqual(preferences['moods']['happy'], 1.9)
+        self.assertAlmostEqual(preferences['moods']['sad'], 0.81)
+        self.assertEqual(preferences['artists']['band'], 1.0)
+        self.assertEqual(preferences['artists']['solo'], 0.5)
+
+    def test_preferences_are_cached_and_updated_on_mood_writes(self):
+        from .personalization import get_preferences, invalidate_preferences, record_mood
+
+        profile = MagicMock(mood_history=['sad'], listening_history=[])
+        with patch('users.models.UserProfile.objects') as objects:
+            objects.only.return_value.get.return_value = profile
+            get_preferences('u1')
+            record_mood('u1', 'happy')
+            preferences = get_preferences('u1')
+            self.assertEqual(objects.only.return_value.get.call_count, 1)
+            invalidate_preferences('u1')
+            get_preferences('u1')
+            self.assertEqual(objects.only.return_value.get.call_count, 2)
+
+        self.assertEqual(preferences['moods'], {'sad': 0.9, 'happy': 1})
+
+    def test_recommendations_are_reranked_for_the_user(self):
+        from . import views
+
+        tracks = [{'name': f'Song {i}', 'artist': 'Favourite' if i == 9 else 'Band'} for i in range(10)]
+        preferences = {'moods': {}, 'artists': {'favourite': 1.0}}
+        with patch.dict(views.CATEGORY_FETCHERS, {'music': lambda e: list(tracks)}), \
+                patch('api.views.save_mood_history'), \
+                patch('api.personalization.get_preferences', side_effect=lambda user_id: user_id and preferences), \
+                self.settings(PERSONALIZATION_WEIGHT=0.8):
+            response = self.client.post(reverse('recommendations'),
+                                        {'emotion': 'happy', 'user_id': 'u1', 'categories': ['music']}, format='json')
+            anonymous = self.client.post(reverse('recommendations'),
+                                         {'emotion': 'happy', 'categories': ['music']}, format='json')
+
+        self.assertEqual(response.data['recommendations']['music'][0]['artist'], 'Favourite')
+        self.assertEqual(anonymous.data['recommendations']['music'], tracks)
+
+
+class TextEmotionModelTestCase(APITestCase):
+    def _write_safetensors(self, path):
+        import json
+        import struct
+        import numpy as np
+
+        header = json.dumps({
+            '__metadata__': {'format': 'pt'},
+            'classifier.weight': {'dtype': 'F32', 'shape': [2, 2], 'data_offsets': [0, 16]},
+            'classifier.bias': {'dtype': 'I64', 'shape': [3], 'data_offsets': [16, 40]},
+        }).encode()
+        with open(path, 'wb') as f:
+            f.write(struct.pack('<Q', len(header)) + header)
+            f.write(np.array([[1, 2], [3, 4]], dtype=np.float32).tobytes())
+            f.write(np.array([5, 6, 7], dtype=np.int64).tobytes())
+
+    def test_safetensors_are_mapped_without_copies(self):
+        from .emotion_model import MappedSafetensors
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'model.safetensors')
+            self._write_safetensors(path)
+            weights = MappedSafetensors(path)
+            weight = weights.numpy('classifier.weight')
+
+            self.assertEqual(weights.metadata, {'format': 'pt'})
+            self.assertEqual(weight.tolist(), [[1, 2], [3, 4]])
+            self.assertEqual(weights.numpy('classifier.bias').tolist(), [5, 6, 7])
+            self.assertFalse(weight.flags.owndata)
+
+    def test_labels_must_match_app_emotions_and_classifier(self):
+        import json
+        from django.core.exceptions import ImproperlyConfigured
+        from .emotion_model import TextEmotionEngine
+
+        with tempfile.TemporaryDirectory() as directory:
+            self._write_safetensors(os.path.join(directory, 'model.safetensors'))
+            cases = [
+                ([], 'TEXT_EMOTION_LABELS'),
+                (['label_0', 'label_1'], 'label_0, label_1 are not app emotions'),
+                (['happy', 'sad', 'calm'], 'not app emotions'),
+                (['happy', 'sad', 'angry'], 'has 2 outputs but 3 labels'),
+            ]
+            for labels, message in cases:
+                engine = TextEmotionEngine(directory)
+                with self.settings(TEXT_EMOTION_LABELS=labels):
+                    self.assertFalse(engine.load())
+                    with self.assertRaisesMessage(ImproperlyConfigured, message):
+                        engine.load(strict=True)
+                self.assertEqual(engine.stats()['status'], 'misconfigured')
+                self.assertIn(message, engine.stats()['error'])
+
+            with open(os.path.join(directory, 'labels.json'), 'w') as f:
+                json.dump(['Happy', 'bored'], f)
+            from .emotion_model import check_labels, read_labels, MappedSafetensors
+            with self.settings(TEXT_EMOTION_LABELS=[]):
+                labels = read_labels(directory)
+            check_labels(labels, MappedSafetensors(os.path.join(directory, 'model.safetensors')))
+            self.assertEqual(labels, ['happy', 'bored'])
+
+    @patch('api.views.save_mood_history')
+    @patch('api.views.get_music_recommendation', return_value=[])
+    def test_unlabeled_model_answers_the_fallback_emotion(self, mock_music, mock_save):
+        from .emotion_model import TextEmotionEngine
+
+        with tempfile.TemporaryDirectory() as directory, \
+                patch('api.emotion_model._engine', TextEmotionEngine(directory)), \
+                self.settings(TEXT_EMOTION_FALLBACK='bored', TEXT_EMOTION_LABELS=[]):
+            # What download_models.py leaves behind: weights without labels
+            self._write_safetensors(os.path.join(directory, 'model.safetensors'))
+            response = self.client.post(reverse('text_emotion'), {'text': 'The weather report for tomorrow'},
+                                        format='json')
+            stats = self.client.get(reverse('text_emotion_stats')).data
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['emotion'], 'bored')
+        self.assertEqual(stats['status'], 'misconfigured')
+        self.assertIn('TEXT_EMOTION_LABELS', stats['error'])
+
+    def test_missing_model_falls_back_and_reports_stats(self):
+        from .emotion_model import TextEmotionEngine
+
+        with tempfile.TemporaryDirectory() as directory, \
+                patch('api.emotion_model._engine', TextEmotionEngine(directory)), \
+                self.settings(TEXT_EMOTION_FALLBACK='calm'):
+            from .views import infer_text_emotion
+            emotion = infer_text_emotion('The weather report for tomorrow')
+            stats = self.client.get(reverse('text_emotion_stats')).data
+
+        self.assertEqual(emotion, 'calm')
+        self.assertEqual(stats['status'], 'unavailable')
+        self.assertIn('model.safetensors', stats['error'])
+
+
+class TextEmotionCacheTestCase(APITestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    def test_normalized_variants_share_an_entry(self):
+        from . import emotion_cache
+
+        self.assertEqual(emotion_cache.normalize_text('  I feel SAD!!  today... '), 'i feel sad today')
+        self.assertEqual(emotion_cache.make_cache_key('I feel sad.'), emotion_cache.make_cache_key('i  feel sad'))
+        self.assertNotEqual(emotion_cache.make_cache_key('i feel sad'), emotion_cache.make_cache_key('i feel bad'))
+
+    def test_keys_change_with_the_model(self):
+        import time
+        from . import emotion_cache
+        from .emotion_model import model_identity
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'model.safetensors')
+            with open(path, 'wb') as f:
+                f.write(b'weights')
+            first = model_identity(path, ['happy', 'sad'])
+            relabelled = model_identity(path, ['sad', 'happy'])
+            os.utime(path, ns=(time.time_ns(), time.time_ns() + 10 ** 9))
+            redeployed = model_identity(path, ['happy', 'sad'])
+
+        self.assertEqual(len({first, relabelled, redeployed}), 3)
+        self.assertNotEqual(emotion_cache.make_cache_key('i feel sad', first),
+                            emotion_cache.make_cache_key('i feel sad', redeployed))
+
+    def test_lru_evicts_least_recently_used(self):
+        from .emotion_cache import LruCache
+
+        lru = LruCache(2)
+        lru.set('a', 'happy')
+        lru.set('b', 'sad')
+        lru.get('a')
+        lru.set('c', 'calm')
+
+        self.assertEqual(lru.get('a'), 'happy')
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(len(lru), 2)
+
+    def test_repeated_phrases_skip_inference(self):
+        from . import emotion_cache
+
+        calls = []
+
+        def classify(text):
+            calls.append(text)
+            return 'sad'
+
+        stats = dict.fromkeys(emotion_cache.STAT_NAMES, 0)
+        with patch.object(emotion_cache, '_local', emotion_cache.LruCache(10)), \
+                patch.object(emotion_cache, '_stats', stats), self.settings(TEXT_EMOTION_CACHE_SHARED=True):
+            first = emotion_cache.get_or_infer('I feel sad', classify)
+            second = emotion_cache.get_or_infer('i feel sad!', classify)
+            emotion_cache.get_local_cache().clear()
+            third = emotion_cache.get_or_infer('I FEEL SAD', classify)
+            result = emotion_cache.get_stats()
+
+        self.assertEqual([first, second, third], ['sad', 'sad', 'sad'])
+        self.assertEqual(calls, ['I feel sad'])
+        self.assertEqual((result['miss'], result['local_hit'], result['shared_hit']), (1, 1, 1))
+        self.assertEqual(result['hit_ratio'], 0.667)
+
+    def test_failed_inference_is_not_cached(self):
+        from . import emotion_cache
+
+        def fail(text):
+            raise RuntimeError('model failed')
+
+        with patch.object(emotion_cache, '_local', emotion_cache.LruCache(10)):
+            with self.assertRaises(RuntimeError):
+                emotion_cache.get_or_infer('i feel sad', fail)
+            self.assertEqual(emotion_cache.get_or_infer('i feel sad', lambda text: 'calm'), 'calm')
+
+
+class EmotionLexiconTestCase(APITestCase):
+    def test_lexicon_covers_every_emotion(self):
+        from .emotion_lexicon import LEXICON
+        from .views import EMOTIONS
+
+        self.assertEqual(set(LEXICON), set(EMOTIONS))
+
+    def test_confident_matches_skip_the_model(self):
+        from . import emotion_model
+
+        with patch('api.emotion_model.get_engine') as mock_engine:
+            self.assertEqual(emotion_model.infer("I'm SO happy today!"), 'happy')
+            self.assertEqual(emotion_model.infer("can't wait for the weekend"), 'excited')
+        mock_engine.assert_not_called()
+
+    def test_ambiguous_texts_are_deferred(self):
+        from .emotion_lexicon import match, score
+
+        self.assertIsNone(match("I'm not happy with how it went"))
+        self.assertIsNone(match('tears of joy'))
+        self.assertIsNone(match('the meeting moved to three'))
+        with self.settings(TEXT_EMOTION_LEXICON_MAX_WORDS=3):
+            self.assertIsNone(match('i feel so sad this evening'))
+        best, confidence, negated = score('so sad and lonely and sad')
+        self.assertEqual((best, negated), ('sad', False))
+        self.assertLess(confidence, 0.9)
+
+    def test_evaluate_command_reports_coverage(self):
+        from io import StringIO
+        from django.core.management import call_command
+
+        out = StringIO()
+        with tempfile.TemporaryDirectory() as directory:
+            samples = os.path.join(directory, 'samples.csv')
+            with open(samples, 'w') as f:
+                f.write('text,emotion\nso happy today,happy\nI feel lonely,lonely\nthe meeting moved,neutral\n')
+            with self.settings(TEXT_EMOTION_MODEL_DIR=directory), \
+                    patch('api.emotion_model._engine', None):
+                call_command('evaluate_text_emotion', '--samples', samples, '--thresholds', '0.5', stdout=out)
+
+        self.assertIn('3 samples', out.getvalue())
+        self.assertIn('lexicon answers 2/3 (66.7%), accuracy 100.0%', out.getvalue())
+
+
+class FacialImageDecodingTestCase(APITestCase):
+    def _jpeg(self, size=(640, 480)):
+        from io import BytesIO
+        from PIL import Image
+
+        buffer = BytesIO()
+        Image.new('RGB', size, (200, 120, 80)).save(buffer, format='JPEG')
+        return buffer.getvalue()
+
+    def test_buffers_are_decoded_in_memory(self):
+        from .views import InvalidImageError, infer_facial_emotion, load_face_image
+
+        image = self._jpeg()
+        with self.settings(FACIAL_EMOTION_IMAGE_SIZE=100):
+            face = load_face_image(memoryview(image))
+
+        self.assertLessEqual(max(face.size), 100)
+        self.assertEqual(face.mode, 'RGB')
+        self.assertEqual(infer_facial_emotion(image), 'happy')
+        self.assertEqual(infer_facial_emotion(bytearray(image)), 'happy')
+        with self.assertRaises(InvalidImageError):
+            infer_facial_emotion(b'not an image')
+
+    @patch('api.views.save_mood_history')
+    @patch('api.views.get_music_recommendation', return_value=[])
+    def test_uploads_only_spool_to_disk_when_oversized(self, mock_recommendation, mock_save):
+        from django.contrib.auth.models import User
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        self.client.force_authenticate(User.objects.create_user('face', password='secret'))
+        image = self._jpeg()
+        sources = []
+
+        def infer(source):
+            sources.append(bytes(source) if isinstance(source, memoryview) else source)
+            sources_types.append(type(source))
+            return 'happy'
+
+        sources_types = []
+
+        with patch('api.views.infer_facial_emotion', side_effect=infer):
+            small = self.client.post(reverse('facial_emotion'),
+                                     {'file': SimpleUploadedFile('face.jpg', image)}, format='multipart')
+            with self.settings(FILE_UPLOAD_MAX_MEMORY_SIZE=len(image) // 2):
+                large = self.client.post(reverse('facial_emotion'),
+                                         {'file': SimpleUploadedFile('face.jpg', image)}, format='multipart')
+
+        self.assertEqual((small.status_code, large.status_code), (200, 200))
+        self.assertEqual(sources[0], image)
+        self.assertEqual(sources_types[0], memoryview)
+        self.assertIsInstance(sources[1], str)
+
+        invalid = self.client.post(reverse('facial_emotion'),
+                                   {'file': SimpleUploadedFile('face.jpg', b'not an image')}, format='multipart')
+        self.assertEqual(invalid.status_code, 400)
+
+
+class MicroBatcherTestCase(APITestCase):
+    def test_concurrent_calls_share_a_batch(self):
+        import threading
+        from .micro_batcher import MicroBatcher
+
+        batches = []
+
+        def classify(texts):
+            batches.append(list(texts))
+            return [text.upper() for text in texts]
+
+        batcher = MicroBatcher(classify, max_batch_size=8, max_wait=0.2)
+        results = {}
+        threads = [threading.Thread(target=lambda text=text: results.update({text: batcher(text, timeout=5)}))
+                   for text in ('a', 'b', 'c', 'd')]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(results, {'a': 'A', 'b': 'B', 'c': 'C', 'd': 'D'})
+        self.assertEqual(len(batches), 1)
+        self.assertEqual(batcher.stats()['items'], 4)
+
+    def test_batches_are_bucketed_by_size(self):
+        from .micro_batcher import MicroBatcher
+
+        batcher = MicroBatcher(lambda texts: texts, max_size_ratio=2.0)
+        batch = [(text, None) for text in ('x' * 40, 'xx', 'x' * 30, 'xxx', 'x' * 5)]
+        sizes = [[len(text) for text, _ in bucket] for bucket in batcher.buckets(batch)]
+
+        self.assertEqual(sizes, [[2, 3], [5], [30, 40]])
+
+    def test_timed_out_items_are_not_computed(self):
+        import threading
+        from concurrent.futures import TimeoutError
+        from .micro_batcher import MicroBatcher
+
+        release = threading.Event()
+        seen = []
+
+        def classify(texts):
+            seen.extend(texts)
+            release.wait(5)
+            return texts
+
+        batcher = MicroBatcher(classify, max_batch_size=1, max_wait=0)
+        first = batcher.submit('first')
+        with self.assertRaises(TimeoutError):
+            batcher('late', timeout=0.05)
+        release.set()
+        self.assertEqual(first.result(5), 'first')
+        self.assertEqual(batcher('next', timeout=5), 'next')
+
+        self.assertEqual(seen, ['first', 'next'])
+
+    def test_errors_reach_every_caller(self):
+        from .micro_batcher import MicroBatcher
+
+        def fail(texts):
+            raise RuntimeError('model failed')
+
+        batcher = MicroBatcher(fail, max_wait=0)
+        with self.assertRaisesMessage(RuntimeError, 'model failed'):
+            batcher('text', timeout=5)
+        short = MicroBatcher(lambda texts: [], max_wait=0)
+        with self.assertRaises(ValueError):
+            short('text', timeout=5)
+
+
+class AsyncRecommendationViewsTestCase(APITestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+
+    @patch('api.async_views.save_mood_history')
+    @patch('api.async_views.aget_music_recommendation')
+    @patch('api.async_views.infer_uploaded_facial_emotion', return_value='happy')
+    def test_async_facial_emotion_requires_authentication(self, mock_infer, mock_music, mock_save):
+        from django.contrib.auth.models import User
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from rest_framework.authtoken.models import Token
+
+        async def no_tracks(emotion):
+            return []
+
+        mock_music.side_effect = no_tracks
+        url = reverse('async_facial_emotion')
+        anonymous = self.client.post(url, {'file': SimpleUploadedFile('face.jpg', b'image')}, format='multipart')
+        invalid = self.client.post(url, {'file': SimpleUploadedFile('face.jpg', b'image')}, format='multipart',
+                                   HTTP_AUTHORIZATION='Token invalid')
+        token = Token.objects.create(user=User.objects.create_user('async-face', password='secret'))
+        allowed = self.client.post(url, {'file': SimpleUploadedFile('face.jpg', b'image')}, format='multipart',
+                                   HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        self.assertEqual(anonymous.status_code, 401)
+        self.assertEqual(anonymous['WWW-Authenticate'], 'Token')
+        self.assertEqual(invalid.status_code, 401)
+        self.assertEqual(allowed.status_code, 200)
+        self.assertEqual(mock_infer.call_count, 1)
+
+    async def test_async_recommendations_fetch_categories_concurrently(self):
+        import asyncio
+        import time
+        from . import async_views
+
+        async def slow(emotion):
+            await asyncio.sleep(0.2)
+            return [{'title': emotion, 'description': 'long'}]
+
+        fetchers = {'music': slow, 'movies': slow, 'webseries': slow, 'stories': slow}
+        with patch.dict(async_views.ASYNC_CATEGORY_FETCHERS, fetchers):
+            start = time.monotonic()
+            response = await self.async_client.post(reverse('async_recommendations'),
+                                                    {'emotion': 'happy', 'fields': ['title']},
+                                                    content_type='application/json')
+            elapsed = time.monotonic() - start
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['recommendations']['stories'], [{'title': 'happy'}])
+        self.assertEqual(set(data['category_status'].values()), {'ok'})
+        self.assertLess(elapsed, 0.6)
+
+    async def test_async_recommendations_return_next_cursors(self):
+        from . import async_views
+
+        async def many(emotion):
+            return [{'title': f'{emotion} {i}'} for i in range(5)]
+
+        fetchers = {'music': many, 'movies': many, 'webseries': many, 'stories': many}
+        with patch.dict(async_views.ASYNC_CATEGORY_FETCHERS, fetchers):
+            response = await self.async_client.post(reverse('async_recommendations'),
+                                                    {'emotion': 'happy', 'categories': ['stories'], 'page_size': 2},
+                                                    content_type='application/json')
+            data = response.json()
+            page = await self.async_client.get(reverse('recommendations_page'),
+                                               {'cursor': data['next_cursors']['stories'], 'page_size': 2})
+
+        self.assertEqual([item['title'] for item in data['recommendations']['stories']], ['happy 0', 'happy 1'])
+        self.assertEqual([item['title'] for item in page.json()['items']], ['happy 2', 'happy 3'])
+
+    async def test_late_async_fetches_are_cancelled(self):
+        import asyncio
+        from .fanout import afetch_categories
+
+        cancelled = []
+
+        async def fast(emotion):
+            return [emotion]
+
+        async def slow(emotion):
+            try:
+                await asyncio.sleep(5)
+            except asyncio.CancelledError:
+                cancelled.append(emotion)
+                raise
+
+        results = [(category, fetch_status) async for category, _, fetch_status, _ in afetch_categories(
+            'late', {'music': fast, 'movies': slow}, timeouts={'movies': 0.05})]
+
+        self.assertEqual(results, [('music', 'ok'), ('movies', 'timed_out')])
+        self.assertEqual(cancelled, ['late'])
+        self.assertEqual([task for task in asyncio.all_tasks() if task is not asyncio.current_task()], [])
+
+    @patch('api.async_views.paginate_categories', side_effect=RuntimeError('cache down'))
+    async def test_async_recommendations_answer_json_errors(self, mock_paginate):
+        from . import async_views
+
+        async def many(emotion):
+            return [{'title': emotion}]
+
+        with patch.dict(async_views.ASYNC_CATEGORY_FETCHERS, {'stories': many}):
+            response = await self.async_client.post(reverse('async_recommendations'),
+                                                    {'emotion': 'happy', 'categories': ['stories']},
+                                                    content_type='application/json')
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(response.json(), {'error': 'cache down'})
+
+    async def test_async_client_uses_cache_and_breaker(self):
+        import httpx
+        from . import async_http_client
+        from .response_cache import async_cached_get
+
+        calls = []
+
+        def handler(request):
+            calls.append(str(request.url))
+            return httpx.Response(200, json={'items': [{'volumeInfo': {'title': 'Book'}}]})
+
+        with patch.object(async_http_client, '_build_client',
+                          lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler))):
+            first = await async_cached_get('https://www.googleapis.com/books/v1/volumes', params={'q': 'calm'})
+            second = await async_cached_get('https://www.googleapis.com/books/v1/volumes', params={'q': 'calm'})
+
+        self.assertEqual(first.json(), second.json())
+        self.assertEqual(len(calls), 1)
+
+    def test_async_endpoint_rejects_get(self):
+        response = self.client.get(reverse('async_recommendations'))
+
+        self.assertEqual(response.status_code, 405)
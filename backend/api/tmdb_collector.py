@@ -0,0 +1,153 @@
+"""
+Streaming collector shared by the movie and web series recommendations.
+
+Result pages are pulled lazily from an iterator (e.g. a fetch_concurrently
+generator) and titles are de-duplicated on their TMDB id and title with hash
+sets. Pulling stops as soon as the target is met, which closes the page iterator
+and cancels page fetches that are still pending. Collected titles are kept as
+compact tuples and only turned into recommendation dicts for the final list,
+which is ordered by the ranking module.
+"""
+from collections import namedtuple
+from urllib.parse import quote_plus
+
+from .media_catalog import TMDB_FIELDS
+from .ranking import parse_year, rank
+
+TmdbTitle = namedtuple("TmdbTitle", ["kind", "tmdb_id", "title", "year", "overview", "poster_path", "rating",
+                                     "popularity", "vote_count", "genre_ids"])
+
+
+def iter_titles(kind, results):
+    """
+    Yield a TmdbTitle for every TMDB result that has an id and a poster.
+
+    :param kind: "movie" or "tv".
+    :param results: The "results" list of a TMDB response.
+    """
+    title_field, date_field = TMDB_FIELDS[kind]
+    for item in results:
+        tmdb_id = item.get("id")
+        poster_path = item.get("poster_path")
+        if not tmdb_id or not poster_path:
+            continue
+        yield TmdbTitle(kind, tmdb_id, item.get(title_field, ""), (item.get(date_field) or "")[:4],
+                        item.get("overview", ""), poster_path, item.get("vote_average", 0),
+                        item.get("popularity", 0), item.get("vote_count", 0), tuple(item.get("genre_ids") or ()))
+
+
+def to_recommendation(record):
+    """
+    Turn a collected title into the dict returned by the API; fallback dicts are returned as they are.
+    """
+    if isinstance(record, dict):
+        return record
+    return {
+        "title": record.title,
+        "year": record.year,
+        "description": record.overview,
+        "poster_url": f"https://image.tmdb.org/t/p/w500{record.poster_path}",
+        "external_url": f"https://www.themoviedb.org/{record.kind}/{record.tmdb_id}",
+        "youtube_trailer_url": f"https://www.youtube.com/results?search_query={quote_plus(f'{record.title} {record.year} trailer')}",
+        "genre_ids": list(record.genre_ids),
+        "rating": record.rating,
+    }
+
+
+def _title_features(record):
+    if isinstance(record, dict):
+        return record.get("rating") or 0, 0, 0, parse_year(record.get("year")), ()
+    return record.rating or 0, record.popularity or 0, record.vote_count or 0, parse_year(record.year), record.genre_ids
+
+
+def finalize_tmdb_results(collected, target):
+    """
+    Rank collected titles, keep the best `target` diversified over genres and drop the rating field.
+
+    :param collected: TmdbTitle records and/or recommendation dicts (e.g. fallback titles).
+    :param target: Maximum number of titles to return.
+    :return: List of recommendation dicts in ranked order.
+    """
+    if not collected:
+        return []
+    rating, popularity, votes, year, genres = zip(*map(_title_features, collected))
+    order = rank(target, rating, popularity, votes, year, genres)
+
+    items = [to_recommendation(collected[index]) for index in order]
+    # Cleanup
+    for item in items:
+        item.pop("rating", None)
+    return items
+
+
+class TmdbCollector:
+    """
+    Collects up to `target` unique titles of one kind ("movie" or "tv").
+    """
+
+    def __init__(self, kind, target):
+        self.kind = kind
+        self.target = target
+        self.records = []
+        self.ids = set()
+        self.titles = set()
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def done(self):
+        return len(self.records) >= self.target
+
+    def add_results(self, results):
+        """
+        Add the usable titles of one TMDB results page until the target is met.
+
+        :return: The number of titles added.
+        """
+        added = 0
+        for record in iter_titles(self.kind, results):
+            if self.done:
+                break
+            if record.tmdb_id in self.ids or record.title in self.titles:
+                continue
+            self.ids.add(record.tmdb_id)
+            self.titles.add(record.title)
+            self.records.append(record)
+            added += 1
+        return added
+
+    def consume(self, pages):
+        """
+        Pull result pages from an iterator until the target is met, then close the iterator.
+
+        :param pages: Iterable of TMDB "results" lists; generators are closed once no more pages are needed.
+        """
+        try:
+            for results in pages:
+                self.add_results(results)
+                if self.done:
+                    break
+        finally:
+            close = getattr(pages, "close", None)
+            if close is not None:
+                close()
+        return self
+
+    def add_defaults(self, items):
+        """
+        Add fallback recommendation dicts whose title was not collected yet.
+        """
+        for item in items:
+            if self.done:
+                break
+            if item["title"] in self.titles:
+                continue
+            self.titles.add(item["title"])
+            self.records.append(item)
+
+    def finalize(self):
+        """
+        Return the collected titles as ranked recommendation dicts.
+        """
+        return finalize_tmdb_results(self.records, self.target)
@@ -1,10 +1,26 @@
 from django.urls import path
-from .views import text_emotion, facial_emotion, music_recommendation, recommendations, test_tmdb_api
+from . import async_views
+from .views import (
+    text_emotion, facial_emotion, music_recommendation, recommendations, recommendations_batch, recommendations_page,
+    recommendations_stream, test_tmdb_api, provider_cache_stats, provider_health, text_emotion_stats,
+)
 
 urlpatterns = [
     path('text_emotion/', text_emotion, name='text_emotion'),
     path('facial_emotion/', facial_emotion, name='facial_emotion'),
     path('music_recommendation/', music_recommendation, name='music_recommendation'),
     path('recommendations/', recommendations, name='recommendations'),
+    path('recommendations/batch/', recommendations_batch, name='recommendations_batch'),
+    path('recommendations/page/', recommendations_page, name='recommendations_page'),
+    path('recommendations/stream/', recommendations_stream, name='recommendations_stream'),
     path('test_tmdb_api/', test_tmdb_api, name='test_tmdb_api'),
+    path('provider_cache_stats/', provider_cache_stats, name='provider_cache_stats'),
+    path('provider_health/', provider_health, name='provider_health'),
+    path('text_emotion_stats/', text_emotion_stats, name='text_emotion_stats'),
+
+    # Native async versions, served concurrently when running under ASGI
+    path('async/text_emotion/', async_views.text_emotion, name='async_text_emotion'),
+    path('async/facial_emotion/', async_views.facial_emotion, name='async_facial_emotion'),
+    path('async/music_recommendation/', async_views.music_recommendation, name='async_music_recommendation'),
+    path('async/recommendations/', async_views.recommendations, name='async_recommendations'),
 ]
@@ -1,4 +1,6 @@
+import io
 import subprocess
+from functools import partial
 
 from rest_framework import status
 from rest_framework.decorators import api_view, permission_classes
@@ -7,63 +9,212 @@ from rest_framework.response import Response
 from django.contrib.auth.models import User
 from .models import UserProfile
 from .serializers import UserSerializer, UserProfileSerializer
+from . import emotion_cache, emotion_lexicon, emotion_model, http_client, personalization, ranking
+from .circuit_breaker import ProviderUnavailable, get_circuit_breaker, is_provider_available
+from .fallback_catalogs import DEFAULT_MOVIES, DEFAULT_WEBSERIES
+from .fanout import fetch_concurrently
+from .media_catalog import lookup_titles
+from .response_cache import cached_get, get_cached_response
+from .spotify_auth import get_spotify_token, spotify_token_manager
+from .tmdb_collector import TmdbCollector, finalize_tmdb_results
 
-# Mock implementations for AI/ML functions
 def infer_text_emotion(text):
-    return "happy"
+    """Infer the emotion of a text with the text emotion model, see emotion_model."""
+    return emotion_model.infer(text)
+
+class InvalidImageError(ValueError):
+    """
+    Raised when an uploaded facial image cannot be decoded.
+    """
+
+
+class BufferReader(io.RawIOBase):
+    """
+    Read-only, seekable file over a bytes-like object that does not copy it, unlike io.BytesIO(memoryview).
+    """
+
+    def __init__(self, buffer):
+        super().__init__()
+        self._view = memoryview(buffer).cast("B")
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, target):
+        count = max(min(len(target), len(self._view) - self._position), 0)
+        target[:count] = self._view[self._position:self._position + count]
+        self._position += count
+        return count
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._position, io.SEEK_END: len(self._view)}[whence]
+        self._position = max(base + offset, 0)
+        return self._position
+
+    def tell(self):
+        return self._position
+
+    def close(self):
+        self._view.release()
+        super().close()
+
+
+def load_face_image(image):
+    """
+    Decode a facial image for emotion inference.
+
+    JPEGs are decoded at a reduced scale close to FACIAL_EMOTION_IMAGE_SIZE, which is much faster than decoding
+    the full-resolution photo and scaling it down afterwards.
+
+    :param image: The encoded image as bytes, bytearray or memoryview, or the path of an image file.
+    :return: An RGB PIL image no larger than FACIAL_EMOTION_IMAGE_SIZE on either side.
+    """
+    size = getattr(settings, 'FACIAL_EMOTION_IMAGE_SIZE', 224)
+    if isinstance(image, (bytes, bytearray, memoryview)):
+        with BufferReader(image) as source:
+            return _decode_face(source, size)
+    return _decode_face(image, size)
+
+
+def _decode_face(source, size):
+    with Image.open(source) as decoded:
+        decoded.draft("RGB", (size, size))
+        face = decoded.convert("RGB")
+    face.thumbnail((size, size))
+    return face
+
+# Mock implementation for AI/ML functions
+def infer_facial_emotion(image):
+    """
+    Infer the emotion of a facial image.
 
-def infer_facial_emotion(image_path):
+    :param image: The encoded image as bytes, bytearray or memoryview, or the path of an image file.
+    :return: The inferred emotion.
+    :raises InvalidImageError: If the image cannot be decoded.
+    """
+    try:
+        load_face_image(image)
+    except (UnidentifiedImageError, OSError, Image.DecompressionBombError) as e:
+        print(f"[WARNING] Could not decode facial image: {str(e)}")
+        raise InvalidImageError("The uploaded file is not a valid image.") from e
     return "happy"
 
+# Map user mood to Spotify seed genres
+EMOTION_TO_SPOTIFY_GENRE = {
+    "happy": "happy",
+    "sad": "sad",
+    "angry": "heavy-metal",
+    "relaxed": "ambient",
+    "energetic": "dance",
+    "nostalgic": "classical",
+    "anxious": "ambient",
+    "hopeful": "pop",
+    "proud": "hip-hop",
+    "lonely": "sad",
+    "neutral": "pop",
+    "amused": "party",
+    "frustrated": "metal",
+    "romantic": "romance",
+    "surprised": "electronic",
+    "confused": "alternative",
+    "excited": "party",
+    "shy": "acoustic",
+    "bored": "pop",
+    "playful": "pop"
+}
+
+# The closed emotion vocabulary; the movie and TV genre maps use the same keys
+EMOTIONS = tuple(EMOTION_TO_SPOTIFY_GENRE)
+
+SPOTIFY_RECOMMENDATIONS_URL = "https://api.spotify.com/v1/recommendations"
+SPOTIFY_SEARCH_URL = "https://api.spotify.com/v1/search"
+
+
+def spotify_recommendation_params(seed_genres):
+    """Build the Spotify genre recommendation query."""
+    return {"seed_genres": seed_genres, "limit": 50}
+
+
+def spotify_search_params(emotion):
+    """Build the Spotify track search query for an emotion."""
+    return {"q": emotion, "type": "track", "limit": 50}
+
+
+def get_cached_spotify_tracks(emotion):
+    """
+    Return the Spotify tracks of an emotion that are still in the response cache, fresh or stale,
+    without calling Spotify. Used while Spotify's circuit breaker is open.
+    """
+    seed_genres = EMOTION_TO_SPOTIFY_GENRE.get(emotion.lower())
+    if seed_genres:
+        rec_resp = get_cached_response(SPOTIFY_RECOMMENDATIONS_URL, params=spotify_recommendation_params(seed_genres))
+        tracks = rec_resp.json().get("tracks", []) if rec_resp is not None else []
+        if tracks:
+            return tracks
+    search_resp = get_cached_response(SPOTIFY_SEARCH_URL, params=spotify_search_params(emotion))
+    return search_resp.json().get("tracks", {}).get("items", []) if search_resp is not None else []
+
+
+def spotify_cached_get(url, params):
+    """
+    GET a Spotify API URL through the response cache with the process-wide access token.
+
+    A 401 means the token was revoked early: it is dropped and the request is retried once with a fresh one.
+    """
+    response = cached_get(url, headers={"Authorization": f"Bearer {get_spotify_token()}"}, params=params)
+    if response.status_code == 401:
+        spotify_token_manager.invalidate()
+        response = cached_get(url, headers={"Authorization": f"Bearer {get_spotify_token()}"}, params=params)
+    return response
+
+
 def get_music_recommendation(emotion):
-    # Map user mood to Spotify seed genres
-    emotion_to_genre = {
-        "happy": "happy",
-        "sad": "sad",
-        "angry": "heavy-metal",
-        "relaxed": "ambient",
-        "energetic": "dance",
-        "nostalgic": "classical",
-        "anxious": "ambient",
-        "hopeful": "pop",
-        "proud": "hip-hop",
-        "lonely": "sad",
-        "neutral": "pop",
-        "amused": "party",
-        "frustrated": "metal",
-        "romantic": "romance",
-        "surprised": "electronic",
-        "confused": "alternative",
-        "excited": "party",
-        "shy": "acoustic",
-        "bored": "pop",
-        "playful": "pop"
-    }
-    seed_genres = emotion_to_genre.get(emotion.lower())
-
-    SPOTIFY_CLIENT_ID = os.getenv("SPOTIFY_CLIENT_ID")
-    SPOTIFY_CLIENT_SECRET = os.getenv("SPOTIFY_CLIENT_SECRET")
-    auth = requests.post(
-        "https://accounts.spotify.com/api/token",
-        data={"grant_type": "client_credentials"},
-        auth=(SPOTIFY_CLIENT_ID, SPOTIFY_CLIENT_SECRET)
-    )
-    token = auth.json().get("access_token")
-    headers = {"Authorization": f"Bearer {token}"}
+    if is_provider_available("spotify"):
+        try:
+            return format_spotify_tracks(fetch_spotify_tracks(emotion))
+        except ProviderUnavailable:
+            # e.g. the breaker is half-open and its probe calls are taken
+            pass
+    tracks = get_cached_spotify_tracks(emotion)
+    print(f"[WARNING] Spotify is unavailable, serving {len(tracks)} cached music recommendations")
+    return format_spotify_tracks(tracks)
+
+
+def fetch_spotify_tracks(emotion):
+    """
+    Fetch Spotify tracks for an emotion: genre recommendations, or a track search if there are none.
+
+    :raises ProviderUnavailable: If Spotify's circuit breaker or rate limit rejects a call.
+    """
+    seed_genres = EMOTION_TO_SPOTIFY_GENRE.get(emotion.lower())
+
     tracks = []
     # Try genre-based recommendations
     if seed_genres:
-        rec_params = {"seed_genres": seed_genres, "limit": 50}
-        rec_resp = requests.get("https://api.spotify.com/v1/recommendations", headers=headers, params=rec_params)
+        rec_resp = spotify_cached_get(SPOTIFY_RECOMMENDATIONS_URL, params=spotify_recommendation_params(seed_genres))
         if rec_resp.status_code == 200:
             tracks = rec_resp.json().get("tracks", [])
     # Fallback to search if no genre recommendations
     if not tracks:
-        search_params = {"q": emotion, "type": "track", "limit": 50}
-        search_resp = requests.get("https://api.spotify.com/v1/search", headers=headers, params=search_params)
+        search_resp = spotify_cached_get(SPOTIFY_SEARCH_URL, params=spotify_search_params(emotion))
         tracks = search_resp.json().get("tracks", {}).get("items", [])
-    # Sort tracks by Spotify popularity descending
-    tracks = sorted(tracks, key=lambda t: t.get("popularity", 0), reverse=True)
+    return tracks
+
+
+def format_spotify_tracks(tracks):
+    """Turn Spotify track objects into ranked music recommendations, diversified over artists."""
+    order = ranking.rank(
+        len(tracks),
+        rating=[0] * len(tracks),
+        popularity=[t.get("popularity", 0) for t in tracks],
+        year=[ranking.parse_year(t.get("album", {}).get("release_date")) for t in tracks],
+        groups=[[a.get("id") or a.get("name") for a in t.get("artists", [])] for t in tracks],
+    )
+    tracks = [tracks[index] for index in order]
 
     def detect_language(text):
         # Simple check for Devanagari script (Hindi)
@@ -88,6 +239,9 @@ def get_music_recommendation(emotion):
         for t in tracks
     ]
 
+# Number of most popular catalog titles sampled from when answering from the local media catalog
+MEDIA_CATALOG_CANDIDATES = 150
+
 def get_tmdb_api_key():
     """Get the TMDB API key from environment variables."""
     import os
@@ -98,1025 +252,379 @@ def get_tmdb_api_key():
         return None
     return api_key
 
-def get_movie_recommendation(emotion):
-    """Fetch up to 50 movies with valid posters based on emotion, sorted by rating."""
-    import os
-    import time
-    import random
-    from urllib.parse import quote_plus
-    
-    # Get the TMDB API key
-    api_key = get_tmdb_api_key()
-    if not api_key:
-        print("[ERROR] TMDB_API_KEY environment variable is missing!")
-        return generate_default_movies()
-    
-    print(f"[DEBUG] Using TMDB API for movies with emotion: {emotion}")
-    
-    # Map emotions to TMDB genre IDs with more focused genre selections
-    # TMDB Genre IDs: https://developers.themoviedb.org/3/genres/get-movie-list
-    # 28: Action, 12: Adventure, 16: Animation, 35: Comedy, 80: Crime, 99: Documentary, 18: Drama, 
-    # 10751: Family, 14: Fantasy, 36: History, 27: Horror, 10402: Music, 9648: Mystery, 10749: Romance, 
-    # 878: Science Fiction, 10770: TV Movie, 53: Thriller, 10752: War, 37: Western
-    emotion_to_genres = {
-        # Happy: Focus on uplifting and positive content
-        "happy": [35, 16, 10402],  # Comedy, Animation, Music
-
-        # Sad: Focus on emotional and moving content
-        "sad": [18, 10749, 10752],  # Drama, Romance, War
-
-        # Angry: Focus on intense and action-packed content
-        "angry": [28, 53, 27],  # Action, Thriller, Horror
-
-        # Relaxed: Focus on slow-paced and calming content
-        "relaxed": [99, 12, 10751],  # Documentary, Adventure, Family
-        
-        # Energetic: Focus on fast-paced and exciting content
-        "energetic": [28, 12, 10402],  # Action, Adventure, Music
-        
-        # Nostalgic: Focus on period pieces and historical content
-        "nostalgic": [36, 10751, 37],  # History, Family, Western
-        
-        # Anxious: Focus on suspenseful and tense content
-        "anxious": [27, 9648, 53],  # Horror, Mystery, Thriller
-        
-        # Hopeful: Focus on inspiring and uplifting content
-        "hopeful": [18, 12, 10751],  # Drama, Adventure, Family
-        
-        # Proud: Focus on triumph and achievement
-        "proud": [36, 10752, 12],  # History, War, Adventure
-        
-        # Lonely: Focus on introspective and relationship-focused content
-        "lonely": [18, 10749, 99],  # Drama, Romance, Documentary
-        
-        # Neutral: A balanced mix of genres
-        "neutral": [18, 12, 35],  # Drama, Adventure, Comedy
-        
-        # Amused: Focus on humor and light-hearted content
-        "amused": [35, 16, 10751],  # Comedy, Animation, Family
-        
-        # Frustrated: Focus on tense and conflicted content
-        "frustrated": [80, 18, 53],  # Crime, Drama, Thriller
-        
-        # Romantic: Focus on love stories and heartwarming content
-        "romantic": [10749, 35, 18],  # Romance, Comedy, Drama
-        
-        # Surprised: Focus on unexpected and twist-filled content
-        "surprised": [9648, 53, 878],  # Mystery, Thriller, Sci-Fi
-        
-        # Confused: Focus on mind-bending and complex content
-        "confused": [9648, 878, 53],  # Mystery, Sci-Fi, Thriller
-        
-        # Excited: Focus on thrilling and amazing content
-        "excited": [28, 12, 878],  # Action, Adventure, Sci-Fi
-        
-        # Shy: Focus on introspective and quiet content
-        "shy": [18, 10749, 10751],  # Drama, Romance, Family
-        
-        # Bored: Focus on action-packed and engaging content
-        "bored": [28, 12, 53],  # Action, Adventure, Thriller
-        
-        # Playful: Focus on fun and lighthearted content
-        "playful": [35, 16, 10751]  # Comedy, Animation, Family
+def tmdb_discover_params(api_key, genre, page):
+    """Build the TMDB discover query for one page of a genre, most popular first."""
+    return {
+        "api_key": api_key,
+        "language": "en-US",
+        "sort_by": "popularity.desc",
+        "include_adult": "false",
+        "with_genres": genre,
+        "page": page
     }
-    
-    # Default to a mix of popular genres if emotion not found
-    genre_ids = emotion_to_genres.get(emotion.lower(), [35, 18, 28])
-    
-    # Choose a random genre from the list for this emotion to add variety
-    primary_genre = random.choice(genre_ids)
-    
-    target = 50
-    collected = []
-    
-    try:
-        # Use discover endpoint to find movies by genre
-        discover_url = "https://api.themoviedb.org/3/discover/movie"
-        print(f"[DEBUG] Making request to TMDB API discover with genre: {primary_genre}")
-        
-        # Request page 1
-        resp = requests.get(
-            discover_url,
-            params={
-                "api_key": api_key,
-                "language": "en-US",
-                "sort_by": "popularity.desc",
-                "include_adult": "false",
-                "with_genres": primary_genre,
-                "page": 1
-            }
-        )
-        
-        print(f"[DEBUG] TMDB API response status: {resp.status_code}")
-        
-        if resp.status_code == 200:
-            data = resp.json()
-            total_pages = min(data.get("total_pages", 1), 5)  # Limit to 5 pages max
-            results = data.get("results", [])
-            print(f"[DEBUG] TMDB API returned {len(results)} movies for genre {primary_genre}")
-            
-            # Process first page results
-            process_movie_results(results, collected, target)
-            
-            # If we need more results and there are more pages, get multiple random pages
-            if len(collected) < target and total_pages > 1:
-                # Request up to 3 additional pages to ensure we get enough results
-                pages_to_fetch = min(3, total_pages - 1)
-                pages = random.sample(range(2, total_pages + 1), pages_to_fetch) if total_pages > 2 else [2]
-                
-                for page_num in pages:
-                    # Add a small delay to avoid rate limiting
-                    time.sleep(0.5)
-                    
-                    print(f"[DEBUG] Requesting additional page {page_num} for genre {primary_genre}")
-                    resp = requests.get(
-                        discover_url,
-                        params={
-                            "api_key": api_key,
-                            "language": "en-US",
-                            "sort_by": "popularity.desc",
-                            "include_adult": "false",
-                            "with_genres": primary_genre,
-                            "page": page_num
-                        }
-                    )
-                    
-                    if resp.status_code == 200:
-                        results = resp.json().get("results", [])
-                        print(f"[DEBUG] TMDB API returned {len(results)} additional movies from page {page_num}")
-                        process_movie_results(results, collected, target)
-                        
-                        if len(collected) >= target:
-                            break
-        else:
-            print(f"[ERROR] TMDB API request failed: {resp.status_code} {resp.text}")
-        
-        # If not enough movies, try another genre from the emotion list
-        if len(collected) < target and len(genre_ids) > 1:
-            # Choose a different genre
-            secondary_genres = [g for g in genre_ids if g != primary_genre]
-            secondary_genre = random.choice(secondary_genres)
-            
-            print(f"[DEBUG] Not enough movies found ({len(collected)}), trying secondary genre: {secondary_genre}")
-            
-            # Add a small delay to avoid rate limiting
-            time.sleep(0.5)
-            
-            resp = requests.get(
-                discover_url,
-                params={
-                    "api_key": api_key,
-                    "language": "en-US",
-                    "sort_by": "popularity.desc",
-                    "include_adult": "false",
-                    "with_genres": secondary_genre,
-                    "page": 1
-                }
-            )
-            
-            if resp.status_code == 200:
-                results = resp.json().get("results", [])
-                print(f"[DEBUG] TMDB API returned {len(results)} movies for secondary genre {secondary_genre}")
-                process_movie_results(results, collected, target)
-            else:
-                print(f"[ERROR] TMDB API request failed: {resp.status_code} {resp.text}")
-        
-        # If still not enough movies, try popular movies as fallback
-        if len(collected) < target:
-            print(f"[DEBUG] Not enough movies found ({len(collected)}), trying popular movies")
-            
-            # Add a small delay to avoid rate limiting
-            time.sleep(0.5)
-            
-            popular_url = "https://api.themoviedb.org/3/movie/popular"
-            resp = requests.get(
-                popular_url,
-                params={"api_key": api_key, "language": "en-US", "page": 1}
-            )
-            
-            if resp.status_code == 200:
-                results = resp.json().get("results", [])
-                print(f"[DEBUG] TMDB API returned {len(results)} popular movies")
-                process_movie_results(results, collected, target)
-            else:
-                print(f"[ERROR] TMDB API request failed: {resp.status_code} {resp.text}")
-        
-        # If we still don't have enough movies, use the default ones
-        if len(collected) < 10:
-            print(f"[WARNING] Not enough movies found ({len(collected)}), adding default movies")
-            default_movies = generate_default_movies()
-            
-            # Add default movies that aren't already in the collection
-            for movie in default_movies:
-                if not any(m.get("title") == movie.get("title") for m in collected):
-                    collected.append(movie)
-                    if len(collected) >= target:
-                        break
-    
-    except Exception as e:
-        print(f"[ERROR] Exception in get_movie_recommendation: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        
-        # If we encounter an exception, use the default movies
-        collected = generate_default_movies()
-    
-    # Sort by rating desc and limit to target
-    movies = sorted(collected, key=lambda m: m.get("rating", 0), reverse=True)[:target]
-    
-    # Shuffle the results to add variety
-    random.shuffle(movies)
-    
-    # Cleanup
-    for m in movies:
-        m.pop("rating", None)
-    
+
+def fetch_tmdb_results(url, params, label):
+    """Fetch a single TMDB results page, returning an empty list if the request fails."""
+    resp = cached_get(url, params=params)
+    if resp.status_code != 200:
+        print(f"[ERROR] TMDB API request failed: {resp.status_code} {resp.text}")
+        return []
+    results = resp.json().get("results", [])
+    print(f"[DEBUG] TMDB API returned {len(results)} {label}")
+    return results
+
+# Map emotions to TMDB genre IDs with more focused genre selections
+# TMDB Genre IDs: https://developers.themoviedb.org/3/genres/get-movie-list
+# 28: Action, 12: Adventure, 16: Animation, 35: Comedy, 80: Crime, 99: Documentary, 18: Drama, 
+# 10751: Family, 14: Fantasy, 36: History, 27: Horror, 10402: Music, 9648: Mystery, 10749: Romance, 
+# 878: Science Fiction, 10770: TV Movie, 53: Thriller, 10752: War, 37: Western
+MOVIE_EMOTION_TO_GENRES = {
+    # Happy: Focus on uplifting and positive content
+    "happy": [35, 16, 10402],  # Comedy, Animation, Music
+
+    # Sad: Focus on emotional and moving content
+    "sad": [18, 10749, 10752],  # Drama, Romance, War
+
+    # Angry: Focus on intense and action-packed content
+    "angry": [28, 53, 27],  # Action, Thriller, Horror
+
+    # Relaxed: Focus on slow-paced and calming content
+    "relaxed": [99, 12, 10751],  # Documentary, Adventure, Family
+
+    # Energetic: Focus on fast-paced and exciting content
+    "energetic": [28, 12, 10402],  # Action, Adventure, Music
+
+    # Nostalgic: Focus on period pieces and historical content
+    "nostalgic": [36, 10751, 37],  # History, Family, Western
+
+    # Anxious: Focus on suspenseful and tense content
+    "anxious": [27, 9648, 53],  # Horror, Mystery, Thriller
+
+    # Hopeful: Focus on inspiring and uplifting content
+    "hopeful": [18, 12, 10751],  # Drama, Adventure, Family
+
+    # Proud: Focus on triumph and achievement
+    "proud": [36, 10752, 12],  # History, War, Adventure
+
+    # Lonely: Focus on introspective and relationship-focused content
+    "lonely": [18, 10749, 99],  # Drama, Romance, Documentary
+
+    # Neutral: A balanced mix of genres
+    "neutral": [18, 12, 35],  # Drama, Adventure, Comedy
+
+    # Amused: Focus on humor and light-hearted content
+    "amused": [35, 16, 10751],  # Comedy, Animation, Family
+
+    # Frustrated: Focus on tense and conflicted content
+    "frustrated": [80, 18, 53],  # Crime, Drama, Thriller
+
+    # Romantic: Focus on love stories and heartwarming content
+    "romantic": [10749, 35, 18],  # Romance, Comedy, Drama
+
+    # Surprised: Focus on unexpected and twist-filled content
+    "surprised": [9648, 53, 878],  # Mystery, Thriller, Sci-Fi
+
+    # Confused: Focus on mind-bending and complex content
+    "confused": [9648, 878, 53],  # Mystery, Sci-Fi, Thriller
+
+    # Excited: Focus on thrilling and amazing content
+    "excited": [28, 12, 878],  # Action, Adventure, Sci-Fi
+
+    # Shy: Focus on introspective and quiet content
+    "shy": [18, 10749, 10751],  # Drama, Romance, Family
+
+    # Bored: Focus on action-packed and engaging content
+    "bored": [28, 12, 53],  # Action, Adventure, Thriller
+
+    # Playful: Focus on fun and lighthearted content
+    "playful": [35, 16, 10751]  # Comedy, Animation, Family
+}
+
+def get_movie_recommendation(emotion):
+    """Fetch up to 50 movies with valid posters based on emotion, ranked by the ranking module."""
+    movies = get_tmdb_recommendation("movie", emotion)
     print(f"[DEBUG] Returning {len(movies)} movie recommendations")
     return movies
 
 
-def process_movie_results(results, collected, target):
-    """Process movie results from TMDB API and add them to the collected list."""
-    from urllib.parse import quote_plus
-    
-    for item in results:
-        if len(collected) >= target:
-            break
-            
-        movie_id = item.get("id")
-        if not movie_id:
-            continue
-        
-        # Skip if no poster
-        poster_path = item.get("poster_path")
-        if not poster_path:
-            continue
-        
-        # Extract basic info
-        title = item.get("title", "")
-        year = item.get("release_date", "")[:4] if item.get("release_date") else ""
-        plot = item.get("overview", "")
-        poster_url = f"https://image.tmdb.org/t/p/w500{poster_path}"
-        rating = item.get("vote_average", 0)
-        
-        # Skip if already in collected
-        if any(m.get("title") == title for m in collected):
-            continue
-        
-        # Add to collected movies
-        collected.append({
-            "title": title,
-            "year": year,
-            "description": plot,
-            "poster_url": poster_url,
-            "external_url": f"https://www.themoviedb.org/movie/{movie_id}",
-            "youtube_trailer_url": f"https://www.youtube.com/results?search_query={quote_plus(f'{title} {year} trailer')}",
-            "rating": rating
-        })
+def generate_default_movies(emotion=None):
+    """Return copies of the default popular movies used as fallback, the ones suiting the emotion first."""
+    return DEFAULT_MOVIES.copies(emotion)
 
+def generate_default_webseries(emotion=None):
+    """Return copies of the default popular web series used as fallback, the ones suiting the emotion first."""
+    return DEFAULT_WEBSERIES.copies(emotion)
+# Map emotions to TMDB TV genre IDs with more focused genre selections
+# TMDB TV Genre IDs: https://developers.themoviedb.org/3/genres/get-tv-list
+# 10759: Action & Adventure, 16: Animation, 35: Comedy, 80: Crime, 99: Documentary, 18: Drama, 
+# 10751: Family, 10762: Kids, 9648: Mystery, 10763: News, 10764: Reality, 10765: Sci-Fi & Fantasy, 
+# 10766: Soap, 10767: Talk, 10768: War & Politics, 37: Western
+TV_EMOTION_TO_GENRES = {
+    # Happy: Focus on uplifting and light-hearted content
+    "happy": [35, 16, 10762],  # Comedy, Animation, Kids
 
-def generate_default_movies():
-    """Generate a list of default popular movies to use as fallback, grouped by emotion."""
-    return [
-        # Uplifting and Happy Movies
-        {
-            "title": "The Pursuit of Happyness",
-            "year": "2006",
-            "description": "A struggling salesman takes custody of his son as he's poised to begin a life-changing professional career.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/lUqW75zJiHHYJQQQpJJCaNa8p1U.jpg",
-            "external_url": "https://www.themoviedb.org/movie/1402",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=The+Pursuit+of+Happyness+2006+trailer",
-            "rating": 8.0
-        },
-        {
-            "title": "La La Land",
-            "year": "2016",
-            "description": "While navigating their careers in Los Angeles, a pianist and an actress fall in love while attempting to reconcile their aspirations for the future.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/uDO8zWDhfWwoFdKS4fzkUJt0Rf0.jpg",
-            "external_url": "https://www.themoviedb.org/movie/313369",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=La+La+Land+2016+trailer",
-            "rating": 8.0
-        },
-        {
-            "title": "Forrest Gump",
-            "year": "1994",
-            "description": "The presidencies of Kennedy and Johnson, the events of Vietnam, Watergate, and other historical events unfold from the perspective of an Alabama man with an IQ of 75.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/h5J4W4veyxMXDMjeNxZI46TsHOb.jpg",
-            "external_url": "https://www.themoviedb.org/movie/13",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Forrest+Gump+1994+trailer",
-            "rating": 8.4
-        },
-        
-        # Emotional and Dramatic Movies
-        {
-            "title": "The Shawshank Redemption",
-            "year": "1994",
-            "description": "Two imprisoned men bond over a number of years, finding solace and eventual redemption through acts of common decency.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/q6y0Go1tsGEsmtFryDOJo3dEmqu.jpg",
-            "external_url": "https://www.themoviedb.org/movie/278",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=The+Shawshank+Redemption+1994+trailer",
-            "rating": 9.2
-        },
-        {
-            "title": "Schindler's List",
-            "year": "1993",
-            "description": "In German-occupied Poland during World War II, industrialist Oskar Schindler gradually becomes concerned for his Jewish workforce after witnessing their persecution by the Nazis.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/sF1U4EUQS8YHUYjNl3pMGNIQyr0.jpg",
-            "external_url": "https://www.themoviedb.org/movie/424",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Schindler%27s+List+1993+trailer",
-            "rating": 8.9
-        },
-        {
-            "title": "The Green Mile",
-            "year": "1999",
-            "description": "The lives of guards on Death Row are affected by one of their charges: a black man accused of child murder and rape, yet who has a mysterious gift.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/velWPhVMQeQKcxggNEU8YmIo52R.jpg",
-            "external_url": "https://www.themoviedb.org/movie/497",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=The+Green+Mile+1999+trailer",
-            "rating": 8.5
-        },
-        
-        # Action and Exciting Movies
-        {
-            "title": "The Dark Knight",
-            "year": "2008",
-            "description": "When the menace known as the Joker wreaks havoc and chaos on the people of Gotham, Batman must accept one of the greatest psychological and physical tests of his ability to fight injustice.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/qJ2tW6WMUDux911r6m7haRef0WH.jpg",
-            "external_url": "https://www.themoviedb.org/movie/155",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=The+Dark+Knight+2008+trailer",
-            "rating": 9.0
-        },
-        {
-            "title": "Inception",
-            "year": "2010",
-            "description": "A thief who steals corporate secrets through the use of dream-sharing technology is given the inverse task of planting an idea into the mind of a C.E.O.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/9gk7adHYeDvHkCSEqAvQNLV5Uge.jpg",
-            "external_url": "https://www.themoviedb.org/movie/27205",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Inception+2010+trailer",
-            "rating": 8.5
-        },
-        {
-            "title": "Mad Max: Fury Road",
-            "year": "2015",
-            "description": "In a post-apocalyptic wasteland, a woman rebels against a tyrannical ruler in search for her homeland with the aid of a group of female prisoners, a psychotic worshiper, and a drifter named Max.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/hA2ple9q4qnwxp3hKVNhroW8zQn.jpg",
-            "external_url": "https://www.themoviedb.org/movie/76341",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Mad+Max+Fury+Road+2015+trailer",
-            "rating": 8.1
-        },
-        
-        # Adventure and Fantasy Movies
-        {
-            "title": "The Lord of the Rings: The Fellowship of the Ring",
-            "year": "2001",
-            "description": "A meek Hobbit from the Shire and eight companions set out on a journey to destroy the powerful One Ring and save Middle-earth from the Dark Lord Sauron.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/6oom5QYQ2yQTMJIbnvbkBL9cHo6.jpg",
-            "external_url": "https://www.themoviedb.org/movie/120",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=The+Lord+of+the+Rings%3A+The+Fellowship+of+the+Ring+2001+trailer",
-            "rating": 8.8
-        },
-        {
-            "title": "Avatar",
-            "year": "2009",
-            "description": "A paraplegic Marine dispatched to the moon Pandora on a unique mission becomes torn between following his orders and protecting the world he feels is his home.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/jRXYjXNq0Cs2TcJjLkki24MLp7u.jpg",
-            "external_url": "https://www.themoviedb.org/movie/19995",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Avatar+2009+trailer",
-            "rating": 7.5
-        },
-        {
-            "title": "The Princess Bride",
-            "year": "1987",
-            "description": "While home sick in bed, a young boy's grandfather reads him the story of a farmboy-turned-pirate who encounters numerous obstacles, enemies and allies in his quest to be reunited with his true love.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/dvjqlp2sAhUeFjUOfQDgqwpphHj.jpg",
-            "external_url": "https://www.themoviedb.org/movie/2493",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=The+Princess+Bride+1987+trailer",
-            "rating": 8.1
-        },
-        
-        # Crime and Thriller Movies
-        {
-            "title": "The Godfather",
-            "year": "1972",
-            "description": "The aging patriarch of an organized crime dynasty transfers control of his clandestine empire to his reluctant son.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/3bhkrj58Vtu7enYsRolD1fZdja1.jpg",
-            "external_url": "https://www.themoviedb.org/movie/238",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=The+Godfather+1972+trailer",
-            "rating": 9.2
-        },
-        {
-            "title": "Pulp Fiction",
-            "year": "1994",
-            "description": "The lives of two mob hitmen, a boxer, a gangster and his wife, and a pair of diner bandits intertwine in four tales of violence and redemption.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/d5iIlFn5s0ImszYzBPb8JPIf36R.jpg",
-            "external_url": "https://www.themoviedb.org/movie/680",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Pulp+Fiction+1994+trailer",
-            "rating": 8.9
-        },
-        {
-            "title": "The Silence of the Lambs",
-            "year": "1991",
-            "description": "A young F.B.I. cadet must receive the help of an incarcerated and manipulative cannibal killer to help catch another serial killer, a madman who skins his victims.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/rplLJ2hPcOQmkFhTqUte0MkEaO2.jpg",
-            "external_url": "https://www.themoviedb.org/movie/274",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=The+Silence+of+the+Lambs+1991+trailer",
-            "rating": 8.6
-        },
-        
-        # Comedy Movies
-        {
-            "title": "The Grand Budapest Hotel",
-            "year": "2014",
-            "description": "The adventures of Gustave H, a legendary concierge at a famous hotel, and Zero Moustafa, the lobby boy who becomes his most trusted friend.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/eWdyYQreja6JGCzqHWXpWHDrrPo.jpg",
-            "external_url": "https://www.themoviedb.org/movie/120467",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=The+Grand+Budapest+Hotel+2014+trailer",
-            "rating": 8.1
-        },
-        {
-            "title": "The Hangover",
-            "year": "2009",
-            "description": "Three buddies wake up from a bachelor party in Las Vegas, with no memory of the previous night and the bachelor missing.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/uluhlXubGu1VxU63X9VHCLWDAYP.jpg",
-            "external_url": "https://www.themoviedb.org/movie/18785",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=The+Hangover+2009+trailer",
-            "rating": 7.8
-        },
-        {
-            "title": "Superbad",
-            "year": "2007",
-            "description": "Two co-dependent high school seniors are forced to deal with separation anxiety after their plan to stage a booze-soaked party goes awry.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/ek8e8txUyUwd2BNqj6lFAuuNmpC.jpg",
-            "external_url": "https://www.themoviedb.org/movie/8363",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Superbad+2007+trailer",
-            "rating": 7.5
-        },
-        
-        # Science Fiction Movies
-        {
-            "title": "The Matrix",
-            "year": "1999",
-            "description": "A computer hacker learns from mysterious rebels about the true nature of his reality and his role in the war against its controllers.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/f89U3ADr1oiB1s9GkdPOEpXUk5H.jpg",
-            "external_url": "https://www.themoviedb.org/movie/603",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=The+Matrix+1999+trailer",
-            "rating": 8.7
-        },
-        {
-            "title": "Interstellar",
-            "year": "2014",
-            "description": "A team of explorers travel through a wormhole in space in an attempt to ensure humanity's survival.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/gEU2QniE6E77NI6lCU6MxlNBvIx.jpg",
-            "external_url": "https://www.themoviedb.org/movie/157336",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Interstellar+2014+trailer",
-            "rating": 8.1
-        },
-        {
-            "title": "Blade Runner 2049",
-            "year": "2017",
-            "description": "A young blade runner's discovery of a long-buried secret leads him to track down former blade runner Rick Deckard, who's been missing for thirty years.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/gajva2L0rPYkEWjzgFlBXCAVBE5.jpg",
-            "external_url": "https://www.themoviedb.org/movie/335984",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Blade+Runner+2049+2017+trailer",
-            "rating": 8.0
-        },
-        
-        # Romantic Movies
-        {
-            "title": "The Notebook",
-            "year": "2004",
-            "description": "A poor yet passionate young man falls in love with a rich young woman, giving her a sense of freedom, but they are soon separated because of their social differences.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/rNzQyW4f8B8cQeg7Dgj3n6eT5k9.jpg",
-            "external_url": "https://www.themoviedb.org/movie/11036",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=The+Notebook+2004+trailer",
-            "rating": 7.8
-        }
-    ]
+    # Sad: Focus on emotional and dramatic content
+    "sad": [18, 10766, 10768],  # Drama, Soap, War & Politics
 
-def generate_default_webseries():
-    """Generate a list of default popular web series to use as fallback, grouped by emotion."""
-    return [
-        # Comedy/Light-hearted Series (Happy, Amused, Playful)
-        {
-            "title": "Friends",
-            "year": "1994",
-            "description": "Follows the personal and professional lives of six twenty to thirty-something-year-old friends living in Manhattan.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/f496cm9enuEsZkSPzCwnTESEK5s.jpg",
-            "external_url": "https://www.themoviedb.org/tv/1668",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Friends+TV+show+trailer",
-            "rating": 8.4
-        },
-        {
-            "title": "The Office",
-            "year": "2005",
-            "description": "A mockumentary on a group of typical office workers, where the workday consists of ego clashes, inappropriate behavior, and tedium.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/qWnJzyZhyy74gjpSjIXWmuk0ifX.jpg",
-            "external_url": "https://www.themoviedb.org/tv/2316",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=The+Office+TV+show+trailer",
-            "rating": 8.5
-        },
-        {
-            "title": "Brooklyn Nine-Nine",
-            "year": "2013",
-            "description": "Comedy series following the exploits of Det. Jake Peralta and his diverse, lovable colleagues as they police the NYPD's 99th Precinct.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/f53Gpqm4KXBq5PWIHh2zXb4gvwe.jpg",
-            "external_url": "https://www.themoviedb.org/tv/48891",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Brooklyn+Nine-Nine+trailer",
-            "rating": 8.2
-        },
-        
-        # Drama Series (Sad, Lonely, Shy)
-        {
-            "title": "This Is Us",
-            "year": "2016",
-            "description": "A heartwarming and emotional story about a unique set of triplets, their struggles and their wonderful parents.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/rDlCxDMN1UJxmOEtmiGVDoBLqSv.jpg",
-            "external_url": "https://www.themoviedb.org/tv/67136",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=This+Is+Us+trailer",
-            "rating": 8.1
-        },
-        {
-            "title": "The Crown",
-            "year": "2016",
-            "description": "Follows the political rivalries and romance of Queen Elizabeth II's reign and the events that shaped the second half of the twentieth century.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/6nxTO2tDr0oAC5Iw7or5Y3MIjKJ.jpg",
-            "external_url": "https://www.themoviedb.org/tv/65494",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=The+Crown+Netflix+trailer",
-            "rating": 8.2
-        },
-        {
-            "title": "Normal People",
-            "year": "2020",
-            "description": "Follows Marianne and Connell, from different backgrounds but the same small town in Ireland, as they weave in and out of each other's romantic lives.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/5zDBVLZSW7Vf4WwbJbseFwgo3jd.jpg",
-            "external_url": "https://www.themoviedb.org/tv/95794",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Normal+People+Hulu+trailer",
-            "rating": 8.0
-        },
-        
-        # Action/Thriller Series (Angry, Excited, Bored)
-        {
-            "title": "Breaking Bad",
-            "year": "2008",
-            "description": "A high school chemistry teacher diagnosed with inoperable lung cancer turns to manufacturing and selling methamphetamine in order to secure his family's future.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/ggFHVNu6YYI5L9pCfOacjizRGt.jpg",
-            "external_url": "https://www.themoviedb.org/tv/1396",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Breaking+Bad+trailer",
-            "rating": 9.2
-        },
-        {
-            "title": "The Boys",
-            "year": "2019",
-            "description": "A group of vigilantes set out to take down corrupt superheroes who abuse their superpowers.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/dzOxNbbz1liFzHU1IPvdgUR647b.jpg",
-            "external_url": "https://www.themoviedb.org/tv/76479",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=The+Boys+Amazon+trailer",
-            "rating": 8.4
-        },
-        {
-            "title": "Peaky Blinders",
-            "year": "2013",
-            "description": "A gangster family epic set in 1919 Birmingham, England; centered on a gang who sew razor blades in the peaks of their caps, and their fierce boss Tommy Shelby.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/bGZn5RVzMMXge2WqqlKibqMZH6q.jpg",
-            "external_url": "https://www.themoviedb.org/tv/60574",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Peaky+Blinders+trailer",
-            "rating": 8.5
-        },
-        
-        # Sci-Fi/Fantasy Series (Surprised, Confused)
-        {
-            "title": "Stranger Things",
-            "year": "2016",
-            "description": "When a young boy disappears, his mother, a police chief, and his friends must confront terrifying supernatural forces in order to get him back.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/x2LSRK2Cm7MZhjluni1msVJ3wDF.jpg",
-            "external_url": "https://www.themoviedb.org/tv/66732",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Stranger+Things+trailer",
-            "rating": 8.6
-        },
-        {
-            "title": "The Mandalorian",
-            "year": "2019",
-            "description": "The travels of a lone bounty hunter in the outer reaches of the galaxy, far from the authority of the New Republic.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/sWgBv7LV2PRoQgkxwlibdGXKz1S.jpg",
-            "external_url": "https://www.themoviedb.org/tv/82856",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=The+Mandalorian+trailer",
-            "rating": 8.5
-        },
-        {
-            "title": "Black Mirror",
-            "year": "2011",
-            "description": "An anthology series exploring a twisted, high-tech multiverse where humanity's greatest innovations and darkest instincts collide.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/4n1R4CXstrYrAVKrn8ScKCkk8ka.jpg",
-            "external_url": "https://www.themoviedb.org/tv/42009",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Black+Mirror+trailer",
-            "rating": 8.3
-        },
-        
-        # Mystery/Crime Series (Anxious, Frustrated)
-        {
-            "title": "Sherlock",
-            "year": "2010",
-            "description": "A modern update finds the famous sleuth and his doctor partner solving crime in 21st century London.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/7WTsnHkbA0FaG6R9twfFde0I9hl.jpg",
-            "external_url": "https://www.themoviedb.org/tv/19885",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Sherlock+BBC+trailer",
-            "rating": 8.5
-        },
-        {
-            "title": "True Detective",
-            "year": "2014",
-            "description": "Seasonal anthology series in which police investigations unearth the personal and professional secrets of those involved, both within and outside the law.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/xAKMTPYJYLDxTrFOn0rs9X0prGz.jpg",
-            "external_url": "https://www.themoviedb.org/tv/46648",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=True+Detective+HBO+trailer",
-            "rating": 8.2
-        },
-        {
-            "title": "Mindhunter",
-            "year": "2017",
-            "description": "In the late 1970s, two FBI agents expand criminal science by delving into the psychology of murder and getting uneasily close to all-too-real monsters.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/fbKE87mojpIETWepSbD5UIcjHYS.jpg",
-            "external_url": "https://www.themoviedb.org/tv/67744",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Mindhunter+Netflix+trailer",
-            "rating": 8.1
-        },
-        
-        # Epic/Adventure Series (Hopeful, Proud, Energetic)
-        {
-            "title": "Game of Thrones",
-            "year": "2011",
-            "description": "Nine noble families fight for control over the lands of Westeros, while an ancient enemy returns after being dormant for millennia.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/u3bZgnGQ9T01sWNhyveQz0wH0Hl.jpg",
-            "external_url": "https://www.themoviedb.org/tv/1399",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Game+of+Thrones+trailer",
-            "rating": 8.3
-        },
-        {
-            "title": "The Witcher",
-            "year": "2019",
-            "description": "Geralt of Rivia, a solitary monster hunter, struggles to find his place in a world where people often prove more wicked than beasts.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/zrPpUlehQaBf8YX2NrVrKK8IEpf.jpg",
-            "external_url": "https://www.themoviedb.org/tv/71912",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=The+Witcher+Netflix+trailer",
-            "rating": 8.1
-        },
-        {
-            "title": "Vikings",
-            "year": "2013",
-            "description": "Vikings transports us to the brutal and mysterious world of Ragnar Lothbrok, a Viking warrior and farmer who yearns to explore - and raid - the distant shores across the ocean.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/mBDlsOhNOV1MkNii81aT14EYQ4S.jpg",
-            "external_url": "https://www.themoviedb.org/tv/44217",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Vikings+History+Channel+trailer",
-            "rating": 8.0
-        },
-        
-        # Feel-good/Relaxing Series (Relaxed, Nostalgic)
-        {
-            "title": "Ted Lasso",
-            "year": "2020",
-            "description": "American college football coach Ted Lasso heads to London to manage AFC Richmond, a struggling English Premier League football team.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/oX7QdfiQEbyvIvpKgJHRCgbrLdK.jpg",
-            "external_url": "https://www.themoviedb.org/tv/97546",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Ted+Lasso+Apple+TV+trailer",
-            "rating": 8.5
-        },
-        {
-            "title": "The Good Place",
-            "year": "2016",
-            "description": "Four people and their otherworldly frienemy struggle in the afterlife to define what it means to be good.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/p7uJ7zJ9k0v7ob1tBZMJYvU98aJ.jpg",
-            "external_url": "https://www.themoviedb.org/tv/66573",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=The+Good+Place+NBC+trailer",
-            "rating": 8.2
-        },
-        {
-            "title": "Schitt's Creek",
-            "year": "2015",
-            "description": "When rich video-store magnate Johnny Rose and his family suddenly find themselves broke, they are forced to leave their pampered lives to regroup in Schitt's Creek.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/qrI0UeLOXn7dcQe1J2cDQZ4bCOj.jpg",
-            "external_url": "https://www.themoviedb.org/tv/61664",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Schitt%27s+Creek+trailer",
-            "rating": 8.1
-        },
-        
-        # Romantic Series (Romantic)
-        {
-            "title": "Bridgerton",
-            "year": "2020",
-            "description": "Wealth, lust, and betrayal set against the backdrop of Regency-era England, seen through the eyes of the powerful Bridgerton family.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/o4MoP6qVBhAJknMjW6Vz1NUcuJZ.jpg",
-            "external_url": "https://www.themoviedb.org/tv/91239",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Bridgerton+Netflix+trailer",
-            "rating": 7.8
-        },
-        {
-            "title": "Modern Love",
-            "year": "2019",
-            "description": "An anthology series that explores love in all of its complicated and beautiful forms, as well as its effects on the human connection.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/bdGipIhCWwzTgErOqHruuJ56nEO.jpg",
-            "external_url": "https://www.themoviedb.org/tv/89351",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Modern+Love+Amazon+trailer",
-            "rating": 7.8
-        },
-        {
-            "title": "Jane the Virgin",
-            "year": "2014",
-            "description": "A young, devout Catholic woman discovers that she was accidentally artificially inseminated.",
-            "poster_url": "https://image.tmdb.org/t/p/w500/ql8t0HGhSPeiysiQeNh1s7UgrG.jpg",
-            "external_url": "https://www.themoviedb.org/tv/61418",
-            "youtube_trailer_url": "https://www.youtube.com/results?search_query=Jane+the+Virgin+trailer",
-            "rating": 7.7
-        }
-    ]
-def get_webseries_recommendation(emotion):
-    """Fetch up to 50 web series with valid posters based on emotion, sorted by rating."""
-    import os
-    import time
+    # Angry: Focus on intense and conflict-driven content
+    "angry": [10759, 80, 10768],  # Action & Adventure, Crime, War & Politics
+
+    # Relaxed: Focus on calm and informative content
+    "relaxed": [99, 10767, 10751],  # Documentary, Talk, Family
+
+    # Energetic: Focus on action and fast-paced content
+    "energetic": [10759, 10764, 35],  # Action & Adventure, Reality, Comedy
+
+    # Nostalgic: Focus on period pieces and family content
+    "nostalgic": [18, 10751, 37],  # Drama, Family, Western
+
+    # Anxious: Focus on suspenseful and tense content
+    "anxious": [9648, 80, 10765],  # Mystery, Crime, Sci-Fi & Fantasy
+
+    # Hopeful: Focus on inspiring and positive content
+    "hopeful": [18, 10751, 10759],  # Drama, Family, Action & Adventure
+
+    # Proud: Focus on achievement and historical content
+    "proud": [10768, 99, 10759],  # War & Politics, Documentary, Action & Adventure
+
+    # Lonely: Focus on relationship-centered and introspective content
+    "lonely": [18, 10766, 10749],  # Drama, Soap, Romance
+
+    # Neutral: A balanced mix of genres
+    "neutral": [18, 35, 10759],  # Drama, Comedy, Action & Adventure
+
+    # Amused: Focus on humor and entertaining content
+    "amused": [35, 16, 10764],  # Comedy, Animation, Reality
+
+    # Frustrated: Focus on conflict and drama
+    "frustrated": [18, 80, 10768],  # Drama, Crime, War & Politics
+
+    # Romantic: Focus on love stories and relationship content
+    "romantic": [10766, 35, 18],  # Soap, Comedy, Drama
+
+    # Surprised: Focus on unpredictable and twist-filled content
+    "surprised": [9648, 10765, 10759],  # Mystery, Sci-Fi & Fantasy, Action & Adventure
+
+    # Confused: Focus on complex and mind-bending content
+    "confused": [9648, 10765, 18],  # Mystery, Sci-Fi & Fantasy, Drama
+
+    # Excited: Focus on thrilling and spectacular content
+    "excited": [10759, 10765, 10764],  # Action & Adventure, Sci-Fi & Fantasy, Reality
+
+    # Shy: Focus on gentle and character-driven content
+    "shy": [18, 10766, 10751],  # Drama, Soap, Family
+
+    # Bored: Focus on engaging and dynamic content
+    "bored": [10759, 10765, 10764],  # Action & Adventure, Sci-Fi & Fantasy, Reality
+
+    # Playful: Focus on fun and lighthearted content
+    "playful": [35, 16, 10762]  # Comedy, Animation, Kids
+}
+
+# Per-kind settings of the shared TMDB movie / TV pipeline
+TMDB_KINDS = {
+    "movie": {
+        "label": "movies",
+        "genres": MOVIE_EMOTION_TO_GENRES,
+        # Default to a mix of popular genres if emotion not found
+        "default_genres": [35, 18, 28],
+        "defaults": DEFAULT_MOVIES,
+    },
+    "tv": {
+        "label": "TV shows",
+        "genres": TV_EMOTION_TO_GENRES,
+        "default_genres": [35, 18, 10759],
+        "defaults": DEFAULT_WEBSERIES,
+    },
+}
+
+
+def iter_tmdb_pages(kind, api_key, genre_ids, primary_genre):
+    """
+    Lazily yield TMDB result pages for an emotion: page 1 of the primary genre, up to three
+    more random pages of it, then page 1 of another genre of the emotion, then the popular list.
+    Each stage is only requested once the consumer has pulled every page of the previous one.
+    """
     import random
-    from urllib.parse import quote_plus
-    
+
+    label = TMDB_KINDS[kind]["label"]
+    # Use discover endpoint to find titles by genre
+    discover_url = f"https://api.themoviedb.org/3/discover/{kind}"
+
+    print(f"[DEBUG] Making request to TMDB API discover with genre: {primary_genre}")
+    resp = cached_get(discover_url, params=tmdb_discover_params(api_key, primary_genre, 1))
+    print(f"[DEBUG] TMDB API response status: {resp.status_code}")
+
+    if resp.status_code == 200:
+        data = resp.json()
+        total_pages = min(data.get("total_pages", 1), 5)  # Limit to 5 pages max
+        results = data.get("results", [])
+        print(f"[DEBUG] TMDB API returned {len(results)} {label} for genre {primary_genre}")
+        yield results
+
+        if total_pages > 1:
+            # Request up to 3 additional pages, fetched concurrently
+            pages_to_fetch = min(3, total_pages - 1)
+            pages = random.sample(range(2, total_pages + 1), pages_to_fetch) if total_pages > 2 else [2]
+            print(f"[DEBUG] Requesting additional pages {pages} for genre {primary_genre}")
+            yield from fetch_concurrently([
+                partial(fetch_tmdb_results, discover_url, tmdb_discover_params(api_key, primary_genre, page_num),
+                        f"additional {label} from page {page_num}")
+                for page_num in pages
+            ])
+    else:
+        print(f"[ERROR] TMDB API request failed: {resp.status_code} {resp.text}")
+
+    # Still not enough: try another genre from the emotion list, then the popular list
+    if len(genre_ids) > 1:
+        secondary_genre = random.choice([g for g in genre_ids if g != primary_genre])
+        print(f"[DEBUG] Not enough {label} found, trying secondary genre: {secondary_genre}")
+        yield fetch_tmdb_results(discover_url, tmdb_discover_params(api_key, secondary_genre, 1),
+                                 f"{label} for secondary genre {secondary_genre}")
+
+    print(f"[DEBUG] Not enough {label} found, trying popular {label}")
+    yield fetch_tmdb_results(f"https://api.themoviedb.org/3/{kind}/popular",
+                             {"api_key": api_key, "language": "en-US", "page": 1},
+                             f"popular {label}")
+
+
+def iter_cached_tmdb_pages(kind, genre_ids):
+    """
+    Yield the TMDB result pages of an emotion's genres, and then the popular list, that are still in the
+    response cache, fresh or stale, without calling TMDB.
+    """
+    discover_url = f"https://api.themoviedb.org/3/discover/{kind}"
+    for genre in genre_ids:
+        for page_num in range(1, 6):
+            resp = get_cached_response(discover_url, params=tmdb_discover_params(None, genre, page_num))
+            if resp is not None:
+                yield resp.json().get("results", [])
+    resp = get_cached_response(f"https://api.themoviedb.org/3/{kind}/popular",
+                               params={"api_key": None, "language": "en-US", "page": 1})
+    if resp is not None:
+        yield resp.json().get("results", [])
+
+
+def get_cached_tmdb_recommendation(kind, emotion, target):
+    """
+    Collect movies or TV shows for an emotion from the response cache while TMDB's circuit breaker is open,
+    adding default titles when too few are cached.
+    """
+    config = TMDB_KINDS[kind]
+    label = config["label"]
+    genre_ids = config["genres"].get(emotion.lower(), config["default_genres"])
+    collector = TmdbCollector(kind, target).consume(iter_cached_tmdb_pages(kind, genre_ids))
+    if not len(collector):
+        print(f"[WARNING] TMDB is unavailable, using default {label}")
+        return finalize_tmdb_results(config["defaults"].copies(emotion), target)
+
+    print(f"[WARNING] TMDB is unavailable, serving {len(collector)} cached {label}")
+    if len(collector) < 10:
+        collector.add_defaults(config["defaults"].fill(emotion, collector.titles, target - len(collector)))
+    return collector.finalize()
+
+
+def get_tmdb_recommendation(kind, emotion):
+    """
+    Collect up to 50 movies ("movie") or TV shows ("tv") with valid posters for an emotion.
+
+    :param kind: "movie" or "tv".
+    :param emotion: The user's emotion.
+    :return: List of recommendation dicts, best-rated titles in random order.
+    """
+    import random
+
+    config = TMDB_KINDS[kind]
+    label = config["label"]
+    genre_ids = config["genres"].get(emotion.lower(), config["default_genres"])
+
+    # Choose a random genre from the list for this emotion to add variety
+    primary_genre = random.choice(genre_ids)
+
+    target = 50
+    collector = TmdbCollector(kind, target)
+
+    # Answer from the local media catalog when it already holds enough titles
+    catalog_results = lookup_titles(kind, genre_ids, MEDIA_CATALOG_CANDIDATES)
+    if len(catalog_results) >= target:
+        print(f"[DEBUG] Using {len(catalog_results)} catalog {label} for emotion: {emotion}")
+        collector.add_results(random.sample(catalog_results, len(catalog_results)))
+        return collector.finalize()
+
+    # Serve cached pages, then the built-in catalog, while TMDB is failing
+    if not is_provider_available("tmdb"):
+        return get_cached_tmdb_recommendation(kind, emotion, target)
+
     # Get the TMDB API key
     api_key = get_tmdb_api_key()
     if not api_key:
         print("[ERROR] TMDB_API_KEY environment variable is missing!")
-        return generate_default_webseries()
-    
-    print(f"[DEBUG] Using TMDB API for web series with emotion: {emotion}")
-    
-    # Map emotions to TMDB TV genre IDs with more focused genre selections
-    # TMDB TV Genre IDs: https://developers.themoviedb.org/3/genres/get-tv-list
-    # 10759: Action & Adventure, 16: Animation, 35: Comedy, 80: Crime, 99: Documentary, 18: Drama, 
-    # 10751: Family, 10762: Kids, 9648: Mystery, 10763: News, 10764: Reality, 10765: Sci-Fi & Fantasy, 
-    # 10766: Soap, 10767: Talk, 10768: War & Politics, 37: Western
-    emotion_to_genres = {
-        # Happy: Focus on uplifting and light-hearted content
-        "happy": [35, 16, 10762],  # Comedy, Animation, Kids
-
-        # Sad: Focus on emotional and dramatic content
-        "sad": [18, 10766, 10768],  # Drama, Soap, War & Politics
-
-        # Angry: Focus on intense and conflict-driven content
-        "angry": [10759, 80, 10768],  # Action & Adventure, Crime, War & Politics
-
-        # Relaxed: Focus on calm and informative content
-        "relaxed": [99, 10767, 10751],  # Documentary, Talk, Family
-        
-        # Energetic: Focus on action and fast-paced content
-        "energetic": [10759, 10764, 35],  # Action & Adventure, Reality, Comedy
-        
-        # Nostalgic: Focus on period pieces and family content
-        "nostalgic": [18, 10751, 37],  # Drama, Family, Western
-        
-        # Anxious: Focus on suspenseful and tense content
-        "anxious": [9648, 80, 10765],  # Mystery, Crime, Sci-Fi & Fantasy
-        
-        # Hopeful: Focus on inspiring and positive content
-        "hopeful": [18, 10751, 10759],  # Drama, Family, Action & Adventure
-        
-        # Proud: Focus on achievement and historical content
-        "proud": [10768, 99, 10759],  # War & Politics, Documentary, Action & Adventure
-        
-        # Lonely: Focus on relationship-centered and introspective content
-        "lonely": [18, 10766, 10749],  # Drama, Soap, Romance
-        
-        # Neutral: A balanced mix of genres
-        "neutral": [18, 35, 10759],  # Drama, Comedy, Action & Adventure
-        
-        # Amused: Focus on humor and entertaining content
-        "amused": [35, 16, 10764],  # Comedy, Animation, Reality
-        
-        # Frustrated: Focus on conflict and drama
-        "frustrated": [18, 80, 10768],  # Drama, Crime, War & Politics
-        
-        # Romantic: Focus on love stories and relationship content
-        "romantic": [10766, 35, 18],  # Soap, Comedy, Drama
-        
-        # Surprised: Focus on unpredictable and twist-filled content
-        "surprised": [9648, 10765, 10759],  # Mystery, Sci-Fi & Fantasy, Action & Adventure
-        
-        # Confused: Focus on complex and mind-bending content
-        "confused": [9648, 10765, 18],  # Mystery, Sci-Fi & Fantasy, Drama
-        
-        # Excited: Focus on thrilling and spectacular content
-        "excited": [10759, 10765, 10764],  # Action & Adventure, Sci-Fi & Fantasy, Reality
-        
-        # Shy: Focus on gentle and character-driven content
-        "shy": [18, 10766, 10751],  # Drama, Soap, Family
-        
-        # Bored: Focus on engaging and dynamic content
-        "bored": [10759, 10765, 10764],  # Action & Adventure, Sci-Fi & Fantasy, Reality
-        
-        # Playful: Focus on fun and lighthearted content
-        "playful": [35, 16, 10762]  # Comedy, Animation, Kids
-    }
-    
-    # Default to a mix of popular genres if emotion not found
-    genre_ids = emotion_to_genres.get(emotion.lower(), [35, 18, 10759])
-    
-    # Choose a random genre from the list for this emotion to add variety
-    primary_genre = random.choice(genre_ids)
-    
-    target = 50
-    collected = []
-    
-    try:
-        # Use discover endpoint to find TV shows by genre
-        discover_url = "https://api.themoviedb.org/3/discover/tv"
-        print(f"[DEBUG] Making request to TMDB API discover with genre: {primary_genre}")
-        
-        # Request page 1
-        resp = requests.get(
-            discover_url,
-            params={
-                "api_key": api_key,
-                "language": "en-US",
-                "sort_by": "popularity.desc",
-                "include_adult": "false",
-                "with_genres": primary_genre,
-                "page": 1
-            }
-        )
-        
-        print(f"[DEBUG] TMDB API response status: {resp.status_code}")
-        
-        if resp.status_code == 200:
-            data = resp.json()
-            total_pages = min(data.get("total_pages", 1), 5)  # Limit to 5 pages max
-            results = data.get("results", [])
-            print(f"[DEBUG] TMDB API returned {len(results)} TV shows for genre {primary_genre}")
-            
-            # Process first page results
-            process_tv_results(results, collected, target)
-            
-            # If we need more results and there are more pages, get multiple random pages
-            if len(collected) < target and total_pages > 1:
-                # Request up to 3 additional pages to ensure we get enough results
-                pages_to_fetch = min(3, total_pages - 1)
-                pages = random.sample(range(2, total_pages + 1), pages_to_fetch) if total_pages > 2 else [2]
-                
-                for page_num in pages:
-                    # Add a small delay to avoid rate limiting
-                    time.sleep(0.5)
-                    
-                    print(f"[DEBUG] Requesting additional page {page_num} for genre {primary_genre}")
-                    resp = requests.get(
-                        discover_url,
-                        params={
-                            "api_key": api_key,
-                            "language": "en-US",
-                            "sort_by": "popularity.desc",
-                            "include_adult": "false",
-                            "with_genres": primary_genre,
-                            "page": page_num
-                        }
-                    )
-                    
-                    if resp.status_code == 200:
-                        results = resp.json().get("results", [])
-                        print(f"[DEBUG] TMDB API returned {len(results)} additional TV shows from page {page_num}")
-                        process_tv_results(results, collected, target)
-                        
-                        if len(collected) >= target:
-                            break
-        else:
-            print(f"[ERROR] TMDB API request failed: {resp.status_code} {resp.text}")
-        
-        # If not enough TV shows, try another genre from the emotion list
-        if len(collected) < target and len(genre_ids) > 1:
-            # Choose a different genre
-            secondary_genres = [g for g in genre_ids if g != primary_genre]
-            secondary_genre = random.choice(secondary_genres)
-            
-            print(f"[DEBUG] Not enough TV shows found ({len(collected)}), trying secondary genre: {secondary_genre}")
-            
-            # Add a small delay to avoid rate limiting
-            time.sleep(0.5)
-            
-            resp = requests.get(
-                discover_url,
-                params={
-                    "api_key": api_key,
-                    "language": "en-US",
-                    "sort_by": "popularity.desc",
-                    "include_adult": "false",
-                    "with_genres": secondary_genre,
-                    "page": 1
-                }
-            )
-            
-            if resp.status_code == 200:
-                results = resp.json().get("results", [])
-                print(f"[DEBUG] TMDB API returned {len(results)} TV shows for secondary genre {secondary_genre}")
-                process_tv_results(results, collected, target)
-            else:
-                print(f"[ERROR] TMDB API request failed: {resp.status_code} {resp.text}")
-        
-        # If still not enough TV shows, try popular TV shows as fallback
-        if len(collected) < target:
-            print(f"[DEBUG] Not enough TV shows found ({len(collected)}), trying popular TV shows")
-            
-            # Add a small delay to avoid rate limiting
-            time.sleep(0.5)
-            
-            popular_url = "https://api.themoviedb.org/3/tv/popular"
-            resp = requests.get(
-                popular_url,
-                params={"api_key": api_key, "language": "en-US", "page": 1}
-            )
-            
-            if resp.status_code == 200:
-                results = resp.json().get("results", [])
-                print(f"[DEBUG] TMDB API returned {len(results)} popular TV shows")
-                process_tv_results(results, collected, target)
-            else:
-                print(f"[ERROR] TMDB API request failed: {resp.status_code} {resp.text}")
-        
-        # If we still don't have enough series, use the default ones
-        if len(collected) < 10:
-            print(f"[WARNING] Not enough TV shows found ({len(collected)}), adding default TV shows")
-            default_series = generate_default_webseries()
-            
-            # Add default series that aren't already in the collection
-            for series in default_series:
-                if not any(s.get("title") == series.get("title") for s in collected):
-                    collected.append(series)
-                    if len(collected) >= target:
-                        break
-    
+        return config["defaults"].copies(emotion)
+
+    print(f"[DEBUG] Using TMDB API for {label} with emotion: {emotion}")
+
+    try:
+        collector.consume(iter_tmdb_pages(kind, api_key, genre_ids, primary_genre))
+
+        # If we still don't have enough titles, use the default ones
+        if len(collector) < 10:
+            print(f"[WARNING] Not enough {label} found ({len(collector)}), adding default {label}")
+            collector.add_defaults(config["defaults"].fill(emotion, collector.titles, target - len(collector)))
+
+    except ProviderUnavailable as e:
+        print(f"[WARNING] {str(e)}, serving cached {label}")
+        return get_cached_tmdb_recommendation(kind, emotion, target)
     except Exception as e:
-        print(f"[ERROR] Exception in get_webseries_recommendation: {str(e)}")
+        print(f"[ERROR] Exception in get_tmdb_recommendation for {kind}: {str(e)}")
         import traceback
         traceback.print_exc()
-        
-        # If we encounter an exception, use the default series
-        collected = generate_default_webseries()
-    
-    # Sort by rating desc and limit to target
-    series = sorted(collected, key=lambda s: s.get("rating", 0), reverse=True)[:target]
-    
-    # Shuffle the results to add variety
-    random.shuffle(series)
-    
-    # Cleanup
-    for s in series:
-        s.pop("rating", None)
-    
+
+        # If we encounter an exception, use the default titles
+        return finalize_tmdb_results(config["defaults"].copies(emotion), target)
+
+    return collector.finalize()
+
+
+def get_webseries_recommendation(emotion):
+    """Fetch up to 50 web series with valid posters based on emotion, ranked by the ranking module."""
+    series = get_tmdb_recommendation("tv", emotion)
     print(f"[DEBUG] Returning {len(series)} web series recommendations")
     return series
 
 
-def process_tv_results(results, collected, target):
-    """Process TV show results from TMDB API and add them to the collected list."""
-    from urllib.parse import quote_plus
-    
-    for item in results:
-        if len(collected) >= target:
-            break
-            
-        series_id = item.get("id")
-        if not series_id:
-            continue
-        
-        # Skip if no poster
-        poster_path = item.get("poster_path")
-        if not poster_path:
-            continue
-        
-        # Extract basic info
-        title = item.get("name", "")
-        year = item.get("first_air_date", "")[:4] if item.get("first_air_date") else ""
-        plot = item.get("overview", "")
-        poster_url = f"https://image.tmdb.org/t/p/w500{poster_path}"
-        rating = item.get("vote_average", 0)
-        
-        # Skip if already in collected
-        if any(s.get("title") == title for s in collected):
-            continue
-        
-        # Add to collected series
-        collected.append({
-            "title": title,
-            "year": year,
-            "description": plot,
-            "poster_url": poster_url,
-            "external_url": f"https://www.themoviedb.org/tv/{series_id}",
-            "youtube_trailer_url": f"https://www.youtube.com/results?search_query={quote_plus(f'{title} {year} trailer')}",
-            "rating": rating
-        })
+def get_story_recommendation(emotion):
+    """Fetch up to 30 stories with valid cover images, ranked by rating, rating count and recency."""
+    url = "https://www.googleapis.com/books/v1/volumes"
+    target = 30
+    if is_provider_available("google_books"):
+        try:
+            resp = cached_get(url, params=google_books_params(emotion))
+            return format_google_books(resp.json().get("items", []), target)
+        except ProviderUnavailable:
+            # e.g. the breaker is half-open and its probe calls are taken
+            pass
+    resp = get_cached_response(url, params=google_books_params(emotion))
+    if resp is None:
+        print("[WARNING] Google Books is unavailable, skipping story recommendations")
+        return []
+    print("[WARNING] Google Books is unavailable, serving cached story recommendations")
+    return format_google_books(resp.json().get("items", []), target)
 
 
-def get_story_recommendation(emotion):
-    """Fetch up to 30 stories with valid cover images, sorted by average rating."""
+def google_books_params(emotion):
+    """Build the Google Books volume search query for an emotion."""
     import os
     GOOGLE_KEY = os.getenv("GOOGLE_BOOKS_API_KEY")
-    url = "https://www.googleapis.com/books/v1/volumes"
-    target = 30
-    collected = []
     params = {"q": emotion, "maxResults": 30}
     if GOOGLE_KEY:
         params["key"] = GOOGLE_KEY
-    resp = requests.get(url, params=params)
-    items = resp.json().get("items", [])
+    return params
+
+
+def format_google_books(items, target):
+    """Turn Google Books volumes with a cover image into ranked story recommendations, diversified over categories."""
+    collected = []
+    features = []
     for item in items:
         info = item.get("volumeInfo", {})
         thumbnail = info.get("imageLinks", {}).get("thumbnail")
@@ -1126,44 +634,278 @@ def get_story_recommendation(emotion):
         authors = ", ".join(info.get("authors", []))
         description = info.get("description", "")
         external_url = info.get("previewLink") or info.get("infoLink")
-        rating = info.get("averageRating", 0) or 0
         collected.append({
             "title": title,
             "author": authors,
             "description": description,
             "poster_url": thumbnail,
             "external_url": external_url,
-            "rating": rating
         })
-        if len(collected) >= target:
-            break
-    # Sort by rating and cleanup
-    stories = sorted(collected, key=lambda s: s.get("rating", 0), reverse=True)
-    for s in stories:
-        s.pop("rating", None)
-    return stories
+        features.append((info.get("averageRating", 0) or 0, info.get("ratingsCount", 0) or 0,
+                         ranking.parse_year(info.get("publishedDate")), info.get("categories", [])))
+    if not collected:
+        return []
+    rating, votes, year, categories = zip(*features)
+    return [collected[index] for index in ranking.rank(target, rating, votes=votes, year=year, groups=categories)]
 
 
 import os
-import tempfile
-import requests
 
+from PIL import Image, UnidentifiedImageError
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 
 import mimetypes
+import time
+
+from django.conf import settings
+from django.http import StreamingHttpResponse
+from rest_framework.decorators import renderer_classes
+
+from .fanout import fetch_batch, fetch_categories
+from . import response_cache
+from .recommendation_pages import load_page, paginate, parse_cursor, store_result_set
+from .renderers import EventStreamRenderer, NDJSONRenderer
+
+# Provider functions used by the recommendations endpoint, keyed by response category
+CATEGORY_FETCHERS = {
+    "music": get_music_recommendation,
+    "movies": get_movie_recommendation,
+    "webseries": get_webseries_recommendation,
+    "stories": get_story_recommendation,
+}
+
+# Maximum number of items per category returned for display in the frontend
+CATEGORY_LIMITS = {
+    "movies": 30,
+    "webseries": 30,
+}
+
+
+def get_list_param(request, name):
+    """
+    Read a list parameter from the request body (a list or a comma-separated string) or the query string.
+
+    :param request: The request object.
+    :param name: The parameter name, e.g. "categories".
+    :return: List of non-empty values, or None if the parameter is not given.
+    """
+    value = request.data.get(name) if request.data else None
+    if value is None:
+        value = request.query_params.get(name)
+    if value is None:
+        return None
+    if isinstance(value, str):
+        value = value.split(",")
+    return [str(v).strip() for v in value if str(v).strip()]
+
+
+def project_items(items, fields):
+    """
+    Trim every recommendation dict to the requested fields; all fields are kept if none are given.
+    """
+    if not fields:
+        return items
+    return [{field: item[field] for field in fields if field in item} if isinstance(item, dict) else item
+            for item in items]
+
+
+def format_category_items(category, items, fields, page_size=None):
+    """
+    Apply the page size (or the per-category item limit) and the `fields` projection to a category's items.
+    """
+    limit = page_size or CATEGORY_LIMITS.get(category)
+    return project_items(items[:limit] if limit else items, fields)
+
+
+def paginate_categories(emotion, full_sets, page_size=None):
+    """
+    Cut every category to its first page, storing the full sets under a cursor if any category has more.
+
+    :param emotion: The emotion the items were computed for.
+    :param full_sets: Mapping of category name to all of its (projected) items.
+    :param page_size: Items per page; defaults to the per-category item limit.
+    :return: Tuple of the first page and the next-page cursor (or None) of every category.
+    """
+    limits = {category: page_size or CATEGORY_LIMITS.get(category) for category in full_sets}
+    set_id = None
+    if any(limits[category] and len(items) > limits[category] for category, items in full_sets.items()):
+        set_id = store_result_set(emotion, full_sets)
+    pages, cursors = {}, {}
+    for category, items in full_sets.items():
+        pages[category], cursors[category] = paginate(set_id, category, items, 0, limits[category])
+    return pages, cursors
+
+
+def get_page_size(request):
+    """
+    Read the optional `page_size` parameter.
+
+    :return: Tuple (page_size, error). page_size is None if not given; error is a 400 response if it is invalid.
+    """
+    page_size = get_param(request, "page_size")
+    if page_size is None:
+        return None, None
+    try:
+        page_size = int(page_size)
+        if page_size < 1:
+            raise ValueError(page_size)
+    except (TypeError, ValueError):
+        return None, Response({"error": "page_size must be a positive integer"}, status=status.HTTP_400_BAD_REQUEST)
+    return page_size, None
+
+
+def get_param(request, name, default=None):
+    """
+    Read a parameter from the request body, falling back to the query string.
+    """
+    value = request.data.get(name) if request.data else None
+    if value is None:
+        value = request.query_params.get(name, default)
+    return value
+
+
+def parse_recommendation_options(request):
+    """
+    Read and validate the options shared by the single and batch recommendation endpoints.
+
+    :param request: The request object.
+    :return: Tuple (options, error). options is a dict with budget (seconds or None), categories,
+             fields and page_size; error is a 400 response if an option is invalid, else None.
+    """
+    deadline_ms = get_param(request, "deadline_ms", getattr(settings, 'RECOMMENDATION_DEADLINE_MS', 0))
+    try:
+        deadline_ms = int(deadline_ms)
+        if deadline_ms < 0:
+            raise ValueError(deadline_ms)
+    except (TypeError, ValueError):
+        return None, Response({"error": "deadline_ms must be a non-negative integer"},
+                              status=status.HTTP_400_BAD_REQUEST)
+
+    categories = get_list_param(request, "categories")
+    if categories is None:
+        categories = list(CATEGORY_FETCHERS)
+    categories = [category.lower() for category in categories]
+    unknown = [category for category in categories if category not in CATEGORY_FETCHERS]
+    if unknown or not categories:
+        return None, Response({"error": f"Unknown categories: {', '.join(unknown)}" if unknown else "No categories requested",
+                               "categories": list(CATEGORY_FETCHERS)}, status=status.HTTP_400_BAD_REQUEST)
+
+    page_size, error = get_page_size(request)
+    if error is not None:
+        return None, error
+
+    return {
+        "budget": deadline_ms / 1000 if deadline_ms else None,
+        "categories": categories,
+        "fields": get_list_param(request, "fields"),
+        "page_size": page_size,
+    }, None
+
+
+def parse_recommendation_request(request):
+    """
+    Read and validate the parameters shared by the recommendation endpoints.
+
+    :param request: The request object.
+    :return: Tuple (params, error). params is a dict with emotion, user_id, budget (seconds or None),
+             categories, fields and page_size; error is a 400 response if a parameter is invalid, else None.
+    """
+    emotion = get_param(request, "emotion", "")
+    user_id = get_param(request, "user_id")
+    print(f"Received recommendation request for emotion: {emotion}, user_id: {user_id}")
+    
+    if not emotion:
+        print("Error: No emotion provided in request")
+        return None, Response({"error": "No emotion provided"}, status=status.HTTP_400_BAD_REQUEST)
+
+    options, error = parse_recommendation_options(request)
+    if error is not None:
+        return None, error
+    return {"emotion": emotion, "user_id": user_id, **options}, None
+
+
+def parse_batch_items(request):
+    """
+    Read the (emotion, user_id) inputs of a batch recommendation request.
+
+    Inputs are given either as `items`, a list of {"emotion", "user_id"} objects, or as
+    `emotions` with an optional `user_ids` list of the same length.
+
+    :param request: The request object.
+    :return: Tuple (items, error). items is a list of (emotion, user_id) tuples in input order;
+             error is a 400 response if the inputs are missing, invalid or not in EMOTIONS, or a user ID
+             is not a string, else None.
+    """
+    data = request.data or {}
+    if data.get("items") is not None:
+        raw_items = data.get("items")
+        if not isinstance(raw_items, list) or not all(isinstance(item, dict) for item in raw_items):
+            return None, Response({"error": "items must be a list of objects with an emotion"},
+                                  status=status.HTTP_400_BAD_REQUEST)
+        items = [(item.get("emotion"), item.get("user_id")) for item in raw_items]
+    else:
+        emotions = get_list_param(request, "emotions") or []
+        user_ids = data.get("user_ids") or [None] * len(emotions)
+        if not isinstance(user_ids, list) or len(user_ids) != len(emotions):
+            return None, Response({"error": "user_ids must have one entry per emotion"},
+                                  status=status.HTTP_400_BAD_REQUEST)
+        items = list(zip(emotions, user_ids))
+
+    if not items:
+        return None, Response({"error": "No emotions provided"}, status=status.HTTP_400_BAD_REQUEST)
+    max_items = getattr(settings, 'RECOMMENDATION_BATCH_MAX_ITEMS', 100)
+    if len(items) > max_items:
+        return None, Response({"error": f"At most {max_items} items per batch"}, status=status.HTTP_400_BAD_REQUEST)
+    invalid = [index for index, (emotion, _) in enumerate(items) if not isinstance(emotion, str) or not emotion.strip()]
+    if invalid:
+        return None, Response({"error": "No emotion provided", "items": invalid}, status=status.HTTP_400_BAD_REQUEST)
+    # Each distinct emotion costs a provider chain per category, so only the known vocabulary is accepted
+    unknown = [index for index, (emotion, _) in enumerate(items) if emotion.strip().lower() not in EMOTIONS]
+    if unknown:
+        return None, Response({"error": f"Unknown emotion, expected one of: {', '.join(EMOTIONS)}", "items": unknown},
+                              status=status.HTTP_400_BAD_REQUEST)
+    invalid = [index for index, (_, user_id) in enumerate(items) if user_id is not None and not isinstance(user_id, str)]
+    if invalid:
+        return None, Response({"error": "user_id must be a string", "items": invalid},
+                              status=status.HTTP_400_BAD_REQUEST)
+    return items, None
+
+
+def save_mood_history(user_id, emotion):
+    """
+    Save the emotion to the user's mood history if a user ID is given, and to their cached preferences.
+    """
+    if not user_id:
+        return
+    try:
+        from users.models import UserProfile
+        # Push atomically instead of loading and re-saving the whole profile
+        if not UserProfile.objects(id=user_id).update_one(push__mood_history=emotion):
+            print(f"Error saving mood to user history: user {user_id} not found")
+            return
+        personalization.record_mood(user_id, emotion)
+        print(f"Saved emotion '{emotion}' to user {user_id}'s mood history")
+    except Exception as e:
+        print(f"Error saving mood to user history: {str(e)}")
+
+
+# Emotion-to-genre mappings used to personalize the categories with genres
+PERSONALIZATION_GENRE_MAPS = {
+    "movies": MOVIE_EMOTION_TO_GENRES,
+    "webseries": TV_EMOTION_TO_GENRES,
+}
+
+
+def personalize_items(category, items, preferences):
+    """
+    Re-rank a category's items by a user's preferences; items are returned as they are without preferences.
+    """
+    return personalization.personalize(category, items, preferences, PERSONALIZATION_GENRE_MAPS)
 
 @api_view(['GET'])
 def test_tmdb_api(request):
     """Test endpoint to verify TMDB API is working correctly."""
-    import os
-    import json
-    import urllib3
-    from urllib.parse import urlencode
-    
-    # Disable SSL warnings
-    urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
-    
     # Try to get API key from both environment variables and settings
     api_key = os.getenv('TMDB_API_KEY', 'cfea14bd15c392a8d6b4cb651971c5d8')
     
@@ -1171,27 +913,19 @@ def test_tmdb_api(request):
         return Response({"error": "TMDB_API_KEY not found in environment variables"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
     
     try:
-        # Initialize HTTP client
-        http = urllib3.PoolManager(
-            cert_reqs='CERT_NONE',
-            assert_hostname=False,
-            timeout=urllib3.Timeout(connect=10.0, read=10.0)
+        # Make the request through the shared provider client
+        response = http_client.get(
+            "https://api.themoviedb.org/3/movie/popular",
+            params={
+                'api_key': api_key,
+                'language': 'en-US',
+                'page': 1
+            }
         )
         
-        # Build URL with query parameters
-        params = {
-            'api_key': api_key,
-            'language': 'en-US',
-            'page': 1
-        }
-        url = f"https://api.themoviedb.org/3/movie/popular?{urlencode(params)}"
-        
-        # Make the request
-        response = http.request('GET', url)
-        
-        if response.status == 200:
+        if response.status_code == 200:
             try:
-                data = json.loads(response.data.decode('utf-8'))
+                data = response.json()
                 results = data.get("results", [])
                 
                 # Return first 5 movies with basic info
@@ -1212,15 +946,15 @@ def test_tmdb_api(request):
                     "sample_movies": movies
                 })
                 
-            except json.JSONDecodeError as e:
+            except ValueError as e:
                 return Response(
                     {"error": f"Failed to parse API response: {str(e)}"},
                     status=status.HTTP_500_INTERNAL_SERVER_ERROR
                 )
         else:
             return Response(
-                {"error": f"TMDB API request failed with status {response.status}",
-                 "response": response.data.decode('utf-8') if response.data else ''},
+                {"error": f"TMDB API request failed with status {response.status_code}",
+                 "response": response.text},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
             
@@ -1268,15 +1002,7 @@ def text_emotion(request):
     recommendations = get_music_recommendation(emotion)
     
     # Save emotion to user's mood history if user_id is provided
-    if user_id:
-        try:
-            from users.models import UserProfile
-            user_profile = UserProfile.objects.get(id=user_id)
-            user_profile.mood_history.append(emotion)
-            user_profile.save()
-            print(f"Saved text-inferred emotion '{emotion}' to user {user_profile.username}'s mood history")
-        except Exception as e:
-            print(f"Error saving mood to user history: {str(e)}")
+    save_mood_history(user_id, emotion)
 
     return Response({"emotion": emotion, "recommendations": recommendations})
 
@@ -1311,23 +1037,10 @@ def facial_emotion(request):
         return Response({"error": "No image file provided"}, status=status.HTTP_400_BAD_REQUEST)
 
     image_file = request.FILES['file']
-    temp_file_path = None
 
     try:
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".jpg") as temp_file:
-            for chunk in image_file.chunks():
-                temp_file.write(chunk)
-            temp_file_path = temp_file.name
-
-        if not os.path.exists(temp_file_path):
-            print("Image file was not saved correctly.")
-            return Response({"error": "Failed to save image file."}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-
-        # Debugging: Log the image size
-        print(f"Image saved at {temp_file_path}, size: {os.path.getsize(temp_file_path)} bytes")
-
         # Infer emotion from the facial image file
-        emotion = infer_facial_emotion(temp_file_path)
+        emotion = infer_uploaded_facial_emotion(image_file)
 
         if emotion is None:
             print("Emotion inference failed.")
@@ -1338,28 +1051,40 @@ def facial_emotion(request):
         recommendations = get_music_recommendation(emotion)
         
         # Save emotion to user's mood history if user_id is provided
-        user_id = request.data.get("user_id", None)
-        if user_id:
-            try:
-                from users.models import UserProfile
-                user_profile = UserProfile.objects.get(id=user_id)
-                user_profile.mood_history.append(emotion)
-                user_profile.save()
-                print(f"Saved facial-inferred emotion '{emotion}' to user {user_profile.username}'s mood history")
-            except Exception as e:
-                print(f"Error saving mood to user history: {str(e)}")
+        save_mood_history(request.data.get("user_id", None), emotion)
         
         return Response({
             "emotion": emotion,
             "recommendations": recommendations
         })
 
+    except InvalidImageError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
     except Exception as e:
         print(f"Exception occurred during image processing: {str(e)}")
         return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-    finally:
-        if temp_file_path and os.path.exists(temp_file_path):
-            os.remove(temp_file_path)
+
+
+def infer_uploaded_facial_emotion(image_file):
+    """
+    Infer the facial emotion of an uploaded image without writing it to disk.
+
+    Uploads up to FILE_UPLOAD_MAX_MEMORY_SIZE are kept in memory by Django and decoded from there. Larger uploads
+    are already spooled to a temporary file by Django's upload handler, which is decoded in place.
+
+    :param image_file: The uploaded file.
+    :return: The inferred emotion, or None if inference failed.
+    :raises InvalidImageError: If the upload is not a decodable image.
+    """
+    print(f"[DEBUG] Facial image upload of {image_file.size} bytes")
+    if hasattr(image_file, "temporary_file_path"):
+        return infer_facial_emotion(image_file.temporary_file_path())
+    if isinstance(image_file.file, io.BytesIO):
+        # Released before Django closes the upload, which fails while the buffer is exported
+        with image_file.file.getbuffer() as buffer:
+            return infer_facial_emotion(buffer)
+    image_file.seek(0)
+    return infer_facial_emotion(image_file.read())
 
 @swagger_auto_schema(
     method='post',
@@ -1367,6 +1092,8 @@ def facial_emotion(request):
         type=openapi.TYPE_OBJECT,
         properties={
             'emotion': openapi.Schema(type=openapi.TYPE_STRING, description='Emotion for music recommendations'),
+            'fields': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_STRING),
+                                     description='Only return these attributes of each track'),
         },
         required=['emotion'],
     ),
@@ -1391,7 +1118,7 @@ def music_recommendation(request):
     if not emotion:
         return Response({"error": "No emotion provided"}, status=status.HTTP_400_BAD_REQUEST)
 
-    recommendations = get_music_recommendation(emotion)
+    recommendations = project_items(get_music_recommendation(emotion), get_list_param(request, "fields"))
     return Response({"emotion": emotion, "recommendations": recommendations})
 
 @swagger_auto_schema(
@@ -1401,12 +1128,20 @@ def music_recommendation(request):
         properties={
             'emotion': openapi.Schema(type=openapi.TYPE_STRING, description='Emotion for recommendations'),
             'user_id': openapi.Schema(type=openapi.TYPE_STRING, description='MongoDB user profile ID'),
+            'deadline_ms': openapi.Schema(type=openapi.TYPE_INTEGER,
+                                          description='Latency budget; categories not ready in time are returned as pending'),
+            'categories': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_STRING),
+                                         description='Only fetch these categories (music, movies, webseries, stories)'),
+            'fields': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_STRING),
+                                     description='Only return these attributes of each item'),
+            'page_size': openapi.Schema(type=openapi.TYPE_INTEGER,
+                                        description='Items per category on the first page (default 30 movies and web series)'),
         },
         required=['emotion'],
     ),
     responses={
         200: openapi.Response('Recommendations retrieved successfully.'),
-        400: openapi.Response('No emotion provided.'),
+        400: openapi.Response('No emotion provided, invalid deadline_ms or page_size, or unknown category.'),
         401: openapi.Response('Unauthorized.'),
         404: openapi.Response('URL not found.'),
         500: openapi.Response('Internal server error.'),
@@ -1417,88 +1152,358 @@ def recommendations(request):
     """
     This function retrieves music, movies, webseries, and stories recommendations based on the provided emotion.
 
+    When a latency budget is given (`deadline_ms`, or RECOMMENDATION_DEADLINE_MS by default) the
+    categories that are not ready when it expires are returned empty and marked as pending in
+    `category_status`; their fetches finish in the background and warm the cache. `categories`
+    limits which providers are called and `fields` trims every item to the given attributes.
+
+    Every category returns its first page. When a provider found more items, the full set is
+    kept for a short while and `next_cursors` holds a cursor per category for the
+    recommendations_page endpoint, which serves the following pages without provider calls.
+
     :param request: The request object containing the emotion input.
     :return: The response object containing the recommendations.
     """
-    data = request.data
-    emotion = data.get("emotion", "") if data else ""
-    user_id = data.get("user_id", None) if data else None
-    print(f"Received recommendation request for emotion: {emotion}, user_id: {user_id}")
-    
-    if not emotion:
-        print("Error: No emotion provided in request")
-        return Response({"error": "No emotion provided"}, status=status.HTTP_400_BAD_REQUEST)
-    
-    # Save emotion to user's mood history if user_id is provided
-    if user_id:
-        try:
-            from users.models import UserProfile
-            user_profile = UserProfile.objects.get(id=user_id)
-            user_profile.mood_history.append(emotion)
-            user_profile.save()
-            print(f"Saved emotion '{emotion}' to user {user_profile.username}'s mood history")
-        except Exception as e:
-            print(f"Error saving mood to user history: {str(e)}")
+    params, error = parse_recommendation_request(request)
+    if error is not None:
+        return error
+    emotion, categories = params["emotion"], params["categories"]
+    save_mood_history(params["user_id"], emotion)
+    preferences = personalization.get_preferences(params["user_id"])
     
     try:
         # Create a default response structure with empty lists
         response_data = {
             "emotion": emotion,
-            "recommendations": {
-                "music": [],
-                "movies": [],
-                "webseries": [],
-                "stories": []
-            }
+            "recommendations": {category: [] for category in categories},
+            "category_status": {},
+            "next_cursors": {category: None for category in categories},
         }
-        
-        # Get music recommendations
-        print(f"Getting music recommendations for emotion: {emotion}")
-        try:
-            music = get_music_recommendation(emotion)
-            response_data["recommendations"]["music"] = music
-            print(f"Music recommendations count: {len(music)}")
-        except Exception as e:
-            print(f"Error getting music recommendations: {str(e)}")
-        
-        # Get movie recommendations
-        print(f"Getting movie recommendations for emotion: {emotion}")
-        try:
-            movies = get_movie_recommendation(emotion)
-            # Return up to 30 movies for display in the frontend
-            response_data["recommendations"]["movies"] = movies[:30] if len(movies) > 30 else movies
-            print(f"Movie recommendations count: {len(movies)}, returning {len(response_data['recommendations']['movies'])}")
-        except Exception as e:
-            print(f"Error getting movie recommendations: {str(e)}")
-        
-        # Get webseries recommendations
-        print(f"Getting webseries recommendations for emotion: {emotion}")
-        try:
-            webseries = get_webseries_recommendation(emotion)
-            # Return up to 30 web series for display in the frontend
-            response_data["recommendations"]["webseries"] = webseries[:30] if len(webseries) > 30 else webseries
-            print(f"Webseries recommendations count: {len(webseries)}, returning {len(response_data['recommendations']['webseries'])}")
-        except Exception as e:
-            print(f"Error getting webseries recommendations: {str(e)}")
-        
-        # Get story recommendations
-        print(f"Getting story recommendations for emotion: {emotion}")
-        try:
-            stories = get_story_recommendation(emotion)
-            response_data["recommendations"]["stories"] = stories
-            print(f"Story recommendations count: {len(stories)}")
-        except Exception as e:
-            print(f"Error getting story recommendations: {str(e)}")
-        
+        full_sets = {}
+        
+        # Fetch the requested categories concurrently and fill in each one as it finishes
+        print(f"Getting {', '.join(categories)} recommendations for emotion: {emotion}")
+        fetchers = {category: CATEGORY_FETCHERS[category] for category in categories}
+        for category, items, fetch_status, elapsed_ms in fetch_categories(emotion, fetchers, budget=params["budget"]):
+            response_data["category_status"][category] = fetch_status
+            if fetch_status != "ok":
+                print(f"No {category} recommendations ({fetch_status} after {elapsed_ms} ms)")
+                continue
+            full_sets[category] = project_items(personalize_items(category, items, preferences), params["fields"])
+            print(f"{category.capitalize()} recommendations count: {len(items)} after {elapsed_ms} ms")
+
+        # Return the first page of each category; the rest stays available under a cursor
+        pages, cursors = paginate_categories(emotion, full_sets, params["page_size"])
+        response_data["recommendations"].update(pages)
+        response_data["next_cursors"].update(cursors)
+
         # Log the final counts
         print(
-            f"Sending response with recommendation counts: music={len(response_data['recommendations']['music'])}, "
-            f"movies={len(response_data['recommendations']['movies'])}, "
-            f"webseries={len(response_data['recommendations']['webseries'])}, "
-            f"stories={len(response_data['recommendations']['stories'])}"
+            "Sending response with recommendation counts: " +
+            ", ".join(f"{category}={len(items)}" for category, items in response_data["recommendations"].items())
         )
         
         return Response(response_data)
     except Exception as e:
         print(f"Error in recommendations API: {str(e)}")
         return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@swagger_auto_schema(
+    method='get',
+    manual_parameters=[
+        openapi.Parameter('cursor', openapi.IN_QUERY, type=openapi.TYPE_STRING, required=True,
+                          description='A cursor from next_cursors or a previous page'),
+        openapi.Parameter('page_size', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                          description='Items per page (default 30 movies and web series, all remaining items otherwise)'),
+    ],
+    responses={
+        200: openapi.Response('Page retrieved successfully.'),
+        400: openapi.Response('Missing or invalid cursor or page_size.'),
+        404: openapi.Response('The cursor expired.'),
+    },
+)
+@api_view(['GET'])
+def recommendations_page(request):
+    """
+    This function returns the next page of a category from a stored recommendation set.
+
+    Pages are sliced from the set computed by the recommendations endpoint, so they stay
+    consistent with the first page and make no provider calls. Cursors expire after
+    RECOMMENDATION_CURSOR_TTL seconds; clients should then request fresh recommendations.
+
+    :param request: The request object containing the cursor.
+    :return: The response object containing the page items and the cursor of the next page.
+    """
+    cursor = request.query_params.get("cursor")
+    if not cursor:
+        return Response({"error": "No cursor provided"}, status=status.HTTP_400_BAD_REQUEST)
+    page_size, error = get_page_size(request)
+    if error is not None:
+        return error
+
+    try:
+        _, category, _ = parse_cursor(cursor)
+        page = load_page(cursor, page_size or CATEGORY_LIMITS.get(category))
+    except ValueError:
+        return Response({"error": "Invalid cursor"}, status=status.HTTP_400_BAD_REQUEST)
+    if page is None:
+        return Response({"error": "Cursor expired"}, status=status.HTTP_404_NOT_FOUND)
+    print(f"Serving {len(page['items'])} {page['category']} recommendations from offset {page['offset']}")
+    return Response(page)
+
+
+@swagger_auto_schema(
+    method='post',
+    request_body=openapi.Schema(
+        type=openapi.TYPE_OBJECT,
+        properties={
+            'items': openapi.Schema(
+                type=openapi.TYPE_ARRAY,
+                items=openapi.Schema(type=openapi.TYPE_OBJECT, properties={
+                    'emotion': openapi.Schema(type=openapi.TYPE_STRING),
+                    'user_id': openapi.Schema(type=openapi.TYPE_STRING),
+                }),
+                description='Inputs as (emotion, user_id) objects'),
+            'emotions': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_STRING),
+                                       description='Inputs as a list of emotions, used when items is not given'),
+            'user_ids': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_STRING),
+                                       description='Optional MongoDB user profile ID per emotion'),
+            'deadline_ms': openapi.Schema(type=openapi.TYPE_INTEGER,
+                                          description='Latency budget for the whole batch'),
+            'categories': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_STRING),
+                                         description='Only fetch these categories (music, movies, webseries, stories)'),
+            'fields': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_STRING),
+                                     description='Only return these attributes of each item'),
+        },
+    ),
+    responses={
+        200: openapi.Response('One result per input, in input order.'),
+        400: openapi.Response('No or too many inputs, or invalid parameters.'),
+    },
+)
+@api_view(['POST'])
+def recommendations_batch(request):
+    """
+    This function retrieves recommendations for many (emotion, user) inputs in one call.
+
+    Identical emotions (ignoring case and surrounding whitespace) are fetched once and
+    every distinct emotion's categories run on the shared fan-out pool, so a batch costs
+    one provider chain per distinct emotion. Each input with a user ID is then re-ranked
+    by that user's preferences. `categories`, `fields` and `deadline_ms` apply to the
+    whole batch. Batches come from jobs (dashboards, notifications) rather than users
+    reporting a mood, so nothing is written to the users' mood history.
+
+    :param request: The request object containing the batch inputs.
+    :return: The response object containing one result per input, in input order.
+    """
+    items, error = parse_batch_items(request)
+    if error is not None:
+        return error
+    options, error = parse_recommendation_options(request)
+    if error is not None:
+        return error
+
+    distinct = list(dict.fromkeys(emotion.strip().lower() for emotion, _ in items))
+    print(f"Received batch recommendation request for {len(items)} inputs, {len(distinct)} distinct emotions")
+
+    try:
+        fetched = {
+            emotion: {"items": {category: [] for category in options["categories"]}, "category_status": {}}
+            for emotion in distinct
+        }
+        fetchers = {category: CATEGORY_FETCHERS[category] for category in options["categories"]}
+        for emotion, category, category_items, fetch_status, elapsed_ms in fetch_batch(
+                distinct, fetchers, budget=options["budget"]):
+            fetched[emotion]["category_status"][category] = fetch_status
+            if fetch_status != "ok":
+                print(f"No {category} recommendations for {emotion} ({fetch_status} after {elapsed_ms} ms)")
+                continue
+            fetched[emotion]["items"][category] = category_items
+
+        # Inputs with the same emotion and user share their formatted recommendations
+        formatted = {}
+        preferences_by_user = {}
+        results = []
+        for emotion, user_id in items:
+            key = (emotion.strip().lower(), user_id)
+            if key not in formatted:
+                if user_id not in preferences_by_user:
+                    preferences_by_user[user_id] = personalization.get_preferences(user_id)
+                preferences = preferences_by_user[user_id]
+                formatted[key] = {
+                    category: format_category_items(category, personalize_items(category, category_items, preferences),
+                                                    options["fields"], options["page_size"])
+                    for category, category_items in fetched[key[0]]["items"].items()
+                }
+            results.append({
+                "emotion": emotion,
+                "user_id": user_id,
+                "recommendations": formatted[key],
+                "category_status": fetched[key[0]]["category_status"],
+            })
+
+        return Response({"results": results, "distinct_emotions": len(distinct)})
+    except Exception as e:
+        print(f"Error in batch recommendations API: {str(e)}")
+        return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def stream_category_chunks(params, encode):
+    """
+    Yield an encoded chunk per category as soon as its provider returns.
+
+    :param params: The parsed request parameters, see parse_recommendation_request.
+    :param encode: Chunk encoder taking an event name and a payload dict.
+    """
+    start = time.monotonic()
+    emotion, categories = params["emotion"], params["categories"]
+    yield encode("start", {"emotion": emotion, "categories": categories})
+
+    category_status = {}
+    try:
+        preferences = personalization.get_preferences(params["user_id"])
+        fetchers = {category: CATEGORY_FETCHERS[category] for category in categories}
+        for category, items, fetch_status, elapsed_ms in fetch_categories(emotion, fetchers, budget=params["budget"]):
+            category_status[category] = fetch_status
+            if fetch_status == "ok":
+                items = format_category_items(category, personalize_items(category, items, preferences),
+                                              params["fields"], params["page_size"])
+            else:
+                items = []
+            print(f"Streaming {len(items)} {category} recommendations ({fetch_status} after {elapsed_ms} ms)")
+            yield encode("category", {
+                "category": category,
+                "status": fetch_status,
+                "items": items,
+                "count": len(items),
+                "elapsed_ms": elapsed_ms,
+            })
+    except Exception as e:
+        print(f"Error in recommendations stream: {str(e)}")
+        yield encode("error", {"error": str(e)})
+
+    yield encode("done", {
+        "category_status": category_status,
+        "elapsed_ms": int((time.monotonic() - start) * 1000),
+    })
+
+
+@swagger_auto_schema(
+    method='get',
+    manual_parameters=[
+        openapi.Parameter('emotion', openapi.IN_QUERY, type=openapi.TYPE_STRING, required=True,
+                          description='Emotion for recommendations'),
+        openapi.Parameter('categories', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                          description='Comma-separated categories to fetch'),
+        openapi.Parameter('fields', openapi.IN_QUERY, type=openapi.TYPE_STRING,
+                          description='Comma-separated attributes returned for each item'),
+        openapi.Parameter('deadline_ms', openapi.IN_QUERY, type=openapi.TYPE_INTEGER,
+                          description='Latency budget; categories not ready in time are sent as pending'),
+    ],
+    responses={
+        200: openapi.Response('Stream of NDJSON lines or server-sent events, one per category.'),
+        400: openapi.Response('No emotion provided or invalid parameters.'),
+    },
+)
+@swagger_auto_schema(
+    method='post',
+    request_body=openapi.Schema(
+        type=openapi.TYPE_OBJECT,
+        properties={
+            'emotion': openapi.Schema(type=openapi.TYPE_STRING, description='Emotion for recommendations'),
+            'user_id': openapi.Schema(type=openapi.TYPE_STRING, description='MongoDB user profile ID'),
+            'deadline_ms': openapi.Schema(type=openapi.TYPE_INTEGER,
+                                          description='Latency budget; categories not ready in time are sent as pending'),
+            'categories': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_STRING),
+                                         description='Only fetch these categories (music, movies, webseries, stories)'),
+            'fields': openapi.Schema(type=openapi.TYPE_ARRAY, items=openapi.Schema(type=openapi.TYPE_STRING),
+                                     description='Only return these attributes of each item'),
+        },
+        required=['emotion'],
+    ),
+    responses={
+        200: openapi.Response('Stream of NDJSON lines or server-sent events, one per category.'),
+        400: openapi.Response('No emotion provided or invalid parameters.'),
+    },
+)
+@api_view(['GET', 'POST'])
+@renderer_classes([NDJSONRenderer, EventStreamRenderer])
+def recommendations_stream(request):
+    """
+    This function streams recommendations, sending each category as soon as its provider returns.
+
+    The stream is NDJSON by default and server-sent events when the client accepts
+    `text/event-stream` (as EventSource does) or passes `?format=sse`. It starts with a
+    "start" event, sends one "category" event per category with its items, status and
+    elapsed time, and ends with a "done" event.
+
+    :param request: The request object containing the same parameters as the recommendations endpoint.
+    :return: A streaming response.
+    """
+    params, error = parse_recommendation_request(request)
+    if error is not None:
+        return error
+    save_mood_history(params["user_id"], params["emotion"])
+
+    renderer = request.accepted_renderer
+    response = StreamingHttpResponse(stream_category_chunks(params, renderer.encode),
+                                     content_type=renderer.media_type)
+    response["Cache-Control"] = "no-cache"
+    # Stop nginx from buffering the stream
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@swagger_auto_schema(
+    method='get',
+    responses={
+        200: openapi.Response('Provider response cache statistics retrieved successfully.'),
+    },
+)
+@api_view(['GET'])
+def provider_cache_stats(request):
+    """
+    This function returns the hit, stale and miss counters of the provider response cache.
+
+    :param request: The request object.
+    :return: The response object containing the counters per provider.
+    """
+    return Response(response_cache.get_stats())
+
+
+@swagger_auto_schema(
+    method='get',
+    responses={
+        200: openapi.Response('Text emotion model statistics retrieved successfully.'),
+    },
+)
+@api_view(['GET'])
+def text_emotion_stats(request):
+    """
+    This function returns the load time, memory use and inference latency of the text emotion model in this worker,
+    the hit rate of its result cache and the share of texts answered by the keyword lexicon.
+
+    :param request: The request object.
+    :return: The response object containing the model and cache statistics.
+    """
+    return Response({**emotion_model.get_engine().stats(), "cache": emotion_cache.get_stats(),
+                     "lexicon": emotion_lexicon.get_stats()})
+
+
+@swagger_auto_schema(
+    method='get',
+    responses={
+        200: openapi.Response('Provider circuit breaker states retrieved successfully.'),
+    },
+)
+@api_view(['GET'])
+def provider_health(request):
+    """
+    This function returns the circuit breaker state of every outbound provider in this worker.
+
+    :param request: The request object.
+    :return: The response object containing the breaker state and recent failure rates per provider.
+    """
+    providers = sorted(set(http_client.PROVIDER_HOSTS.values()))
+    return Response({provider: get_circuit_breaker(provider).snapshot() for provider in providers})
@@ -112,7 +112,7 @@ SITE_ID = 1
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',  # Add whitenoise middleware
+    'api.middleware.AsyncWhiteNoiseMiddleware',  # Add whitenoise middleware (async capable)
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -212,6 +212,165 @@ else:
     }
     SESSION_ENGINE = "django.contrib.sessions.backends.db"
 
+# Recommendation settings
+# The music, movie, web series and story providers are fetched concurrently.
+# A category that misses its deadline (in seconds) is returned empty.
+RECOMMENDATION_FANOUT_WORKERS = int(os.getenv('RECOMMENDATION_FANOUT_WORKERS', '16'))
+RECOMMENDATION_DEFAULT_TIMEOUT = float(os.getenv('RECOMMENDATION_DEFAULT_TIMEOUT', '10'))
+RECOMMENDATION_CATEGORY_TIMEOUTS = {
+    'music': float(os.getenv('MUSIC_RECOMMENDATION_TIMEOUT', '8')),
+    'movies': float(os.getenv('MOVIE_RECOMMENDATION_TIMEOUT', '10')),
+    'webseries': float(os.getenv('WEBSERIES_RECOMMENDATION_TIMEOUT', '10')),
+    'stories': float(os.getenv('STORY_RECOMMENDATION_TIMEOUT', '6')),
+}
+# Overall latency budget of /api/recommendations/ in milliseconds, overridable per
+# request with `deadline_ms`. Categories not ready in time are returned as pending
+# and finish in the background to warm the cache. 0 disables the budget.
+RECOMMENDATION_DEADLINE_MS = int(os.getenv('RECOMMENDATION_DEADLINE_MS', '0'))
+
+# Maximum number of (emotion, user) inputs accepted by /api/recommendations/batch/
+RECOMMENDATION_BATCH_MAX_ITEMS = int(os.getenv('RECOMMENDATION_BATCH_MAX_ITEMS', '100'))
+
+# Seconds the full recommendation set behind a `next_cursors` cursor is kept for follow-up pages
+RECOMMENDATION_CURSOR_TTL = int(os.getenv('RECOMMENDATION_CURSOR_TTL', '600'))
+
+# Candidates are scored as a weighted sum of their normalized features (see
+# api/ranking.py) and selected with MMR; RECOMMENDATION_RANKING_DIVERSITY is the
+# weight of the genre-similarity penalty, 0 ranks by score only.
+RECOMMENDATION_RANKING_WEIGHTS = {
+    'rating': float(os.getenv('RANKING_RATING_WEIGHT', '0.45')),
+    'popularity': float(os.getenv('RANKING_POPULARITY_WEIGHT', '0.25')),
+    'votes': float(os.getenv('RANKING_VOTES_WEIGHT', '0.1')),
+    'recency': float(os.getenv('RANKING_RECENCY_WEIGHT', '0.1')),
+    'jitter': float(os.getenv('RANKING_JITTER_WEIGHT', '0.1')),
+}
+RECOMMENDATION_RANKING_DIVERSITY = float(os.getenv('RECOMMENDATION_RANKING_DIVERSITY', '0.3'))
+
+# Recommendations of a known user are re-ranked by a preference vector built from
+# the last PERSONALIZATION_HISTORY_LENGTH moods and tracks and cached for
+# PERSONALIZATION_CACHE_TTL seconds; PERSONALIZATION_WEIGHT is its share of the final order.
+PERSONALIZATION_WEIGHT = float(os.getenv('PERSONALIZATION_WEIGHT', '0.3'))
+PERSONALIZATION_CACHE_TTL = int(os.getenv('PERSONALIZATION_CACHE_TTL', '3600'))
+PERSONALIZATION_HISTORY_LENGTH = int(os.getenv('PERSONALIZATION_HISTORY_LENGTH', '100'))
+PERSONALIZATION_MAX_ARTISTS = int(os.getenv('PERSONALIZATION_MAX_ARTISTS', '200'))
+
+# Concurrent fetches of the same category and emotion are coalesced into one. With
+# the shared mode the leader holds a lease in the default cache for up to
+# RECOMMENDATION_SINGLEFLIGHT_LEASE seconds and publishes its result there.
+RECOMMENDATION_SINGLEFLIGHT_SHARED = os.getenv('RECOMMENDATION_SINGLEFLIGHT_SHARED', 'True' if REDIS_URL else 'False').lower() in ('true', '1')
+RECOMMENDATION_SINGLEFLIGHT_LEASE = int(os.getenv('RECOMMENDATION_SINGLEFLIGHT_LEASE', '15'))
+RECOMMENDATION_SINGLEFLIGHT_RESULT_TTL = int(os.getenv('RECOMMENDATION_SINGLEFLIGHT_RESULT_TTL', '5'))
+
+# Follow-up pages of a provider (e.g. extra TMDB pages) are fetched on a separate
+# pool, with at most PROVIDER_PAGE_PARALLELISM pages in flight per collector.
+PROVIDER_PAGE_WORKERS = int(os.getenv('PROVIDER_PAGE_WORKERS', '32'))
+PROVIDER_PAGE_PARALLELISM = int(os.getenv('PROVIDER_PAGE_PARALLELISM', '4'))
+
+# Outbound provider HTTP client
+# Each provider host keeps a pool of keep-alive connections. The category and page
+# pools are shared by every request thread of a process, so a process has at most
+# one provider call in flight per category and page worker; the per-host pool is
+# sized to match unless overridden.
+PROVIDER_HTTP_POOL_MAXSIZE = int(os.getenv('PROVIDER_HTTP_POOL_MAXSIZE', str(RECOMMENDATION_FANOUT_WORKERS + PROVIDER_PAGE_WORKERS)))
+PROVIDER_HTTP_CONNECT_TIMEOUT = float(os.getenv('PROVIDER_HTTP_CONNECT_TIMEOUT', '3.05'))
+PROVIDER_HTTP_READ_TIMEOUT = float(os.getenv('PROVIDER_HTTP_READ_TIMEOUT', '10'))
+PROVIDER_HTTP_RETRIES = int(os.getenv('PROVIDER_HTTP_RETRIES', '2'))
+PROVIDER_HTTP_BACKOFF = float(os.getenv('PROVIDER_HTTP_BACKOFF', '0.3'))
+# Connection limit of the async client used by the /api/async/ views (per event loop)
+PROVIDER_ASYNC_MAX_CONNECTIONS = int(os.getenv('PROVIDER_ASYNC_MAX_CONNECTIONS', '200'))
+
+# Provider rate limits as token buckets: `rate` requests per second with bursts of
+# up to `capacity`. With the shared limit enabled every worker draws from the same
+# budget in the default cache backend. A 429 is retried once if its Retry-After is
+# at most PROVIDER_MAX_RETRY_AFTER seconds; calls that would wait longer than that
+# for the budget fail fast so the recommendation falls back instead.
+PROVIDER_RATE_LIMITS = {
+    'tmdb': {'rate': float(os.getenv('TMDB_RATE_LIMIT', '40')), 'capacity': 20},
+    'spotify': {'rate': float(os.getenv('SPOTIFY_RATE_LIMIT', '10')), 'capacity': 20},
+    'google_books': {'rate': float(os.getenv('GOOGLE_BOOKS_RATE_LIMIT', '10')), 'capacity': 10},
+}
+PROVIDER_RATE_LIMIT_SHARED = os.getenv('PROVIDER_RATE_LIMIT_SHARED', 'True' if REDIS_URL else 'False').lower() in ('true', '1')
+PROVIDER_MAX_RETRY_AFTER = float(os.getenv('PROVIDER_MAX_RETRY_AFTER', '5'))
+
+# Circuit breaker applied to every provider (per worker). It opens when at least
+# `failure_rate` of the last `window` calls failed or `slow_call_rate` took longer
+# than `slow_call_seconds`; after `open_seconds` a few probe calls are let through.
+PROVIDER_CIRCUIT_BREAKER = {
+    'window': int(os.getenv('CIRCUIT_BREAKER_WINDOW', '20')),
+    'min_calls': int(os.getenv('CIRCUIT_BREAKER_MIN_CALLS', '10')),
+    'failure_rate': float(os.getenv('CIRCUIT_BREAKER_FAILURE_RATE', '0.5')),
+    'slow_call_seconds': float(os.getenv('CIRCUIT_BREAKER_SLOW_CALL_SECONDS', '5')),
+    'slow_call_rate': float(os.getenv('CIRCUIT_BREAKER_SLOW_CALL_RATE', '0.8')),
+    'open_seconds': float(os.getenv('CIRCUIT_BREAKER_OPEN_SECONDS', '30')),
+    'half_open_calls': int(os.getenv('CIRCUIT_BREAKER_HALF_OPEN_CALLS', '3')),
+}
+
+# Provider response cache (stored in the default cache backend)
+# Successful provider responses are served from the cache for `ttl` seconds, then
+# for up to `stale` more seconds while a background refresh fetches a new copy.
+PROVIDER_CACHE_TTLS = {
+    'spotify': {'ttl': int(os.getenv('SPOTIFY_CACHE_TTL', '3600')), 'stale': 3600},
+    'tmdb': {'ttl': int(os.getenv('TMDB_CACHE_TTL', '21600')), 'stale': 21600},
+    'google_books': {'ttl': int(os.getenv('GOOGLE_BOOKS_CACHE_TTL', '86400')), 'stale': 86400},
+}
+
+# Local TMDB media catalog (SQLite), filled by `manage.py refresh_media_catalog`.
+# Set MEDIA_CATALOG_PATH to an empty string to always use live TMDB calls.
+MEDIA_CATALOG_PATH = os.getenv('MEDIA_CATALOG_PATH', str(BASE_DIR / 'media_catalog.sqlite3'))
+
+# Text emotion model (api/emotion_model.py), downloaded by download_models.py.
+# The weights are memory-mapped on first use; set TEXT_EMOTION_PRELOAD=True and
+# start gunicorn with --preload to load them once in the master and share them
+# with every worker. Without torch/transformers or the model file the text
+# emotion endpoints answer TEXT_EMOTION_FALLBACK.
+TEXT_EMOTION_MODEL_DIR = os.getenv('TEXT_EMOTION_MODEL_DIR', str(BASE_DIR.parent / 'ai_ml' / 'models' / 'text_emotion_model'))
+# Config and tokenizer used when the model directory only holds the weights
+TEXT_EMOTION_BASE_MODEL = os.getenv('TEXT_EMOTION_BASE_MODEL', 'distilbert-base-uncased')
+# Comma-separated class labels in the order of the classifier outputs. Every label
+# must be one of the app emotions (api.views.EMOTIONS). Without it, labels.json or
+# the id2label map of config.json in TEXT_EMOTION_MODEL_DIR is used; if none
+# defines them the model is not used (TEXT_EMOTION_FALLBACK is answered and the
+# error shows in the text emotion stats) and TEXT_EMOTION_PRELOAD fails startup.
+TEXT_EMOTION_LABELS = [label.strip() for label in os.getenv('TEXT_EMOTION_LABELS', '').split(',') if label.strip()]
+TEXT_EMOTION_MAX_LENGTH = int(os.getenv('TEXT_EMOTION_MAX_LENGTH', '128'))
+TEXT_EMOTION_THREADS = int(os.getenv('TEXT_EMOTION_THREADS', '0'))
+TEXT_EMOTION_PRELOAD = os.getenv('TEXT_EMOTION_PRELOAD', 'False').lower() in ('true', '1')
+TEXT_EMOTION_FALLBACK = os.getenv('TEXT_EMOTION_FALLBACK', 'happy')
+# Concurrent text emotion requests can be batched: up to TEXT_EMOTION_BATCH_MAX_SIZE
+# texts collected for at most TEXT_EMOTION_BATCH_MAX_WAIT_MS run as one forward
+# pass. A max size of 1 (the default) disables batching; only enable it after
+# measuring benchmarks/micro_batching.py-style load against the real model.
+TEXT_EMOTION_BATCH_MAX_SIZE = int(os.getenv('TEXT_EMOTION_BATCH_MAX_SIZE', '1'))
+TEXT_EMOTION_BATCH_MAX_WAIT_MS = float(os.getenv('TEXT_EMOTION_BATCH_MAX_WAIT_MS', '5'))
+TEXT_EMOTION_TIMEOUT = float(os.getenv('TEXT_EMOTION_TIMEOUT', '10'))
+# Text emotion results are memoized by normalized text in an LRU of
+# TEXT_EMOTION_CACHE_SIZE entries per worker (0 disables it). With
+# TEXT_EMOTION_CACHE_SHARED=True they are also shared through the Django cache
+# for TEXT_EMOTION_CACHE_TTL seconds.
+TEXT_EMOTION_CACHE_SIZE = int(os.getenv('TEXT_EMOTION_CACHE_SIZE', '10000'))
+TEXT_EMOTION_CACHE_SHARED = os.getenv('TEXT_EMOTION_CACHE_SHARED', 'False').lower() in ('true', '1')
+TEXT_EMOTION_CACHE_TTL = int(os.getenv('TEXT_EMOTION_CACHE_TTL', '86400'))
+# Texts that name their emotion outright are answered by a keyword lexicon
+# without running the model. A text is only answered when its confidence reaches
+# TEXT_EMOTION_LEXICON_THRESHOLD and it has at most TEXT_EMOTION_LEXICON_MAX_WORDS
+# words; tune both with `python manage.py evaluate_text_emotion`.
+TEXT_EMOTION_LEXICON_ENABLED = os.getenv('TEXT_EMOTION_LEXICON_ENABLED', 'True').lower() in ('true', '1')
+TEXT_EMOTION_LEXICON_THRESHOLD = float(os.getenv('TEXT_EMOTION_LEXICON_THRESHOLD', '0.6'))
+TEXT_EMOTION_LEXICON_MAX_WORDS = int(os.getenv('TEXT_EMOTION_LEXICON_MAX_WORDS', '30'))
+
+# Facial images are decoded in memory; uploads larger than
+# FILE_UPLOAD_MAX_MEMORY_SIZE bytes are spooled to disk by Django instead.
+# They are decoded (at reduced scale for JPEGs) to at most
+# FACIAL_EMOTION_IMAGE_SIZE pixels per side.
+FILE_UPLOAD_MAX_MEMORY_SIZE = int(os.getenv('FILE_UPLOAD_MAX_MEMORY_SIZE', str(5 * 1024 * 1024)))
+FACIAL_EMOTION_IMAGE_SIZE = int(os.getenv('FACIAL_EMOTION_IMAGE_SIZE', '224'))
+
+# Spotify client-credentials token caching
+# The token is refreshed this many seconds before it expires. Enable the shared
+# cache to let every worker reuse the token stored in the default cache backend.
+SPOTIFY_TOKEN_REFRESH_MARGIN = int(os.getenv('SPOTIFY_TOKEN_REFRESH_MARGIN', '60'))
+SPOTIFY_TOKEN_SHARED_CACHE = os.getenv('SPOTIFY_TOKEN_SHARED_CACHE', 'True' if REDIS_URL else 'False').lower() in ('true', '1')
+
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
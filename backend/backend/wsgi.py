@@ -14,3 +14,12 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
 
 application = get_wsgi_application()
+
+# Map the text emotion model before gunicorn (with --preload) forks its workers, so they share its weights
+from django.conf import settings  # noqa: E402
+
+if settings.TEXT_EMOTION_PRELOAD:
+    from api.emotion_model import get_engine
+
+    # Misconfigured labels stop the app from starting instead of answering the fallback emotion
+    get_engine().load(strict=True)
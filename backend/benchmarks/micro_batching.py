@@ -0,0 +1,124 @@
+"""
+Throughput vs latency of micro-batched text emotion inference.
+
+The text model needs torch and the downloaded weights, so a stand-in with the
+same cost shape runs on CPU here: texts are "tokenized" into words, padded to
+the longest text of the batch and pushed through NumPy transformer layers of
+DistilBERT's width (masked self-attention and a 3072-wide feed-forward). Like a
+real forward pass, a call costs more per padded token in small matrix products
+than in large ones, and releases the GIL while computing.
+
+CLIENTS threads each classify REQUESTS_PER_CLIENT texts of mixed length, one at a
+time, either calling the model directly or through a MicroBatcher with various
+max batch sizes and waits.
+
+Run from the backend directory:
+
+    python benchmarks/micro_batching.py
+"""
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.micro_batcher import MicroBatcher  # noqa: E402
+
+HIDDEN_SIZE = 768
+LAYERS = 2
+LABELS = 20
+CLIENTS = 16
+REQUESTS_PER_CLIENT = 8
+CONFIGS = [(1, 0), (4, 0.002), (8, 0.002), (16, 0.005), (16, 0.02)]
+WORDS = "today was long and i feel tired but my friends made me laugh so much tonight".split()
+
+
+class FakeTextModel:
+    def __init__(self):
+        rng = np.random.default_rng(0)
+
+        def dense(rows, cols):
+            return rng.standard_normal((rows, cols), dtype=np.float32) / rows ** 0.5
+
+        self.embeddings = rng.standard_normal((len(WORDS) + 1, HIDDEN_SIZE), dtype=np.float32)
+        self.layers = [(dense(HIDDEN_SIZE, 3 * HIDDEN_SIZE), dense(HIDDEN_SIZE, HIDDEN_SIZE),
+                        dense(HIDDEN_SIZE, 4 * HIDDEN_SIZE), dense(4 * HIDDEN_SIZE, HIDDEN_SIZE))
+                       for _ in range(LAYERS)]
+        self.classifier = dense(HIDDEN_SIZE, LABELS)
+        self.index = {word: i + 1 for i, word in enumerate(WORDS)}
+
+    def predict(self, texts):
+        tokens = [[self.index.get(word, 0) for word in text.split()] for text in texts]
+        length = max(len(ids) for ids in tokens)
+        padded = np.zeros((len(texts), length), dtype=np.intp)
+        mask = np.full((len(texts), 1, length), -1e9, dtype=np.float32)
+        for row, ids in enumerate(tokens):
+            padded[row, :len(ids)] = ids
+            mask[row, :, :len(ids)] = 0
+        # Dense layers run on all tokens of the batch as one (batch * length, hidden) matrix
+        hidden = self.embeddings[padded].reshape(-1, HIDDEN_SIZE)
+        for qkv, out, up, down in self.layers:
+            q, k, v = np.split((hidden @ qkv).reshape(len(texts), length, -1), 3, axis=-1)
+            scores = q @ k.transpose(0, 2, 1) / HIDDEN_SIZE ** 0.5 + mask
+            scores = np.exp(scores - scores.max(axis=-1, keepdims=True))
+            scores /= scores.sum(axis=-1, keepdims=True)
+            hidden = hidden + (scores @ v).reshape(-1, HIDDEN_SIZE) @ out
+            hidden = hidden + np.maximum(hidden @ up, 0) @ down
+        return (hidden.reshape(len(texts), length, -1)[:, 0] @ self.classifier).argmax(axis=1).tolist()
+
+
+def make_texts(count, seed):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(rng.choice((8, 16, 32, 64)))) for _ in range(count)]
+
+
+def run(classify):
+    latencies = []
+    lock = threading.Lock()
+
+    def client(seed):
+        for text in make_texts(REQUESTS_PER_CLIENT, seed):
+            start = time.perf_counter()
+            classify(text)
+            elapsed = time.perf_counter() - start
+            with lock:
+                latencies.append(elapsed)
+
+    threads = [threading.Thread(target=client, args=(seed,)) for seed in range(CLIENTS)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    total = time.perf_counter() - start
+    latencies.sort()
+    return (len(latencies) / total, statistics.median(latencies) * 1000,
+            latencies[int(len(latencies) * 0.95)] * 1000)
+
+
+def main():
+    model = FakeTextModel()
+    model.predict(make_texts(8, -1))
+    print(f"{CLIENTS} clients x {REQUESTS_PER_CLIENT} requests, {os.cpu_count()} CPUs")
+    print(f"{'max batch':>9} {'max wait':>9} {'req/s':>8} {'p50':>9} {'p95':>9} {'mean batch':>11}")
+    for max_batch_size, max_wait in CONFIGS:
+        if max_batch_size == 1:
+            throughput, p50, p95 = run(lambda text: model.predict([text])[0])
+            mean_batch = 1
+        else:
+            batcher = MicroBatcher(model.predict, max_batch_size=max_batch_size, max_wait=max_wait,
+                                   size_fn=lambda text: text.count(" ") + 1)
+            throughput, p50, p95 = run(batcher)
+            mean_batch = batcher.stats()["mean_batch_size"]
+        label = "none" if max_batch_size == 1 else max_batch_size
+        print(f"{label:>9} {max_wait * 1000:>6.0f} ms {throughput:>8.0f} {p50:>6.1f} ms {p95:>6.1f} ms "
+              f"{mean_batch:>11}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Micro-benchmark of candidate ranking at 1k-100k candidates, selecting 50:
+
+- sort-and-shuffle: the previous sort by rating followed by random.shuffle
+- python weighted: the same weighted score as the ranking module, computed per item in Python
+- numpy score: the vectorized score and top-k of the ranking module
+- numpy + MMR: the vectorized score followed by MMR selection over genres
+
+Run from the backend directory:
+
+    python benchmarks/ranking.py
+"""
+import datetime
+import math
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.ranking import DEFAULT_WEIGHTS, FEATURES, RECENCY_HALF_LIFE_YEARS, get_weights, rank  # noqa: E402
+
+SELECT = 50
+GENRES = [28, 12, 16, 35, 80, 99, 18, 10751, 14, 36, 27, 10402, 9648, 10749, 878, 53, 10752, 37]
+
+
+def make_candidates(count):
+    rng = random.Random(count)
+    return [{
+        "rating": round(rng.uniform(0, 10), 1),
+        "popularity": rng.expovariate(1 / 50),
+        "votes": rng.randint(0, 20000),
+        "year": rng.randint(1960, 2024),
+        "genres": rng.sample(GENRES, rng.randint(1, 3)),
+    } for _ in range(count)]
+
+
+def sort_and_shuffle(candidates):
+    items = sorted(candidates, key=lambda m: m["rating"], reverse=True)[:SELECT]
+    random.shuffle(items)
+    return items
+
+
+def python_weighted(candidates):
+    this_year = datetime.date.today().year
+    columns = {
+        "rating": [c["rating"] for c in candidates],
+        "popularity": [math.log1p(c["popularity"]) for c in candidates],
+        "votes": [math.log1p(c["votes"]) for c in candidates],
+    }
+    bounds = {name: (min(values), max(values) - min(values) or 1) for name, values in columns.items()}
+    scored = []
+    for i, c in enumerate(candidates):
+        value = random.random() * DEFAULT_WEIGHTS["jitter"]
+        for name, values in columns.items():
+            low, span = bounds[name]
+            value += DEFAULT_WEIGHTS[name] * (values[i] - low) / span
+        value += DEFAULT_WEIGHTS["recency"] * 2 ** (-max(this_year - c["year"], 0) / RECENCY_HALF_LIFE_YEARS)
+        scored.append((value, i))
+    scored.sort(reverse=True)
+    return [candidates[i] for _, i in scored[:SELECT]]
+
+
+def numpy_rank(columns, diversity):
+    return rank(SELECT, columns["rating"], columns["popularity"], columns["votes"], columns["year"],
+                columns["genres"], diversity=diversity, weights=WEIGHTS)
+
+
+WEIGHTS = None
+
+
+def main():
+    global WEIGHTS
+    from django.conf import settings
+    settings.configure()
+    WEIGHTS = get_weights()
+    assert len(WEIGHTS) == len(FEATURES)
+
+    print(f"{'candidates':>10} {'sort+shuffle':>13} {'python weighted':>16} {'numpy score':>12} "
+          f"{'numpy + MMR':>12} {'vs python':>10}")
+    for count in (1000, 10000, 100000):
+        candidates = make_candidates(count)
+        # The providers hand over feature columns, so building them is not part of the timing
+        columns = {name: [c[name] for c in candidates] for name in ("rating", "popularity", "votes", "year", "genres")}
+        number = max(1, 20000 // count)
+
+        def best(fn):
+            return min(timeit.repeat(fn, number=number, repeat=3)) / number * 1000
+
+        baseline = best(lambda: sort_and_shuffle(candidates))
+        python = best(lambda: python_weighted(candidates))
+        vectorized = best(lambda: numpy_rank(columns, 0))
+        mmr = best(lambda: numpy_rank(columns, 0.3))
+        print(f"{count:>10} {baseline:>10.2f} ms {python:>13.2f} ms {vectorized:>9.2f} ms {mmr:>9.2f} ms "
+              f"{python / vectorized:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Micro-benchmark of TMDB result collection: the previous per-item any() title scan
+against the shared hash-set collector, at increasing targets.
+
+Run from the backend directory:
+
+    python benchmarks/tmdb_collector.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.tmdb_collector import TmdbCollector  # noqa: E402
+
+PAGE_SIZE = 20
+
+
+def make_pages(target):
+    # Every fourth result repeats a title of the previous page, like overlapping TMDB pages
+    pages = []
+    for page in range(target // PAGE_SIZE * 2 + 1):
+        results = []
+        for i in range(PAGE_SIZE):
+            n = page * PAGE_SIZE + i
+            if page and i % 4 == 0:
+                n -= PAGE_SIZE
+            results.append({"id": n + 1, "title": f"Movie {n}", "poster_path": "/p.jpg",
+                            "release_date": "2020-01-01", "overview": "", "vote_average": n % 10})
+        pages.append(results)
+    return pages
+
+
+def linear_scan(pages, target):
+    collected = []
+    for results in pages:
+        for item in results:
+            if len(collected) >= target:
+                break
+            title = item.get("title", "")
+            if any(m.get("title") == title for m in collected):
+                continue
+            collected.append({"title": title, "rating": item.get("vote_average", 0)})
+        if len(collected) >= target:
+            break
+    return collected
+
+
+def hash_set(pages, target):
+    return TmdbCollector("movie", target).consume(iter(pages)).records
+
+
+def main():
+    print(f"{'target':>8} {'any() scan':>14} {'collector':>14} {'speedup':>9}")
+    for target in (50, 200, 1000, 5000):
+        pages = make_pages(target)
+        number = max(1, 2000 // target)
+        old = min(timeit.repeat(lambda: linear_scan(pages, target), number=number, repeat=3)) / number
+        new = min(timeit.repeat(lambda: hash_set(pages, target), number=number, repeat=3)) / number
+        print(f"{target:>8} {old * 1000:>11.2f} ms {new * 1000:>11.2f} ms {old / new:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""
+Benchmark of /api/recommendations/ (sync WSGI view) against /api/async/recommendations/
+(native async view under ASGI) at the same number of concurrent requests.
+
+Providers are simulated with a fixed latency at the HTTP client layer: requests'
+Session.request sleeps for the sync path and an httpx.MockTransport awaits for the
+async path, so both paths run their real views, fan-out, collectors and clients.
+Caching and rate limits are disabled so every request pays for its provider calls.
+
+The WSGI path serves requests on --workers threads (like gunicorn sync workers);
+the ASGI path serves all of them on one event loop. Run from the backend directory:
+
+    python benchmarks/wsgi_vs_asgi.py --requests 200 --concurrency 100 --latency 0.2
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'backend.settings')
+os.environ.setdefault('TMDB_API_KEY', 'benchmark')
+
+import django  # noqa: E402
+
+django.setup()
+
+import httpx  # noqa: E402
+from django.test import AsyncClient, Client, override_settings  # noqa: E402
+
+from api import async_http_client  # noqa: E402
+
+
+def payload(i):
+    # A distinct emotion per request, so single-flight does not coalesce them
+    return {"emotion": f"happy-{i}"}
+
+
+def fake_payload(url):
+    if "spotify" in url:
+        return {"tracks": [{"name": f"Song {i}", "popularity": i, "artists": [{"name": "Band"}],
+                            "album": {"name": "Album", "images": [{"url": "https://i.scdn.co/a.jpg"}]},
+                            "external_urls": {"spotify": "https://open.spotify.com/track/x"}}
+                           for i in range(50)]}
+    if "googleapis" in url:
+        return {"items": [{"volumeInfo": {"title": f"Book {i}", "imageLinks": {"thumbnail": "https://b/t.jpg"},
+                                          "averageRating": i % 5}} for i in range(30)]}
+    page = abs(hash(url)) % 10000
+    return {"total_pages": 5, "results": [
+        {"id": page * 100 + i, "title": f"Movie {page}-{i}", "name": f"Show {page}-{i}", "poster_path": "/p.jpg",
+         "release_date": "2020-01-01", "first_air_date": "2020-01-01", "vote_average": i % 10}
+        for i in range(20)]}
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def run_wsgi(requests, concurrency, workers, latency):
+    def slow_request(session, method, url, **kwargs):
+        time.sleep(latency)
+        full_url = url + "?" + "&".join(f"{k}={v}" for k, v in sorted((kwargs.get("params") or {}).items()))
+        response = MagicMock(status_code=200, headers={})
+        response.json.return_value = fake_payload(full_url)
+        return response
+
+    client = Client()
+
+    def one(i):
+        start = time.monotonic()
+        response = client.post("/api/recommendations/", payload(i), content_type="application/json")
+        assert response.status_code == 200, response.status_code
+        return time.monotonic() - start
+
+    with patch("requests.Session.request", slow_request):
+        start = time.monotonic()
+        # `concurrency` clients queue on `workers` sync workers
+        with ThreadPoolExecutor(max_workers=min(workers, concurrency)) as pool:
+            latencies = list(pool.map(one, range(requests)))
+        return time.monotonic() - start, latencies
+
+
+def run_asgi(requests, concurrency, latency):
+    async def handler(request):
+        await asyncio.sleep(latency)
+        return httpx.Response(200, json=fake_payload(str(request.url)))
+
+    async def main():
+        client = AsyncClient()
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one(i):
+            async with semaphore:
+                start = time.monotonic()
+                response = await client.post("/api/async/recommendations/", payload(i),
+                                             content_type="application/json")
+                assert response.status_code == 200, response.status_code
+                return time.monotonic() - start
+
+        start = time.monotonic()
+        latencies = await asyncio.gather(*(one(i) for i in range(requests)))
+        return time.monotonic() - start, latencies
+
+    build = lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler))  # noqa: E731
+    with patch.object(async_http_client, "_build_client", build):
+        return asyncio.run(main())
+
+
+def report(name, total, latencies):
+    print(f"{name:<6} {len(latencies) / total:>8.1f} req/s   p50 {statistics.median(latencies) * 1000:>7.0f} ms"
+          f"   p95 {percentile(latencies, 0.95) * 1000:>7.0f} ms   total {total:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--workers", type=int, default=4, help="Sync workers of the WSGI path (WEB_CONCURRENCY).")
+    parser.add_argument("--latency", type=float, default=0.2, help="Simulated provider latency in seconds.")
+    args = parser.parse_args()
+
+    overrides = dict(
+        ALLOWED_HOSTS=["*"], MEDIA_CATALOG_PATH="", PROVIDER_CACHE_TTLS={}, PROVIDER_RATE_LIMITS={},
+        RECOMMENDATION_SINGLEFLIGHT_SHARED=False,
+    )
+    with override_settings(**overrides), \
+            patch("api.views.get_spotify_token", return_value="token"), \
+            patch("api.async_views.get_spotify_token", return_value="token"), \
+            patch("builtins.print"):
+        wsgi = run_wsgi(args.requests, args.concurrency, args.workers, args.latency)
+        asgi = run_asgi(args.requests, args.concurrency, args.latency)
+
+    print(f"{args.requests} requests, {args.concurrency} concurrent, {args.latency * 1000:.0f} ms provider latency")
+    report("WSGI", *wsgi)
+    report("ASGI", *asgi)
+
+
+if __name__ == "__main__":
+    main()
@@ -10,3 +10,13 @@ mkdir -p static
 
 # Collect static files
 python manage.py collectstatic --no-input
+
+# Pre-warm the recommendation cache when it is shared with the web workers
+if [ -n "$REDIS_URL" ]; then
+    python manage.py warm_recommendations || echo "Recommendation cache warm-up failed, continuing"
+fi
+
+# Build the local TMDB media catalog used by the movie and web series recommendations
+if [ -n "$TMDB_API_KEY" ]; then
+    python manage.py refresh_media_catalog || echo "Media catalog refresh failed, continuing"
+fi
@@ -11,6 +11,7 @@ import json
 
 from django.views.decorators.csrf import csrf_exempt
 from .serializers import UserSerializer, UserProfileSerializer
+from api.personalization import invalidate_preferences
 from rest_framework_simplejwt.tokens import RefreshToken
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
@@ -585,6 +586,7 @@ def user_mood_history(request, user_id):
             if mood:
                 user.mood_history.append(mood)
                 user.save()
+                invalidate_preferences(user_id)
                 return JsonResponse({"message": "Mood history updated."}, status=201)
             else:
                 return JsonResponse({"error": "Mood is required."}, status=400)
@@ -599,6 +601,7 @@ def user_mood_history(request, user_id):
             if mood_to_delete in user.mood_history:
                 user.mood_history.remove(mood_to_delete)
                 user.save()
+                invalidate_preferences(user_id)
                 return JsonResponse({"message": "Mood deleted."}, status=204)
             else:
                 return JsonResponse({"error": "Mood not found in history."}, status=404)
@@ -638,6 +641,7 @@ def user_listening_history(request, user_id):
             if track:
                 user.listening_history.append(track)
                 user.save()
+                invalidate_preferences(user_id)
                 return JsonResponse({"message": "Listening history updated."}, status=201)
             else:
                 return JsonResponse({"error": "Track is required."}, status=400)
@@ -652,6 +656,7 @@ def user_listening_history(request, user_id):
             if track_to_delete in user.listening_history:
                 user.listening_history.remove(track_to_delete)
                 user.save()
+                invalidate_preferences(user_id)
                 return JsonResponse({"message": "Track deleted."}, status=204)
             else:
                 return JsonResponse({"error": "Track not found in history."}, status=404)